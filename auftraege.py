@@ -0,0 +1,139 @@
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class SchürfAuftrag:
+    "Ein Schürf-Auftrag mit Status und Fortschritt, der im Hintergrund abgearbeitet wird."
+
+    def __init__(self, auslöser):
+        self.id = uuid.uuid4().hex
+        self.auslöser = auslöser
+        self.status = 'wartend'
+        self.nachricht = None
+        self.erstellt = time.time()
+        self.gestartet = None
+        self.beendet = None
+        self.versuche = 0
+        self.block = None
+        self.abbruch = threading.Event()
+
+    def fortschritt_melden(self, versuche):
+        "Eine Methode, die vom Schürfer mit der Anzahl der bisher geprüften Nonces aufgerufen wird."
+
+        self.versuche = versuche
+
+    def dauer(self):
+        "Eine Methode, die die bisherige bzw. gesamte Laufzeit des Auftrags in Sekunden zurückgibt."
+
+        if self.gestartet is None:
+            return 0.0
+        return (self.beendet or time.time()) - self.gestartet
+
+    def in_dictionary_umwandeln(self):
+        "Eine Methode, die den Auftrag in ein Dictionary umwandelt."
+
+        dauer = self.dauer()
+        return {
+            'id': self.id,
+            'auslöser': self.auslöser,
+            'status': self.status,
+            'nachricht': self.nachricht,
+            'versuche': self.versuche,
+            'hashrate': self.versuche / dauer if dauer > 0 else 0.0,
+            'dauer': dauer,
+            'block': self.block
+        }
+
+
+class SchürfWarteschlange:
+    "Eine Warteschlange, in der ein Hintergrund-Thread Schürf-Aufträge nacheinander abarbeitet."
+
+    def __init__(self, blockchain, nach_dem_schürfen=None, max_gespeicherte_aufträge=100):
+        self.blockchain = blockchain
+        self.nach_dem_schürfen = nach_dem_schürfen
+        self.max_gespeicherte_aufträge = max_gespeicherte_aufträge
+
+        self._warteschlange = queue.Queue()
+        self._aufträge = OrderedDict()
+        self._aktueller_auftrag = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._arbeiten, daemon=True)
+        self._thread.start()
+
+    def einreihen(self, auslöser='manuell'):
+        "Eine Methode, die einen Schürf-Auftrag einreiht. Wartet bereits ein Auftrag, wird dieser zurückgegeben."
+
+        with self._lock:
+            # Ein wartender Auftrag schürft ohnehin alle offenen Transaktionen, ein zweiter wäre überflüssig
+            for auftrag in reversed(self._aufträge.values()):
+                if auftrag.status == 'wartend':
+                    return auftrag
+
+            auftrag = SchürfAuftrag(auslöser)
+            self._aufträge[auftrag.id] = auftrag
+            while len(self._aufträge) > self.max_gespeicherte_aufträge:
+                self._aufträge.popitem(last=False)
+
+        self._warteschlange.put(auftrag)
+        return auftrag
+
+    def hole(self, auftrag_id):
+        "Eine Methode, die den Auftrag mit der angegebenen ID zurückgibt oder None."
+
+        with self._lock:
+            return self._aufträge.get(auftrag_id)
+
+    def ist_beschäftigt(self):
+        "Eine Methode, die angibt, ob gerade geschürft wird oder Aufträge warten."
+
+        return self._aktueller_auftrag is not None or not self._warteschlange.empty()
+
+    def aktuellen_abbrechen(self, grund):
+        "Eine Methode, die den gerade laufenden Auftrag abbricht (z.B. weil eine Peer-Node einen neuen Block geliefert hat)."
+
+        auftrag = self._aktueller_auftrag
+        if auftrag is not None:
+            logger.info("Breche Schürf-Auftrag %.8s ab: %s", auftrag.id, grund)
+            auftrag.nachricht = grund
+            auftrag.abbruch.set()
+
+    def _arbeiten(self):
+        "Eine Methode, die im Hintergrund-Thread einen Auftrag nach dem anderen schürft."
+
+        while True:
+            auftrag = self._warteschlange.get()
+            self._aktueller_auftrag = auftrag
+            auftrag.status = 'läuft'
+            auftrag.gestartet = time.time()
+
+            try:
+                neuer_block = self.blockchain.schürfe_offene_transaktionen(
+                    abbruch=auftrag.abbruch,
+                    fortschritt=auftrag.fortschritt_melden
+                )
+
+                if neuer_block:
+                    auftrag.status = 'fertig'
+                    auftrag.nachricht = 'Neuer Block erfolgreich geschürft.'
+                    auftrag.block = neuer_block.in_dictionary_umwandeln()
+                    if self.nach_dem_schürfen is not None:
+                        self.nach_dem_schürfen(neuer_block)
+                else:
+                    auftrag.status = 'abgebrochen'
+                    if not auftrag.abbruch.is_set():
+                        auftrag.nachricht = 'Keine offenen Transaktionen oder Chain während des Schürfens geändert.'
+
+            except Exception as e:
+                logger.exception("Fehler im Schürf-Auftrag %.8s: %s", auftrag.id, e)
+                auftrag.status = 'fehlgeschlagen'
+                auftrag.nachricht = str(e)
+
+            finally:
+                auftrag.beendet = time.time()
+                self._aktueller_auftrag = None
@@ -0,0 +1,379 @@
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import binaerformat
+from blockchain import MAX_ZIEL, PRÜF_INTERVALL, Block, Blockchain, suche_nonce
+from mempool import transaktions_id
+
+# Konsensregeln der synthetischen Chains: niedrigste Schwierigkeit und Zeitstempel genau im Abstand der Ziel-Blockzeit,
+# damit das Ziel beim Anpassen unverändert bleibt und die Chain ohne nennenswerten Proof-of-Work gültig ist
+START_SCHWIERIGKEIT = 1
+ZIEL_BLOCKZEIT = 30
+START_ZEIT = 1700000000.0
+
+ORGANISATIONEN = ["Rotes Kreuz", "UNICEF", "WWF", "Ärzte ohne Grenzen", "Greenpeace"]
+
+
+@contextlib.contextmanager
+def ohne_ausgabe():
+    "Ein Kontextmanager, der die Log-Meldungen des Node-Codes während der Messungen unterdrückt."
+
+    logging.disable(logging.WARNING)
+    try:
+        yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def erzeuge_gültige_chain(anzahl_blöcke, transaktionen_pro_block):
+    "Eine Funktion, die eine reproduzierbare, gültige Chain mit minimalem Proof-of-Work erzeugt."
+
+    genesis = Block(0, START_ZEIT, [{'sender': 'System', 'empfänger': 'Genesis', 'betrag': 0}], "0", ziel=MAX_ZIEL)
+    genesis.versiegeln()
+    chain = [genesis]
+
+    with ohne_ausgabe():
+        for index in range(1, anzahl_blöcke):
+            zeitstempel = START_ZEIT + index * ZIEL_BLOCKZEIT
+            block = Block(
+                index=index,
+                zeitstempel=zeitstempel,
+                transaktionen=[{
+                    'sender': f"Spender {nummer % 50}",
+                    'empfänger': ORGANISATIONEN[(index + nummer) % len(ORGANISATIONEN)],
+                    'betrag': 10.0 + nummer,
+                    'zeitstempel': zeitstempel
+                } for nummer in range(transaktionen_pro_block)],
+                vorheriger_hash=chain[-1].hash,
+                ziel=MAX_ZIEL
+            )
+            block.block_schürfen()
+            chain.append(block)
+
+    return chain
+
+
+def perzentile(dauern):
+    "Eine Funktion, die Mittelwert und Perzentile einer Liste von Dauern (Sekunden) in Millisekunden zurückgibt."
+
+    werte = sorted(dauern)
+
+    def perzentil(anteil):
+        return werte[min(int(anteil * len(werte)), len(werte) - 1)] * 1000
+
+    return {
+        'mittel_ms': statistics.fmean(werte) * 1000,
+        'p50_ms': perzentil(0.50),
+        'p90_ms': perzentil(0.90),
+        'p99_ms': perzentil(0.99),
+        'max_ms': werte[-1] * 1000
+    }
+
+
+def miss_hashrate(dauer, anzahl_worker):
+    "Eine Funktion, die die Hashrate der Nonce-Suche (einzeln und optional parallel) sowie von berechne_hash misst."
+
+    block = Block(1, START_ZEIT, [{'sender': 'A', 'empfänger': 'WWF', 'betrag': 1.0}] * 100, "0" * 64)
+    präfix, suffix = block.hash_vorlage()
+
+    # Ziel 0 ist unerreichbar, es wird also immer die volle Anzahl Versuche gehasht
+    versuche = 0
+    start_zeit = time.perf_counter()
+    while time.perf_counter() - start_zeit < dauer:
+        versuche += suche_nonce(präfix, suffix, 0, versuche, 1, PRÜF_INTERVALL)[2]
+    ergebnisse = {'hashrate_einzeln_hs': versuche / (time.perf_counter() - start_zeit)}
+
+    block.versiegeln()
+    anzahl = 0
+    start_zeit = time.perf_counter()
+    while time.perf_counter() - start_zeit < dauer:
+        for _ in range(1000):
+            block.berechne_hash()
+        anzahl += 1000
+    ergebnisse['berechne_hash_pro_s'] = anzahl / (time.perf_counter() - start_zeit)
+
+    if anzahl_worker > 0:
+        from mining import ParallelerSchürfer
+
+        schürfer = ParallelerSchürfer(anzahl_worker)
+        try:
+            # Schwierigkeit 6: etwa 16 Millionen Versuche im Mittel, abgebrochen wird nach der Messdauer
+            kandidat = Block(1, START_ZEIT, [{'sender': 'A', 'empfänger': 'WWF', 'betrag': 1.0}], "0" * 64, ziel=MAX_ZIEL >> 20)
+            abbruch = _ZeitAbbruch(dauer)
+            with ohne_ausgabe():
+                schürfer.schürfe(kandidat, abbruch=abbruch)
+            ergebnisse['hashrate_parallel_hs'] = schürfer.letzte_hashrate
+            ergebnisse['parallel_worker'] = anzahl_worker
+        finally:
+            schürfer.schließen()
+
+    return ergebnisse
+
+
+class _ZeitAbbruch:
+    "Ein Ersatz für threading.Event, der nach einer festen Dauer als gesetzt gilt."
+
+    def __init__(self, dauer):
+        self.ende = time.monotonic() + dauer
+
+    def is_set(self):
+        return time.monotonic() >= self.ende
+
+
+def miss_validierung(chain):
+    "Eine Funktion, die den Durchsatz der vollständigen Validierung einer eigenen und einer erhaltenen Chain misst."
+
+    with ohne_ausgabe():
+        blockchain = Blockchain(schwierigkeit=START_SCHWIERIGKEIT, ziel_blockzeit=ZIEL_BLOCKZEIT)
+
+        start_zeit = time.perf_counter()
+        gültig = blockchain.ist_erhaltene_chain_valide(chain)
+        erhalten_dauer = time.perf_counter() - start_zeit
+
+        blockchain.ersetze_chain(chain)
+        start_zeit = time.perf_counter()
+        gültig = gültig and blockchain.ist_chain_valide(vollständig=True)
+        eigen_dauer = time.perf_counter() - start_zeit
+
+    if not gültig:
+        raise RuntimeError("Die synthetische Chain ist ungültig, die Messung wäre wertlos.")
+
+    return {
+        'validierung_erhalten_blöcke_pro_s': (len(chain) - 1) / erhalten_dauer,
+        'validierung_eigen_blöcke_pro_s': (len(chain) - 1) / eigen_dauer
+    }
+
+
+def miss_übertragung(chain, wiederholungen=3):
+    "Eine Funktion, die Größe (roh und mit gzip) sowie Kodier- und Lesedauer der Chain als JSON und im Binärformat vergleicht."
+
+    def beste_dauer(funktion):
+        dauern = []
+        for _ in range(wiederholungen):
+            start_zeit = time.perf_counter()
+            ergebnis = funktion()
+            dauern.append(time.perf_counter() - start_zeit)
+        return ergebnis, min(dauern)
+
+    # JSON wie GET /chain (zwischengespeicherte Bytes) und Binärformat wie mit Accept: application/x-blockchain-binaer
+    json_bytes, json_kodieren = beste_dauer(lambda: b'{"chain": [' + b', '.join(block.als_json_bytes() for block in chain) + b']}')
+    binär_bytes, binär_kodieren = beste_dauer(lambda: b''.join(binaerformat.kodiere_blöcke(chain)))
+
+    # Lesen wie beim Synchronisieren: Dekodieren und versiegelte Blöcke erstellen
+    json_blöcke, json_lesen = beste_dauer(lambda: [Block.aus_dictionary(daten) for daten in json.loads(json_bytes)['chain']])
+    binär_blöcke, binär_lesen = beste_dauer(lambda: [Block.aus_dictionary(daten) for daten in binaerformat.dekodiere_blöcke(binär_bytes)[1]])
+    if [block.hash for block in json_blöcke] != [block.hash for block in binär_blöcke]:
+        raise RuntimeError("Binärformat und JSON ergeben unterschiedliche Blöcke.")
+
+    _, json_dekodieren = beste_dauer(lambda: json.loads(json_bytes))
+    _, binär_dekodieren = beste_dauer(lambda: binaerformat.dekodiere_blöcke(binär_bytes))
+
+    return {
+        'json_kb': len(json_bytes) / 1024,
+        'json_gzip_kb': len(zlib.compress(json_bytes, 6)) / 1024,
+        'binär_kb': len(binär_bytes) / 1024,
+        'binär_gzip_kb': len(zlib.compress(binär_bytes, 6)) / 1024,
+        'json_kodieren_ms': json_kodieren * 1000,
+        'binär_kodieren_ms': binär_kodieren * 1000,
+        'json_dekodieren_ms': json_dekodieren * 1000,
+        'binär_dekodieren_ms': binär_dekodieren * 1000,
+        'json_lesen_ms': json_lesen * 1000,
+        'binär_lesen_ms': binär_lesen * 1000
+    }
+
+
+def miss_endpunkte(chain, anzahl_anfragen):
+    "Eine Funktion, die die Latenz der wichtigsten Endpunkte über den Flask-Test-Client ohne Netzwerk misst."
+
+    daten_verzeichnis = tempfile.mkdtemp(prefix='benchmark-')
+    os.environ.update({
+        'BLOCK_SPEICHER': os.path.join(daten_verzeichnis, 'blockchain.log'),
+        'FSYNC_MODUS': 'nie',
+        'SCHUERF_WORKER': '1',
+        'START_SCHWIERIGKEIT': str(START_SCHWIERIGKEIT),
+        'ZIEL_BLOCKZEIT': str(ZIEL_BLOCKZEIT)
+    })
+
+    with ohne_ausgabe():
+        import node
+        if not node.blockchain.ersetze_chain(chain):
+            raise RuntimeError("Die synthetische Chain konnte nicht in die Node geladen werden.")
+
+    client = node.app.test_client()
+    txid = transaktions_id(chain[-1].transaktionen[0])
+    mitte = len(chain) // 2
+    endpunkte = {
+        'GET /chain': '/chain',
+        'GET /chain?from=-10': '/chain?from=-10',
+        'GET /chain/tip': '/chain/tip',
+        'GET /blocks/<index>': f'/blocks/{mitte}',
+        'GET /blocks/by-hash/<hash>': f'/blocks/by-hash/{chain[mitte].hash}',
+        'GET /stats': '/stats',
+        'GET /health': '/health',
+        'GET /organizations/<name>/donations': '/organizations/WWF/donations?limit=50',
+        'GET /transactions/<txid>/proof': f'/transactions/{txid}/proof'
+    }
+
+    ergebnisse = {}
+    with ohne_ausgabe():
+        for name, pfad in endpunkte.items():
+            dauern = []
+            for _ in range(anzahl_anfragen):
+                start_zeit = time.perf_counter()
+                antwort = client.get(pfad)
+                antwort.get_data()  # gestreamte Antworten vollständig lesen
+                dauern.append(time.perf_counter() - start_zeit)
+                if antwort.status_code != 200:
+                    raise RuntimeError(f"{name} antwortet mit Status {antwort.status_code}.")
+            ergebnisse[name] = perzentile(dauern)
+
+        # Schreibender Endpunkt: Bündel mit 100 neuen Transaktionen
+        dauern = []
+        for durchlauf in range(max(anzahl_anfragen // 10, 1)):
+            bündel = [{'sender': f'Benchmark {durchlauf}-{nummer}', 'empfänger': 'UNICEF', 'betrag': 5} for nummer in range(100)]
+            start_zeit = time.perf_counter()
+            client.post('/transactions/batch', json=bündel).get_data()
+            dauern.append(time.perf_counter() - start_zeit)
+        ergebnisse['POST /transactions/batch (100)'] = perzentile(dauern)
+
+    node.blockchain.speicher.schließen()
+    return ergebnisse
+
+
+def miss_speicher(anzahl_blöcke, transaktionen_pro_block):
+    "Eine Funktion, die den Spitzenverbrauch an Speicher beim Erzeugen und Laden einer Chain misst."
+
+    tracemalloc.start()
+    chain = erzeuge_gültige_chain(anzahl_blöcke, transaktionen_pro_block)
+    with ohne_ausgabe():
+        blockchain = Blockchain(schwierigkeit=START_SCHWIERIGKEIT, ziel_blockzeit=ZIEL_BLOCKZEIT)
+        blockchain.ersetze_chain(chain)
+    aktuell, spitze = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'chain_mb': aktuell / 1024 / 1024,
+        'chain_spitze_mb': spitze / 1024 / 1024
+    }
+
+
+def git_commit():
+    "Eine Funktion, die den aktuellen Git-Commit zurückgibt oder None, falls er nicht ermittelt werden kann."
+
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flach(ergebnisse, präfix=''):
+    "Eine Funktion, die verschachtelte Ergebnisse in {'a.b.c': wert} umwandelt."
+
+    flache_werte = {}
+    for schlüssel, wert in ergebnisse.items():
+        if isinstance(wert, dict):
+            flache_werte.update(flach(wert, f"{präfix}{schlüssel}."))
+        elif isinstance(wert, (int, float)):
+            flache_werte[f"{präfix}{schlüssel}"] = wert
+    return flache_werte
+
+
+def vergleichen(alt, neu, schwelle=10.0):
+    "Eine Funktion, die zwei Ergebnis-Dateien gegenüberstellt; bei _ms-, _mb- und _kb-Werten ist weniger besser, sonst mehr."
+
+    alte_werte, neue_werte = flach(alt['ergebnisse']), flach(neu['ergebnisse'])
+    print(f"\nVergleich mit {alt['meta'].get('commit')} ({alt['meta'].get('zeitpunkt')}):")
+    for schlüssel in sorted(neue_werte.keys() & alte_werte.keys()):
+        if not alte_werte[schlüssel]:
+            continue
+        änderung = (neue_werte[schlüssel] - alte_werte[schlüssel]) / alte_werte[schlüssel] * 100
+        weniger_ist_besser = schlüssel.endswith(('_ms', '_mb', '_kb'))
+        besser = änderung < 0 if weniger_ist_besser else änderung > 0
+        markierung = '' if abs(änderung) < schwelle else ('besser' if besser else 'SCHLECHTER')
+        print(f"  {schlüssel:<60} {alte_werte[schlüssel]:>14.2f} -> {neue_werte[schlüssel]:>14.2f} {änderung:>+8.1f}% {markierung}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Leistungs-Benchmark für Schürfen, Hashing, Validierung und HTTP-Endpunkte")
+    parser.add_argument('--blöcke', type=int, default=1000, help="Länge der synthetischen Chain")
+    parser.add_argument('--transaktionen', type=int, default=10, help="Transaktionen pro Block")
+    parser.add_argument('--anfragen', type=int, default=200, help="Anfragen pro Endpunkt")
+    parser.add_argument('--hash-dauer', type=float, default=2.0, help="Messdauer der Hashrate in Sekunden")
+    parser.add_argument('--worker', type=int, default=0, help="Worker-Prozesse für die parallele Hashrate (0 = nicht messen)")
+    parser.add_argument('--ausgabe', help="Pfad der JSON-Datei für die Ergebnisse (Standard: nur Konsole)")
+    parser.add_argument('--vergleich', help="JSON-Datei eines früheren Laufs, mit der verglichen wird")
+    parser.add_argument('--schwelle', type=float, default=10.0, help="Ab dieser Änderung in Prozent wird ein Wert beim Vergleich markiert")
+    argumente = parser.parse_args()
+
+    print(f"Erzeuge Chain mit {argumente.blöcke} Blöcken und {argumente.transaktionen} Transaktionen pro Block...")
+    chain = erzeuge_gültige_chain(argumente.blöcke, argumente.transaktionen)
+
+    ergebnisse = {}
+    print("Messe Hashrate...")
+    ergebnisse['hashing'] = miss_hashrate(argumente.hash_dauer, argumente.worker)
+    print("Messe Validierung...")
+    ergebnisse['validierung'] = miss_validierung(chain)
+    print("Messe Übertragung...")
+    ergebnisse['übertragung'] = miss_übertragung(chain)
+    print("Messe Endpunkte...")
+    ergebnisse['endpunkte'] = miss_endpunkte(chain, argumente.anfragen)
+    print("Messe Speicher...")
+    ergebnisse['speicher'] = miss_speicher(argumente.blöcke, argumente.transaktionen)
+    # ru_maxrss ist unter Linux in KiB, unter macOS in Bytes angegeben
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    ergebnisse['speicher']['prozess_max_rss_mb'] = max_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+    bericht = {
+        'meta': {
+            'commit': git_commit(),
+            'zeitpunkt': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'plattform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'parameter': vars(argumente)
+        },
+        'ergebnisse': ergebnisse
+    }
+
+    print(f"\nHashrate einzeln:    {ergebnisse['hashing']['hashrate_einzeln_hs']:>12,.0f} H/s")
+    if 'hashrate_parallel_hs' in ergebnisse['hashing']:
+        print(f"Hashrate parallel:   {ergebnisse['hashing']['hashrate_parallel_hs']:>12,.0f} H/s ({argumente.worker} Worker)")
+    print(f"berechne_hash:       {ergebnisse['hashing']['berechne_hash_pro_s']:>12,.0f} /s")
+    print(f"Validierung eigen:   {ergebnisse['validierung']['validierung_eigen_blöcke_pro_s']:>12,.0f} Blöcke/s")
+    print(f"Validierung erhalten:{ergebnisse['validierung']['validierung_erhalten_blöcke_pro_s']:>12,.0f} Blöcke/s")
+    print(f"Speicher Chain:      {ergebnisse['speicher']['chain_mb']:>12.1f} MB (Spitze {ergebnisse['speicher']['chain_spitze_mb']:.1f} MB)")
+    übertragung = ergebnisse['übertragung']
+    print(f"\n{'Übertragung der Chain':<22} {'roh':>10} {'gzip':>10} {'kodieren':>10} {'dekodieren':>11} {'lesen':>10}")
+    for format in ('json', 'binär'):
+        print(f"{format:<22} {übertragung[format + '_kb']:>7.0f} KB {übertragung[format + '_gzip_kb']:>7.0f} KB "
+              f"{übertragung[format + '_kodieren_ms']:>7.1f} ms {übertragung[format + '_dekodieren_ms']:>8.1f} ms "
+              f"{übertragung[format + '_lesen_ms']:>7.1f} ms")
+    print(f"\n{'Endpunkt':<40} {'mittel':>8} {'p50':>8} {'p90':>8} {'p99':>8}  (ms)")
+    for name, werte in ergebnisse['endpunkte'].items():
+        print(f"{name:<40} {werte['mittel_ms']:>8.2f} {werte['p50_ms']:>8.2f} {werte['p90_ms']:>8.2f} {werte['p99_ms']:>8.2f}")
+
+    if argumente.ausgabe:
+        with open(argumente.ausgabe, 'w') as datei:
+            json.dump(bericht, datei, indent=2, ensure_ascii=False)
+        print(f"\nErgebnisse gespeichert in {argumente.ausgabe}")
+
+    if argumente.vergleich:
+        with open(argumente.vergleich) as datei:
+            vergleichen(json.load(datei), bericht, argumente.schwelle)
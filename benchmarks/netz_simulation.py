@@ -0,0 +1,525 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leistung_benchmark import ORGANISATIONEN, git_commit, perzentile
+from mempool import transaktions_id
+
+NODE_PFAD = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'node.py')
+
+TOPOLOGIEN = ['voll', 'ring', 'stern', 'zufall']
+
+
+class SimulierteNode:
+    "Eine Node, die als eigener Prozess mit eigenem Port, eigenem Datenverzeichnis und eigener Log-Datei gestartet wird."
+
+    def __init__(self, nummer, port, verzeichnis, umgebung):
+        self.nummer = nummer
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.verzeichnis = verzeichnis
+        self.umgebung = umgebung
+        self.prozess = None
+        self._log = None
+
+    def starten(self):
+        "Eine Methode, die den Node-Prozess im Datenverzeichnis der Node startet."
+
+        os.makedirs(self.verzeichnis, exist_ok=True)
+        self._log = open(os.path.join(self.verzeichnis, 'node.log'), 'ab')
+        self.prozess = subprocess.Popen(
+            [sys.executable, NODE_PFAD], cwd=self.verzeichnis, env=self.umgebung,
+            stdout=self._log, stderr=subprocess.STDOUT
+        )
+
+    def warten_bis_bereit(self, zeitlimit):
+        "Eine Methode, die wartet, bis die Node auf /health antwortet, und sonst einen RuntimeError auslöst."
+
+        ende = time.monotonic() + zeitlimit
+        while time.monotonic() < ende:
+            if self.prozess.poll() is not None:
+                raise RuntimeError(f"Node {self.nummer} wurde beendet (siehe {self.verzeichnis}/node.log).")
+            try:
+                if requests.get(self.url + '/health', timeout=1).status_code == 200:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"Node {self.nummer} antwortet nach {zeitlimit} Sekunden nicht.")
+
+    def beenden(self):
+        "Eine Methode, die den Node-Prozess beendet."
+
+        if self.prozess is not None and self.prozess.poll() is None:
+            self.prozess.terminate()
+            try:
+                self.prozess.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.prozess.kill()
+                self.prozess.wait()
+        if self._log is not None:
+            self._log.close()
+
+
+def topologie_kanten(art, anzahl, grad=3, zufall=random):
+    "Eine Funktion, die die (ungerichteten) Verbindungen der Topologie als Liste von Paaren (a, b) zurückgibt."
+
+    if anzahl < 2:
+        return []
+    if art == 'voll':
+        return [(a, b) for a in range(anzahl) for b in range(a + 1, anzahl)]
+    if art == 'stern':
+        return [(0, b) for b in range(1, anzahl)]
+
+    # Der Ring hält das Netz zusammen, bei 'zufall' kommen weitere Verbindungen hinzu, bis jede Node grad Nachbarn hat
+    kanten = {tuple(sorted((a, (a + 1) % anzahl))) for a in range(anzahl)}
+    if art == 'zufall':
+        nachbarn = {a: set() for a in range(anzahl)}
+        for a, b in kanten:
+            nachbarn[a].add(b)
+            nachbarn[b].add(a)
+        for a in range(anzahl):
+            kandidaten = [b for b in range(anzahl) if b != a and b not in nachbarn[a]]
+            zufall.shuffle(kandidaten)
+            while len(nachbarn[a]) < min(grad, anzahl - 1) and kandidaten:
+                b = kandidaten.pop()
+                nachbarn[a].add(b)
+                nachbarn[b].add(a)
+                kanten.add(tuple(sorted((a, b))))
+    return sorted(kanten)
+
+
+class BlockBeobachter:
+    "Ein Beobachter, der die /events-Streams aller Nodes liest und festhält, wann welche Node welchen Block erhalten hat."
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        # Block-Hash -> {Node-Nummer: Zeitpunkt}, Block-Hash -> Index und Anzahl der Chain-Ersetzungen pro Node
+        self.gesehen = {}
+        self.indizes = {}
+        self.ersetzungen = [0] * len(nodes)
+        self._lock = threading.Lock()
+        self._stopp = threading.Event()
+        self._threads = []
+
+    def starten(self):
+        "Eine Methode, die für jede Node einen Thread startet, der ihren Ereignis-Stream liest."
+
+        for node in self.nodes:
+            thread = threading.Thread(target=self._stream_lesen, args=(node,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def beenden(self):
+        "Eine Methode, die das Lesen der Streams beendet (die Threads enden spätestens mit dem Beenden der Nodes)."
+
+        self._stopp.set()
+
+    def _merken(self, node, block_hash, index, zeitpunkt):
+        with self._lock:
+            self.gesehen.setdefault(block_hash, {}).setdefault(node.nummer, zeitpunkt)
+            self.indizes[block_hash] = index
+
+    def _stream_lesen(self, node):
+        "Eine Methode, die den Ereignis-Stream einer Node liest und sich nach einem Abbruch neu verbindet."
+
+        while not self._stopp.is_set():
+            try:
+                with requests.get(node.url + '/events', stream=True, timeout=(5, 30)) as antwort:
+                    puffer = b''
+                    # chunk_size=None liefert jeden Chunk sofort, iter_lines würde auf volle Puffer warten
+                    for daten in antwort.iter_content(chunk_size=None):
+                        zeitpunkt = time.monotonic()
+                        puffer += daten
+                        *nachrichten, puffer = puffer.split(b'\n\n')
+                        for nachricht in nachrichten:
+                            self._verarbeiten(node, nachricht, zeitpunkt)
+                        if self._stopp.is_set():
+                            return
+            except requests.RequestException:
+                time.sleep(0.5)
+
+    def _verarbeiten(self, node, nachricht, zeitpunkt):
+        "Eine Methode, die ein einzelnes Server-Sent Event auswertet."
+
+        typ, daten = None, None
+        for zeile in nachricht.split(b'\n'):
+            if zeile.startswith(b'event: '):
+                typ = zeile[7:].decode()
+            elif zeile.startswith(b'data: '):
+                daten = zeile[6:]
+
+        if typ == 'block':
+            block = json.loads(daten)
+            self._merken(node, block['hash'], block['index'], zeitpunkt)
+        elif typ in ('chain', 'neu_laden'):
+            # Bei einer ersetzten Chain werden nur die Grenzen gemeldet, die neuen Blöcke werden nachgeladen
+            if typ == 'chain':
+                with self._lock:
+                    self.ersetzungen[node.nummer] += 1
+                von = json.loads(daten)['gemeinsamer_index'] + 1
+            else:
+                von = -50
+            try:
+                for block in requests.get(node.url + '/chain', params={'from': von}, timeout=10).json()['chain']:
+                    self._merken(node, block['hash'], block['index'], zeitpunkt)
+            except (requests.RequestException, ValueError, KeyError):
+                pass
+
+
+class Last:
+    "Ein Lastgenerator, der Spenden mit fester Rate an zufällige Nodes sendet und in zufälligen Abständen Blöcke schürfen lässt."
+
+    def __init__(self, nodes, rate, blockzeit, zufall=random):
+        self.nodes = nodes
+        self.rate = rate
+        self.blockzeit = blockzeit
+        self.zufall = zufall
+        # txid -> Zeitpunkt des Einreichens
+        self.eingereicht = {}
+        self.zähler = {'angenommen': 0, 'abgelehnt': 0, 'fehler': 0, 'schürf_aufträge': 0}
+        self.antwortzeiten = []
+        self._lock = threading.Lock()
+        self._stopp = threading.Event()
+        self._sender = ThreadPoolExecutor(max_workers=16, thread_name_prefix='last')
+        self._threads = []
+
+    def starten(self):
+        "Eine Methode, die das Senden der Transaktionen und das Schürfen im Hintergrund startet."
+
+        for ziel in (self._transaktionen_senden, self._schürfen):
+            thread = threading.Thread(target=ziel, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def beenden(self):
+        "Eine Methode, die die Last beendet und auf ausstehende Anfragen wartet."
+
+        self._stopp.set()
+        for thread in self._threads:
+            thread.join()
+        self._sender.shutdown(wait=True)
+
+    def _transaktionen_senden(self):
+        if self.rate <= 0:
+            return
+        start_zeit = time.monotonic()
+        nummer = 0
+        while not self._stopp.is_set():
+            # Feste Zeitpunkte statt fester Pausen, damit sich die Rate nicht durch langsame Antworten verschiebt
+            wartezeit = start_zeit + nummer / self.rate - time.monotonic()
+            if wartezeit > 0 and self._stopp.wait(wartezeit):
+                return
+            self._sender.submit(self._transaktion_senden, nummer, self.zufall.choice(self.nodes))
+            nummer += 1
+
+    def _transaktion_senden(self, nummer, node):
+        transaktion = {
+            'sender': f"Simulation {nummer % 100}",
+            'empfänger': ORGANISATIONEN[nummer % len(ORGANISATIONEN)],
+            'betrag': 1 + nummer % 50
+        }
+        start_zeit = time.monotonic()
+        try:
+            antwort = requests.post(node.url + '/transactions/new', json=transaktion, timeout=10)
+        except requests.RequestException:
+            with self._lock:
+                self.zähler['fehler'] += 1
+            return
+
+        with self._lock:
+            self.antwortzeiten.append(time.monotonic() - start_zeit)
+            if antwort.status_code == 201:
+                self.zähler['angenommen'] += 1
+                self.eingereicht[antwort.json()['txid']] = start_zeit
+            else:
+                self.zähler['abgelehnt'] += 1
+
+    def _schürfen(self):
+        # Exponentiell verteilte Abstände bilden nach, dass irgendein Schürfer im Netz zufällig einen Block findet
+        while not self._stopp.wait(self.zufall.expovariate(1 / self.blockzeit)):
+            node = self.zufall.choice(self.nodes)
+            try:
+                if requests.post(node.url + '/mine', timeout=10).status_code == 202:
+                    with self._lock:
+                        self.zähler['schürf_aufträge'] += 1
+            except requests.RequestException:
+                pass
+
+
+def an_alle(nodes, funktion):
+    "Eine Funktion, die funktion(node) für alle Nodes parallel aufruft und die Ergebnisse (None bei Fehlern) zurückgibt."
+
+    def aufrufen(node):
+        try:
+            return funktion(node)
+        except requests.RequestException:
+            return None
+
+    with ThreadPoolExecutor(max_workers=min(len(nodes), 32)) as pool:
+        return list(pool.map(aufrufen, nodes))
+
+
+def spitzen(nodes):
+    "Eine Funktion, die den Hash des letzten Blocks jeder Node zurückgibt."
+
+    return an_alle(nodes, lambda node: requests.get(node.url + '/chain/tip', timeout=5).json()['hash'])
+
+
+def warten_auf_konvergenz(nodes, zeitlimit, konsens=False):
+    "Eine Funktion, die wartet, bis alle Nodes denselben letzten Block haben, und (Dauer, Konsens-Runden) oder None zurückgibt; mit konsens=True wird auf allen Nodes die Konsens-Logik ausgelöst, solange sie sich uneinig sind."
+
+    start_zeit = time.monotonic()
+    runden = 0
+    while time.monotonic() - start_zeit < zeitlimit:
+        aktuelle_spitzen = spitzen(nodes)
+        if None not in aktuelle_spitzen and len(set(aktuelle_spitzen)) == 1:
+            return time.monotonic() - start_zeit, runden
+        if konsens:
+            an_alle(nodes, lambda node: requests.post(node.url + '/consensus', timeout=30))
+            runden += 1
+        else:
+            time.sleep(0.1)
+    return None
+
+
+def netz_aufbauen(nodes, kanten):
+    "Eine Funktion, die die Nodes über /nodes/register in beide Richtungen miteinander bekannt macht."
+
+    anfragen = [(a, b) for a, b in kanten] + [(b, a) for a, b in kanten]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        for antwort in pool.map(lambda paar: requests.post(
+                nodes[paar[0]].url + '/nodes/register', json={'node_address': nodes[paar[1]].url}, timeout=10), anfragen):
+            antwort.raise_for_status()
+
+
+def gemeinsamen_start_herstellen(nodes, zeitlimit):
+    "Eine Funktion, die Node 0 einen Block schürfen lässt, damit alle Nodes deren Chain (statt ihres eigenen Genesis-Blocks) übernehmen, und die Dauer bis zur Einigkeit zurückgibt."
+
+    requests.post(nodes[0].url + '/transactions/new', json={'sender': 'Simulation', 'empfänger': 'Start', 'betrag': 1}, timeout=10)
+    requests.post(nodes[0].url + '/mine', timeout=10).raise_for_status()
+    ende = time.monotonic() + zeitlimit
+    while requests.get(nodes[0].url + '/chain/tip', timeout=5).json()['länge'] < 2:
+        if time.monotonic() > ende:
+            raise RuntimeError("Node 0 hat den Start-Block nicht geschürft.")
+        time.sleep(0.1)
+
+    ergebnis = warten_auf_konvergenz(nodes, zeitlimit, konsens=True)
+    if ergebnis is None:
+        raise RuntimeError(f"Die Nodes haben sich nach {zeitlimit} Sekunden nicht auf eine Chain geeinigt.")
+    return ergebnis[0]
+
+
+def auswerten(nodes, beobachter, last, start_länge, dauer):
+    "Eine Funktion, die aus den beobachteten Blöcken und der endgültigen Chain Ausbreitung, Forks und Durchsatz berechnet."
+
+    hauptkette = requests.get(nodes[0].url + '/chain', params={'from': start_länge}, timeout=30).json()['chain']
+    haupt_hashes = {block['hash'] for block in hauptkette}
+
+    with beobachter._lock:
+        gesehen = {block_hash: dict(zeiten) for block_hash, zeiten in beobachter.gesehen.items()
+                   if beobachter.indizes[block_hash] >= start_länge}
+        ersetzungen = sum(beobachter.ersetzungen)
+
+    # Ausbreitung: vom ersten Auftauchen eines Blocks bis er bei jeder Node angekommen ist
+    bis_alle, pro_node = [], []
+    for block in hauptkette:
+        zeiten = gesehen.get(block['hash'])
+        if not zeiten:
+            continue
+        erster = min(zeiten.values())
+        pro_node.extend(zeitpunkt - erster for zeitpunkt in zeiten.values() if zeitpunkt != erster)
+        if len(zeiten) == len(nodes):
+            bis_alle.append(max(zeiten.values()) - erster)
+
+    # Bestätigung: vom Einreichen einer Spende bis ihr Block zum ersten Mal bei einer Node auftaucht.
+    # Gezählt wird jede Spende nur einmal, eine mehrfach aufgenommene gilt als Fehler der Nodes.
+    bestätigungen = []
+    bestätigte_txids = set()
+    doppelt_bestätigt = 0
+    for block in hauptkette:
+        zeiten = gesehen.get(block['hash'])
+        for transaktion in block['transaktionen']:
+            txid = transaktions_id(transaktion)
+            if txid in bestätigte_txids:
+                doppelt_bestätigt += 1
+                continue
+            bestätigte_txids.add(txid)
+            eingereicht = last.eingereicht.get(txid)
+            if eingereicht is not None and zeiten:
+                bestätigungen.append(min(zeiten.values()) - eingereicht)
+
+    verworfen = len(gesehen.keys() - haupt_hashes)
+    return {
+        'blöcke': {
+            'hauptkette': len(hauptkette),
+            'gesehen': len(gesehen),
+            'verworfen': verworfen,
+            'fork_anteil_prozent': verworfen / len(gesehen) * 100 if gesehen else 0.0,
+            'chain_ersetzungen': ersetzungen,
+            'pro_minute': len(hauptkette) / dauer * 60
+        },
+        'ausbreitung_bis_alle': perzentile(bis_alle) if bis_alle else {},
+        'ausbreitung_pro_node': perzentile(pro_node) if pro_node else {},
+        'ausbreitung_vollständig_prozent': len(bis_alle) / len(hauptkette) * 100 if hauptkette else 0.0,
+        'bestätigung': perzentile(bestätigungen) if bestätigungen else {},
+        'durchsatz': {
+            'eingereicht_tx_pro_s': last.zähler['angenommen'] / dauer,
+            'bestätigt_tx_pro_s': len(bestätigte_txids) / dauer,
+            'bestätigt_tx': len(bestätigte_txids),
+            'doppelt_bestätigt_tx': doppelt_bestätigt,
+            **last.zähler
+        },
+        'antwortzeit_transaktion': perzentile(last.antwortzeiten) if last.antwortzeiten else {}
+    }
+
+
+def simulieren(argumente):
+    "Eine Funktion, die das Netz startet, unter Last setzt, auswertet und die Nodes wieder beendet."
+
+    zufall = random.Random(argumente.seed)
+    verzeichnis = argumente.verzeichnis or tempfile.mkdtemp(prefix='netz_simulation_')
+
+    umgebung = dict(os.environ)
+    umgebung.update({
+        'START_SCHWIERIGKEIT': str(argumente.schwierigkeit),
+        'ZIEL_BLOCKZEIT': str(argumente.blockzeit),
+        'SCHUERF_WORKER': '1',
+        'PRUEF_WORKER': '1',
+        'FSYNC_MODUS': 'nie',
+        'LOG_LEVEL': 'WARNING'
+    })
+    for eintrag in argumente.umgebung:
+        name, _, wert = eintrag.partition('=')
+        umgebung[name] = wert
+
+    nodes = [SimulierteNode(nummer, argumente.start_port + nummer, os.path.join(verzeichnis, f"node{nummer}"),
+                            dict(umgebung, PORT=str(argumente.start_port + nummer)))
+             for nummer in range(argumente.nodes)]
+    kanten = topologie_kanten(argumente.topologie, len(nodes), argumente.grad, zufall)
+    beobachter = BlockBeobachter(nodes)
+
+    try:
+        print(f"Starte {len(nodes)} Nodes ab Port {argumente.start_port} in {verzeichnis}...")
+        for node in nodes:
+            node.starten()
+        for node in nodes:
+            node.warten_bis_bereit(argumente.zeitlimit)
+
+        print(f"Verbinde Nodes ({argumente.topologie}, {len(kanten)} Verbindungen)...")
+        netz_aufbauen(nodes, kanten)
+        start_konvergenz = gemeinsamen_start_herstellen(nodes, argumente.zeitlimit)
+        start_länge = requests.get(nodes[0].url + '/chain/tip', timeout=5).json()['länge']
+
+        beobachter.starten()
+        time.sleep(0.5)
+
+        print(f"Last: {argumente.rate} Transaktionen/s, ein Block etwa alle {argumente.blockzeit} s, {argumente.dauer} s lang...")
+        last = Last(nodes, argumente.rate, argumente.blockzeit, zufall)
+        start_zeit = time.monotonic()
+        last.starten()
+        time.sleep(argumente.dauer)
+        last.beenden()
+        dauer = time.monotonic() - start_zeit
+
+        # Erst ohne Eingriff abwarten, ob sich die Nodes durch das Weiterleiten der Blöcke einigen, dann die Konsens-Logik auslösen
+        print("Warte auf Einigkeit...")
+        time.sleep(1)
+        ohne_konsens = warten_auf_konvergenz(nodes, argumente.konvergenz_warten)
+        mit_konsens = ohne_konsens or warten_auf_konvergenz(nodes, argumente.zeitlimit, konsens=True)
+        beobachter.beenden()
+
+        ergebnisse = auswerten(nodes, beobachter, last, start_länge, dauer)
+        ergebnisse['konvergenz'] = {
+            'start_s': start_konvergenz,
+            'ohne_konsens_s': ohne_konsens[0] if ohne_konsens else None,
+            'nach_konsens_s': mit_konsens[0] if mit_konsens else None,
+            'konsens_runden': mit_konsens[1] if mit_konsens else None,
+            'geeinigt': mit_konsens is not None
+        }
+        return ergebnisse
+    finally:
+        beobachter.beenden()
+        for node in nodes:
+            node.beenden()
+        if not argumente.verzeichnis and not argumente.behalten:
+            shutil.rmtree(verzeichnis, ignore_errors=True)
+
+
+def zeile(name, werte):
+    "Eine Funktion, die Perzentile (oder einen Hinweis, dass keine Messwerte vorliegen) als Zeile formatiert."
+
+    if not werte:
+        return f"{name:<28} keine Messwerte"
+    return f"{name:<28} p50 {werte['p50_ms']:>8.1f} ms   p90 {werte['p90_ms']:>8.1f} ms   max {werte['max_ms']:>8.1f} ms"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulation eines Netzes aus mehreren lokalen Nodes unter Transaktionslast")
+    parser.add_argument('--nodes', type=int, default=10, help="Anzahl der Nodes (je ein Prozess, etwa 50 MB Speicher pro Node)")
+    parser.add_argument('--topologie', choices=TOPOLOGIEN, default='zufall', help="Wie die Nodes untereinander verbunden werden")
+    parser.add_argument('--grad', type=int, default=3, help="Mindestanzahl Nachbarn pro Node bei --topologie zufall")
+    parser.add_argument('--rate', type=float, default=20, help="Transaktionen pro Sekunde (an zufällige Nodes)")
+    parser.add_argument('--blockzeit', type=float, default=5, help="Mittlerer Abstand der Schürf-Aufträge im ganzen Netz in Sekunden (auch ZIEL_BLOCKZEIT der Nodes)")
+    parser.add_argument('--schwierigkeit', type=int, default=3, help="START_SCHWIERIGKEIT der Nodes")
+    parser.add_argument('--dauer', type=float, default=60, help="Dauer der Last in Sekunden")
+    parser.add_argument('--konvergenz-warten', type=float, default=10, help="So lange wird nach der Last auf Einigkeit ohne Konsens-Logik gewartet")
+    parser.add_argument('--zeitlimit', type=float, default=60, help="Zeitlimit für Start und Einigung der Nodes in Sekunden")
+    parser.add_argument('--start-port', type=int, default=5100, help="Port der ersten Node, die weiteren folgen fortlaufend")
+    parser.add_argument('--umgebung', action='append', default=[], metavar='NAME=WERT', help="Zusätzliche Umgebungsvariable für alle Nodes (mehrfach möglich)")
+    parser.add_argument('--verzeichnis', help="Datenverzeichnis der Nodes (Standard: temporär, wird danach gelöscht)")
+    parser.add_argument('--behalten', action='store_true', help="Temporäres Datenverzeichnis mit den Logs der Nodes nicht löschen")
+    parser.add_argument('--seed', type=int, help="Startwert des Zufallsgenerators für Topologie und Last")
+    parser.add_argument('--ausgabe', help="Pfad der JSON-Datei für die Ergebnisse (Standard: nur Konsole)")
+    argumente = parser.parse_args()
+
+    ergebnisse = simulieren(argumente)
+
+    blöcke, durchsatz, konvergenz = ergebnisse['blöcke'], ergebnisse['durchsatz'], ergebnisse['konvergenz']
+    print(f"\nBlöcke in der Hauptkette: {blöcke['hauptkette']:>6} ({blöcke['pro_minute']:.1f}/min)")
+    print(f"Verworfene Blöcke:        {blöcke['verworfen']:>6} ({blöcke['fork_anteil_prozent']:.1f} % Forks, {blöcke['chain_ersetzungen']} Chain-Ersetzungen)")
+    print(zeile("Ausbreitung bis alle Nodes", ergebnisse['ausbreitung_bis_alle']))
+    print(zeile("Ausbreitung pro Node", ergebnisse['ausbreitung_pro_node']))
+    print(f"{'':<28} {ergebnisse['ausbreitung_vollständig_prozent']:.0f} % der Blöcke haben vor dem Ende alle Nodes erreicht")
+    print(zeile("Bestätigung einer Spende", ergebnisse['bestätigung']))
+    print(zeile("Antwortzeit /transactions", ergebnisse['antwortzeit_transaktion']))
+    print(f"Durchsatz:                {durchsatz['eingereicht_tx_pro_s']:>8.1f} Tx/s angenommen, {durchsatz['bestätigt_tx_pro_s']:.1f} Tx/s bestätigt "
+          f"({durchsatz['abgelehnt']} abgelehnt, {durchsatz['fehler']} Fehler)")
+    if durchsatz['doppelt_bestätigt_tx']:
+        print(f"FEHLER: {durchsatz['doppelt_bestätigt_tx']} Transaktionen sind mehrfach in der Hauptkette enthalten")
+    print(f"Einigkeit:                 Start {konvergenz['start_s']:.2f} s, nach der Last "
+          + (f"{konvergenz['ohne_konsens_s']:.2f} s ohne Konsens-Logik" if konvergenz['ohne_konsens_s'] is not None else
+             f"{konvergenz['nach_konsens_s']:.2f} s mit {konvergenz['konsens_runden']} Konsens-Runden" if konvergenz['geeinigt'] else
+             "nicht erreicht"))
+
+    if argumente.ausgabe:
+        with open(argumente.ausgabe, 'w', encoding='utf-8') as datei:
+            json.dump({
+                'meta': {
+                    'commit': git_commit(),
+                    'zeitpunkt': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'python': platform.python_version(),
+                    'plattform': platform.platform(),
+                    'cpus': os.cpu_count(),
+                    'parameter': vars(argumente)
+                },
+                'ergebnisse': ergebnisse
+            }, datei, indent=2, ensure_ascii=False)
+        print(f"\nErgebnisse gespeichert in {argumente.ausgabe}")
+
+    # Mehrfach bestätigte Spenden machen die Messung ungültig, der Lauf schlägt daher fehl
+    if durchsatz['doppelt_bestätigt_tx']:
+        sys.exit(1)
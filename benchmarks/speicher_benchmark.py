@@ -0,0 +1,74 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blockchain import Block
+
+
+def erzeuge_chain(anzahl_blöcke, transaktionen_pro_block, versiegeln):
+    "Eine Funktion, die eine synthetische Chain ohne Proof-of-Work erzeugt."
+
+    chain = []
+    vorheriger_hash = "0"
+    for index in range(anzahl_blöcke):
+        block = Block(
+            index=index,
+            zeitstempel=1700000000.0 + index,
+            transaktionen=[{
+                'sender': f"Spender {index}-{nummer}",
+                'empfänger': "UNICEF",
+                'betrag': 10.0 + nummer,
+                'zeitstempel': 1700000000.0 + index
+            } for nummer in range(transaktionen_pro_block)],
+            vorheriger_hash=vorheriger_hash
+        )
+        if versiegeln:
+            block.versiegeln()
+        chain.append(block)
+        vorheriger_hash = block.hash
+    return chain
+
+
+def miss_speicher(anzahl_blöcke, transaktionen_pro_block, versiegeln):
+    "Eine Funktion, die den Speicherbedarf einer Chain mit tracemalloc misst."
+
+    tracemalloc.start()
+    start_zeit = time.perf_counter()
+    chain = erzeuge_chain(anzahl_blöcke, transaktionen_pro_block, versiegeln)
+    dauer = time.perf_counter() - start_zeit
+    aktuell, spitze = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Zeit für das Serialisieren der gesamten Chain (wie bei /chain)
+    start_zeit = time.perf_counter()
+    for block in chain:
+        block.als_json_bytes()
+    serialisierungs_dauer = time.perf_counter() - start_zeit
+
+    return {
+        'blöcke': anzahl_blöcke,
+        'versiegelt': versiegeln,
+        'speicher_mb': aktuell / 1024 / 1024,
+        'spitze_mb': spitze / 1024 / 1024,
+        'bytes_pro_block': aktuell / anzahl_blöcke,
+        'aufbau_s': dauer,
+        'serialisierung_s': serialisierungs_dauer
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Speicher-Benchmark für Chains mit vielen Blöcken")
+    parser.add_argument('--blöcke', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--transaktionen', type=int, default=3, help="Transaktionen pro Block")
+    argumente = parser.parse_args()
+
+    print(f"{'Blöcke':>8} {'versiegelt':>10} {'Speicher MB':>12} {'Bytes/Block':>12} {'Aufbau s':>9} {'JSON s':>8}")
+    for anzahl in argumente.blöcke:
+        for versiegeln in (False, True):
+            ergebnis = miss_speicher(anzahl, argumente.transaktionen, versiegeln)
+            print(f"{ergebnis['blöcke']:>8} {str(ergebnis['versiegelt']):>10} {ergebnis['speicher_mb']:>12.1f} "
+                  f"{ergebnis['bytes_pro_block']:>12.0f} {ergebnis['aufbau_s']:>9.2f} {ergebnis['serialisierung_s']:>8.2f}")
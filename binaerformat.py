@@ -0,0 +1,406 @@
+import itertools
+import struct
+import zlib
+
+# Medientyp für die Übertragung zwischen Nodes; Clients ohne ihn im Accept-Header (z.B. das Frontend) erhalten JSON
+MIMETYP = 'application/x-blockchain-binaer'
+JSON_MIMETYP = 'application/json'
+ACCEPT = f"{MIMETYP}, {JSON_MIMETYP};q=0.5"
+
+# Kennung und Version am Anfang jeder Nachricht
+MAGIC_BLÖCKE = b'BKB\x01'
+MAGIC_TRANSAKTIONEN = b'BKT\x01'
+
+# Typ-Kennungen der allgemeinen Werte (wie JSON: None, bool, Zahlen, Texte, Listen, Dictionaries)
+_NONE, _FALSCH, _WAHR, _GANZZAHL, _KOMMAZAHL, _TEXT, _TEXT_VERWEIS, _LISTE, _DICT = range(9)
+
+# Hashes als 32 rohe Bytes, abweichende Werte (z.B. "0" im Genesis-Block) als Text
+_HASH_ROH, _HASH_TEXT = 0, 1
+
+# Block-Kopf mit festen Breiten, wenn alle Felder hineinpassen (der Normalfall), sonst Feld für Feld
+_KOPF_FEST, _KOPF_WERTE = 0, 1
+_KOPF_STRUCT = struct.Struct('<Qd32s32s32s32sQ')
+
+# Transaktionen als einzelne Werte oder spaltenweise, wenn alle dem Schema der Spenden-Transaktionen entsprechen
+_TRANSAKTIONEN_WERTE, _TRANSAKTIONEN_SPALTEN = 0, 1
+_SPENDEN_TYPEN = (str, str, float, float)
+
+_KOMMAZAHL_STRUCT = struct.Struct('<d')
+_INDEX_FORMATE = ((0xFF, 'B'), (0xFFFF, 'H'), (0xFFFFFFFF, 'I'))
+
+
+def _varint_schreiben(puffer, zahl):
+    "Eine Funktion, die eine nicht-negative ganze Zahl mit 7 Bit pro Byte (LEB128) anhängt."
+
+    while zahl >= 0x80:
+        puffer.append((zahl & 0x7F) | 0x80)
+        zahl >>= 7
+    puffer.append(zahl)
+
+
+def _text_schreiben(puffer, text):
+    daten = text.encode()
+    _varint_schreiben(puffer, len(daten))
+    puffer += daten
+
+
+def _roher_hash(wert):
+    "Eine Funktion, die einen Hex-Hash in 32 rohe Bytes umwandelt oder None zurückgibt, wenn er sich daraus nicht unverändert herstellen lässt."
+
+    if not isinstance(wert, str) or len(wert) != 64:
+        return None
+    try:
+        roh = bytes.fromhex(wert)
+    except ValueError:
+        return None
+    return roh if roh.hex() == wert else None
+
+
+def _hash_schreiben(puffer, wert):
+    "Eine Funktion, die einen Hex-Hash als 32 rohe Bytes anhängt, sofern möglich, sonst als Text."
+
+    roh = _roher_hash(wert)
+    if roh is not None:
+        puffer.append(_HASH_ROH)
+        puffer += roh
+        return
+
+    puffer.append(_HASH_TEXT)
+    _text_schreiben(puffer, wert)
+
+
+def _wert_schreiben(puffer, wert, texte):
+    "Eine Funktion, die einen JSON-fähigen Wert anhängt; wiederholte Texte werden über die Tabelle texte nur einmal übertragen."
+
+    if wert is None:
+        puffer.append(_NONE)
+    elif wert is True:
+        puffer.append(_WAHR)
+    elif wert is False:
+        puffer.append(_FALSCH)
+    elif isinstance(wert, int):
+        puffer.append(_GANZZAHL)
+        # Zickzack-Kodierung, damit kleine negative Zahlen ebenfalls wenige Bytes brauchen
+        _varint_schreiben(puffer, 2 * wert if wert >= 0 else -2 * wert - 1)
+    elif isinstance(wert, float):
+        puffer.append(_KOMMAZAHL)
+        puffer += _KOMMAZAHL_STRUCT.pack(wert)
+    elif isinstance(wert, str):
+        nummer = texte.get(wert)
+        if nummer is None:
+            texte[wert] = len(texte)
+            puffer.append(_TEXT)
+            _text_schreiben(puffer, wert)
+        else:
+            puffer.append(_TEXT_VERWEIS)
+            _varint_schreiben(puffer, nummer)
+    elif isinstance(wert, (list, tuple)):
+        puffer.append(_LISTE)
+        _varint_schreiben(puffer, len(wert))
+        for element in wert:
+            _wert_schreiben(puffer, element, texte)
+    elif isinstance(wert, dict):
+        puffer.append(_DICT)
+        _varint_schreiben(puffer, len(wert))
+        for schlüssel, element in wert.items():
+            _wert_schreiben(puffer, schlüssel, texte)
+            _wert_schreiben(puffer, element, texte)
+    else:
+        raise TypeError(f"Werte vom Typ {type(wert).__name__} können nicht binär kodiert werden.")
+
+
+def _spenden_spalten(transaktionen):
+    "Eine Funktion, die die Spalten sender, empfänger, betrag und zeitstempel zurückgibt oder None, wenn nicht alle Transaktionen dem Spenden-Schema entsprechen."
+
+    try:
+        # Vier Felder, die alle vorhanden sind, heißt: genau die Felder des Schemas
+        zeilen = [(t['sender'], t['empfänger'], t['betrag'], t['zeitstempel']) for t in transaktionen if len(t) == 4]
+    except (KeyError, TypeError):
+        return None
+    if not zeilen or len(zeilen) != len(transaktionen):
+        return None
+
+    spalten = tuple(zip(*zeilen))
+    if any(set(map(type, spalte)) != {typ} for spalte, typ in zip(spalten, _SPENDEN_TYPEN)):
+        return None
+    return spalten
+
+
+def _transaktionen_schreiben(puffer, transaktionen, texte):
+    "Eine Funktion, die Transaktionen anhängt, nach Möglichkeit spaltenweise mit Verweisen auf die Texte-Tabelle und festen Breiten."
+
+    _varint_schreiben(puffer, len(transaktionen))
+
+    spalten = _spenden_spalten(transaktionen)
+    if spalten is None:
+        puffer.append(_TRANSAKTIONEN_WERTE)
+        for transaktion in transaktionen:
+            _wert_schreiben(puffer, transaktion, texte)
+        return
+
+    puffer.append(_TRANSAKTIONEN_SPALTEN)
+    bisher = len(texte)
+    sender = [texte.setdefault(name, len(texte)) for name in spalten[0]]
+    empfänger = [texte.setdefault(name, len(texte)) for name in spalten[1]]
+
+    # Nur die in diesen Transaktionen neu hinzugekommenen Namen werden übertragen (sie stehen am Ende der Tabelle)
+    neue_texte = list(itertools.islice(reversed(texte.keys()), len(texte) - bisher))[::-1]
+    _varint_schreiben(puffer, len(neue_texte))
+    for text in neue_texte:
+        _text_schreiben(puffer, text)
+
+    # Die Breite der Verweise richtet sich nach der Größe der Tabelle
+    index_format = next(format for grenze, format in _INDEX_FORMATE if len(texte) <= grenze)
+    puffer += index_format.encode()
+    anzahl = len(transaktionen)
+    puffer += struct.pack(f'<{anzahl}{index_format}', *sender)
+    puffer += struct.pack(f'<{anzahl}{index_format}', *empfänger)
+    puffer += struct.pack(f'<{anzahl}d{anzahl}d', *spalten[2], *spalten[3])
+
+
+def _block_schreiben(puffer, block, texte):
+    "Eine Funktion, die einen Block als Datensatz anhängt."
+
+    # Das Ziel steht im Block-Kopf als 64-stellige Hex-Zahl, passt also in 32 Bytes
+    ziel = block.ziel.to_bytes(32, 'big')
+    hashes = [_roher_hash(block.vorheriger_hash), _roher_hash(block.merkle_wurzel), _roher_hash(block.hash)]
+
+    if (None not in hashes and type(block.zeitstempel) is float and type(block.nonce) is int
+            and 0 <= block.index < 1 << 64 and 0 <= block.nonce < 1 << 64):
+        puffer.append(_KOPF_FEST)
+        puffer += _KOPF_STRUCT.pack(block.index, block.zeitstempel, *hashes, ziel, block.nonce)
+    else:
+        puffer.append(_KOPF_WERTE)
+        _varint_schreiben(puffer, block.index)
+        _wert_schreiben(puffer, block.zeitstempel, texte)
+        _hash_schreiben(puffer, block.vorheriger_hash)
+        _hash_schreiben(puffer, block.merkle_wurzel)
+        _hash_schreiben(puffer, block.hash)
+        puffer += ziel
+        _wert_schreiben(puffer, block.nonce, texte)
+
+    _transaktionen_schreiben(puffer, block.transaktionen, texte)
+
+
+class _Leser:
+    "Ein Leser, der die Bestandteile einer Nachricht nacheinander aus einem Puffer liest."
+
+    def __init__(self, daten):
+        self.daten = daten
+        self.position = 0
+        # Alle bisher übertragenen Texte der Nachricht in der Reihenfolge ihres ersten Auftretens
+        self.texte = []
+
+    def byte(self):
+        wert = self.daten[self.position]
+        self.position += 1
+        return wert
+
+    def varint(self):
+        zahl = 0
+        verschiebung = 0
+        while True:
+            wert = self.daten[self.position]
+            self.position += 1
+            zahl |= (wert & 0x7F) << verschiebung
+            if wert < 0x80:
+                return zahl
+            verschiebung += 7
+
+    def roh(self, anzahl):
+        ende = self.position + anzahl
+        if ende > len(self.daten):
+            raise ValueError("Nachricht endet vorzeitig.")
+        daten = self.daten[self.position:ende]
+        self.position = ende
+        return daten
+
+    def text(self):
+        return str(self.roh(self.varint()), 'utf-8')
+
+    def hash(self):
+        art = self.byte()
+        if art == _HASH_ROH:
+            return self.roh(32).hex()
+        if art == _HASH_TEXT:
+            return self.text()
+        raise ValueError(f"Unbekannte Hash-Kodierung {art}.")
+
+    def feste_werte(self, format):
+        werte = struct.unpack_from(format, self.daten, self.position)
+        self.position += struct.calcsize(format)
+        return werte
+
+    def wert(self):
+        art = self.byte()
+        if art == _TEXT_VERWEIS:
+            return self.texte[self.varint()]
+        if art == _TEXT:
+            text = self.text()
+            self.texte.append(text)
+            return text
+        if art == _KOMMAZAHL:
+            return self.feste_werte('<d')[0]
+        if art == _GANZZAHL:
+            zahl = self.varint()
+            return zahl >> 1 if not zahl & 1 else -((zahl + 1) >> 1)
+        if art == _DICT:
+            anzahl = self.varint()
+            ergebnis = {}
+            for _ in range(anzahl):
+                schlüssel = self.wert()
+                if not isinstance(schlüssel, str):
+                    raise ValueError("Schlüssel müssen Texte sein.")
+                ergebnis[schlüssel] = self.wert()
+            return ergebnis
+        if art == _LISTE:
+            return [self.wert() for _ in range(self.varint())]
+        if art == _NONE:
+            return None
+        if art == _WAHR:
+            return True
+        if art == _FALSCH:
+            return False
+        raise ValueError(f"Unbekannte Wert-Kodierung {art}.")
+
+    def transaktionen(self):
+        anzahl = self.varint()
+        art = self.byte()
+        if art == _TRANSAKTIONEN_WERTE:
+            return [self.wert() for _ in range(anzahl)]
+        if art != _TRANSAKTIONEN_SPALTEN:
+            raise ValueError(f"Unbekannte Transaktions-Kodierung {art}.")
+
+        texte = self.texte
+        texte.extend([self.text() for _ in range(self.varint())])
+        index_format = chr(self.byte())
+        if index_format not in 'BHI':
+            raise ValueError(f"Unbekannte Breite der Verweise {index_format!r}.")
+        # Alle vier Spalten mit einem Aufruf lesen
+        spalten = self.feste_werte(f'<{anzahl}{index_format}{anzahl}{index_format}{anzahl}d{anzahl}d')
+        return [
+            {'sender': texte[s], 'empfänger': texte[e], 'betrag': b, 'zeitstempel': z}
+            for s, e, b, z in zip(spalten[:anzahl], spalten[anzahl:2 * anzahl], spalten[2 * anzahl:3 * anzahl], spalten[3 * anzahl:])
+        ]
+
+    def block(self):
+        "Eine Methode, die einen Block-Datensatz als Dictionary im Format von Block.in_dictionary_umwandeln liest."
+
+        art = self.byte()
+        if art == _KOPF_FEST:
+            index, zeitstempel, vorheriger_hash, merkle_wurzel, block_hash, ziel, nonce = _KOPF_STRUCT.unpack_from(self.daten, self.position)
+            self.position += _KOPF_STRUCT.size
+            return {
+                'index': index,
+                'zeitstempel': zeitstempel,
+                'vorheriger_hash': vorheriger_hash.hex(),
+                'merkle_wurzel': merkle_wurzel.hex(),
+                'hash': block_hash.hex(),
+                'ziel': ziel.hex(),
+                'nonce': nonce,
+                'transaktionen': self.transaktionen()
+            }
+        if art != _KOPF_WERTE:
+            raise ValueError(f"Unbekannte Kopf-Kodierung {art}.")
+
+        return {
+            'index': self.varint(),
+            'zeitstempel': self.wert(),
+            'vorheriger_hash': self.hash(),
+            'merkle_wurzel': self.hash(),
+            'hash': self.hash(),
+            'ziel': self.roh(32).hex(),
+            'nonce': self.wert(),
+            'transaktionen': self.transaktionen()
+        }
+
+    def magic(self, erwartet):
+        if bytes(self.roh(len(erwartet))) != erwartet:
+            raise ValueError("Unbekanntes Format oder unbekannte Version.")
+
+
+def _dekodieren(daten, lesen):
+    "Eine Funktion, die eine Nachricht mit der Funktion lesen dekodiert und jeden Fehler in den Daten als ValueError meldet."
+
+    leser = _Leser(memoryview(daten))
+    try:
+        ergebnis = lesen(leser)
+    except ValueError as e:
+        raise ValueError(f"Ungültige Binärdaten: {e}") from e
+    except (IndexError, KeyError, struct.error, UnicodeDecodeError, RecursionError) as e:
+        raise ValueError(f"Ungültige Binärdaten: {e!r}") from e
+
+    if leser.position != len(daten):
+        raise ValueError("Ungültige Binärdaten: Überzählige Bytes am Ende der Nachricht.")
+    return ergebnis
+
+
+def kodiere_blöcke(blöcke, kopf=None):
+    "Ein Generator, der Blöcke mit einem Kopf (z.B. länge, von, bis wie bei GET /chain) binär kodiert, Block für Block zum Streamen."
+
+    # Die Tabelle der Texte gilt für die ganze Nachricht, wiederkehrende Namen werden also nur einmal übertragen
+    texte = {}
+    puffer = bytearray(MAGIC_BLÖCKE)
+    _wert_schreiben(puffer, kopf or {}, texte)
+    yield bytes(puffer)
+
+    for block in blöcke:
+        datensatz = bytearray()
+        _block_schreiben(datensatz, block, texte)
+        # Jeder Datensatz mit vorangestellter Länge, eine 0 beendet die Nachricht
+        puffer = bytearray()
+        _varint_schreiben(puffer, len(datensatz))
+        yield bytes(puffer + datensatz)
+
+    yield b'\x00'
+
+
+def dekodiere_blöcke(daten):
+    "Eine Funktion, die eine Nachricht von kodiere_blöcke in (kopf, [Block-Dictionaries]) zurückverwandelt."
+
+    def lesen(leser):
+        leser.magic(MAGIC_BLÖCKE)
+        kopf = leser.wert()
+        if not isinstance(kopf, dict):
+            raise ValueError("Der Kopf muss ein Dictionary sein.")
+
+        blöcke = []
+        while True:
+            länge = leser.varint()
+            if länge == 0:
+                return kopf, blöcke
+            ende = leser.position + länge
+            blöcke.append(leser.block())
+            if leser.position != ende:
+                raise ValueError("Die Länge eines Block-Datensatzes stimmt nicht.")
+
+    return _dekodieren(daten, lesen)
+
+
+def kodiere_transaktionen(transaktionen):
+    "Eine Funktion, die eine Liste von Transaktionen binär kodiert."
+
+    puffer = bytearray(MAGIC_TRANSAKTIONEN)
+    _transaktionen_schreiben(puffer, transaktionen, {})
+    return bytes(puffer)
+
+
+def dekodiere_transaktionen(daten):
+    "Eine Funktion, die eine Nachricht von kodiere_transaktionen in eine Liste von Transaktionen zurückverwandelt."
+
+    def lesen(leser):
+        leser.magic(MAGIC_TRANSAKTIONEN)
+        return leser.transaktionen()
+
+    return _dekodieren(daten, lesen)
+
+
+def gzip_komprimieren(teile, stufe=6):
+    "Ein Generator, der gestreamte Teile einer Antwort fortlaufend mit gzip komprimiert."
+
+    komprimierer = zlib.compressobj(stufe, zlib.DEFLATED, 31)
+    for teil in teile:
+        komprimiert = komprimierer.compress(teil)
+        if komprimiert:
+            yield komprimiert
+    yield komprimierer.flush()
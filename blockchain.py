@@ -1,39 +1,278 @@
 import hashlib
+import math
+import threading
 import time 
 import json
+import logging
+from collections import namedtuple
+
+import metriken
+from mempool import Mempool, prüfe_transaktion, transaktions_id
+from merkle import TransaktionsIndex, berechne_merkle_wurzel, merkle_wurzel_aus_ids
+
+logger = logging.getLogger(__name__)
+
+SCHÜRF_DAUER = metriken.histogramm(
+    'blockchain_schuerf_dauer_sekunden', 'Dauer des Schürfens erfolgreich geschürfter Blöcke.',
+    grenzen=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+)
+SCHÜRF_ERGEBNISSE = metriken.zähler(
+    'blockchain_schuerf_ergebnisse_gesamt', 'Schürf-Versuche nach Ergebnis.', labels=('ergebnis',)
+)
+HASHRATE = metriken.messwert('blockchain_hashrate', 'Hashes pro Sekunde beim letzten Schürfen.')
+SCHÜRF_VERSUCHE = metriken.zähler('blockchain_schuerf_versuche_gesamt', 'Berechnete Block-Hashes beim Schürfen.')
+VALIDIERUNGS_DAUER = metriken.histogramm(
+    'blockchain_validierung_dauer_sekunden', 'Dauer der Prüfung der eigenen bzw. einer erhaltenen Chain.', labels=('art',)
+)
+GEPRÜFTE_BLÖCKE = metriken.zähler(
+    'blockchain_gepruefte_bloecke_gesamt', 'Einzeln geprüfte Blöcke nach Ergebnis.', labels=('ergebnis',)
+)
+TRANSAKTIONEN = metriken.zähler(
+    'blockchain_transaktionen_gesamt', 'Eingegangene Transaktionen nach Status.', labels=('status',)
+)
+
+# Nach so vielen Versuchen wird beim Schürfen auf Abbruch geprüft und der Fortschritt gemeldet
+PRÜF_INTERVALL = 2000
+
+# Unveränderliche Sicht auf die Chain: Blöcke werden nur angehängt oder die Liste als Ganzes ausgetauscht,
+# daher bleiben chain[:länge] eines Schnappschusses stabil, auch wenn gleichzeitig geschrieben wird
+Schnappschuss = namedtuple('Schnappschuss', ['chain', 'länge', 'speicher_generation', 'arbeit'])
+
+
+def berechne_ziel(schwierigkeit):
+    "Eine Funktion, die die Schwierigkeit (Anzahl führender Hex-Nullen) in eine Obergrenze für den Hash-Wert umrechnet."
+
+    return 1 << (256 - 4 * schwierigkeit)
+
+
+def schwierigkeit_aus_ziel(ziel):
+    "Eine Funktion, die ein Ziel in die (gebrochene) Anzahl führender Hex-Nullen umrechnet, die ihm entspricht."
+
+    return (256 - math.log2(ziel)) / 4
+
+
+def arbeit(ziel):
+    "Eine Funktion, die die erwartete Anzahl an Hash-Versuchen für einen Block mit diesem Ziel zurückgibt."
+
+    # Ein Ziel von 0 kann nur ein ungültiger Block haben, der bei der Prüfung ohnehin abgelehnt wird
+    return (1 << 256) // max(ziel, 1)
+
+
+# Standardziel für Blöcke ohne Angabe und größtmögliches Ziel (mindestens eine führende Hex-Null) beim Anpassen
+STANDARD_ZIEL = berechne_ziel(4)
+MAX_ZIEL = berechne_ziel(1)
+
+# Pro Anpassung ändert sich das Ziel höchstens um diesen Faktor
+MAX_ANPASSUNG = 4
+
+# Ein Block muss später entstanden sein als der Median der Zeitstempel so vieler Vorgänger
+MEDIAN_BLÖCKE = 11
+
+
+def suche_nonce(präfix, suffix, ziel, start_nonce, schrittweite=1, max_versuche=None):
+    "Eine Funktion, die ab start_nonce nach einer Nonce sucht, deren Hash unter dem Ziel liegt."
+
+    # Der Hash-Zustand nach dem Präfix wird nur einmal berechnet und pro Versuch kopiert
+    basis = hashlib.sha256(präfix)
+    nonce = start_nonce
+    versuche = 0
+
+    while max_versuche is None or versuche < max_versuche:
+        kandidat = basis.copy()
+        kandidat.update(str(nonce).encode())
+        kandidat.update(suffix)
+        digest = kandidat.digest()
+        versuche += 1
+
+        # Vergleich direkt auf dem Digest statt auf hexdigest().startswith()
+        if int.from_bytes(digest, 'big') < ziel:
+            return nonce, digest.hex(), versuche
+
+        nonce += schrittweite
+
+    return None, None, versuche
+
+
+class EingefroreneTransaktion(dict):
+    "Ein Dictionary für Transaktionen eines geschürften Blocks, das nicht mehr verändert werden kann."
+
+    __slots__ = ()
+
+    def _unveränderlich(self, *args, **kwargs):
+        raise TypeError("Transaktionen eines geschürften Blocks können nicht verändert werden.")
+
+    __setitem__ = __delitem__ = __ior__ = _unveränderlich
+    clear = pop = popitem = setdefault = update = _unveränderlich
+
+    def __reduce__(self):
+        return (EingefroreneTransaktion, (dict(self),))
+
 
 class Block:
-    def __init__(self, index, zeitstempel, transaktionen, vorheriger_hash, nonce=0):
+    # __slots__ statt __dict__ pro Instanz spart bei langen Chains deutlich Speicher
+    __slots__ = ('index', 'zeitstempel', 'transaktionen', 'merkle_wurzel', 'vorheriger_hash', 'ziel', 'nonce', 'hash', '_json_bytes')
+
+    def __init__(self, index, zeitstempel, transaktionen, vorheriger_hash, nonce=0, ziel=STANDARD_ZIEL):
+        self._json_bytes = None
         self.index = index
         self.zeitstempel = zeitstempel
         self.transaktionen = transaktionen
+        # Der Block-Hash deckt die Transaktionen nur über die Merkle-Wurzel ab, die einmal pro Block berechnet wird
+        self.merkle_wurzel = berechne_merkle_wurzel(transaktionen)
         self.vorheriger_hash = vorheriger_hash
+        # Der Hash des Blocks muss als Zahl kleiner als sein Ziel sein
+        self.ziel = ziel
         self.nonce = nonce
         self.hash = self.berechne_hash()
 
+    def __setattr__(self, name, wert):
+        # Nach dem Versiegeln sind alle Felder unveränderlich, damit die zwischengespeicherten Bytes gültig bleiben
+        if getattr(self, '_json_bytes', None) is not None:
+            raise AttributeError(f"Block {self.index} ist versiegelt und kann nicht verändert werden.")
+        object.__setattr__(self, name, wert)
+
+    def __reduce__(self):
+        if self.ist_versiegelt():
+            return (Block.aus_dictionary, (self.in_dictionary_umwandeln(),))
+        return (Block, (self.index, self.zeitstempel, self.transaktionen, self.vorheriger_hash, self.nonce, self.ziel))
+
+    @classmethod
+    def aus_dictionary(cls, block_daten):
+        "Eine Methode, die einen versiegelten Block aus einem Dictionary (z.B. von einer Peer-Node) erstellt, ohne den Hash neu zu berechnen, und bei Feldern mit falschem Typ einen ValueError auslöst."
+
+        block = cls._ohne_hash_erstellen(block_daten)
+
+        # Hashes dienen als Schlüssel in Indizes und im Waisen-Pool, z.B. wäre eine Liste dort nicht hashbar
+        for feld in ('hash', 'vorheriger_hash', 'merkle_wurzel'):
+            if not isinstance(getattr(block, feld), str):
+                raise ValueError(f"Das Feld {feld} muss ein Text sein.")
+        for feld in ('index', 'nonce'):
+            wert = getattr(block, feld)
+            if isinstance(wert, bool) or not isinstance(wert, int):
+                raise ValueError(f"Das Feld {feld} muss eine ganze Zahl sein.")
+        if not isinstance(block.transaktionen, (list, tuple)):
+            raise ValueError("Das Feld transaktionen muss eine Liste sein.")
+
+        block.versiegeln()
+        return block
+
+    @classmethod
+    def aus_json_bytes(cls, json_bytes):
+        "Eine Methode, die einen versiegelten Block aus den kanonischen Bytes von als_json_bytes erstellt, ohne ihn neu zu serialisieren."
+
+        block = cls._ohne_hash_erstellen(json.loads(json_bytes))
+        block.transaktionen = tuple(EingefroreneTransaktion(transaktion) for transaktion in block.transaktionen)
+
+        # Zwischengespeichert werden die gespeicherten Bytes ohne das führende "hash"-Feld
+        hash_ende = json_bytes.index(b'", ', len(b'{"hash": "'))
+        block._json_bytes = b'{' + json_bytes[hash_ende + 3:]
+        return block
+
+    @classmethod
+    def _ohne_hash_erstellen(cls, block_daten):
+        "Eine Methode, die einen Block mit dem übergebenen Hash erstellt, ohne __init__ den Hash berechnen zu lassen."
+
+        block = cls.__new__(cls)
+        block._json_bytes = None
+        block.index = block_daten['index']
+        block.zeitstempel = block_daten['zeitstempel']
+        block.transaktionen = block_daten['transaktionen']
+        block.merkle_wurzel = block_daten['merkle_wurzel']
+        block.vorheriger_hash = block_daten['vorheriger_hash']
+        block.ziel = int(block_daten['ziel'], 16)
+        block.nonce = block_daten['nonce']
+        block.hash = block_daten['hash']
+        return block
+
+    def ist_versiegelt(self):
+        "Eine Methode, die angibt, ob der Block bereits versiegelt ist."
+
+        return self._json_bytes is not None
+
+    def versiegeln(self):
+        "Eine Methode, die die Transaktionen einfriert und die kanonischen JSON-Bytes des Blocks einmalig zwischenspeichert."
+
+        if self.ist_versiegelt():
+            return
+
+        self.transaktionen = tuple(EingefroreneTransaktion(transaktion) for transaktion in self.transaktionen)
+        json_bytes = json.dumps(self.in_dictionary_umwandeln(), sort_keys=True).encode()
+        hash_ende = json_bytes.index(b'", ', len(b'{"hash": "'))
+        self._json_bytes = b'{' + json_bytes[hash_ende + 3:]
+
+    def kopf_bytes(self):
+        "Eine Methode, die den Block-Kopf (ohne Transaktionen) als die Bytes zurückgibt, über die der Hash berechnet wird."
+
+        präfix, suffix = self.hash_vorlage()
+        return präfix + str(self.nonce).encode() + suffix
+
     def berechne_hash(self):
-        "Eine Methode, die den SHA-256 Hash des Blocks berechnet."
+        "Eine Methode, die den SHA-256 Hash des Block-Kopfs berechnet."
 
-        block_als_dictinary = {
-            'index': self.index,
-            'zeitstempel': self.zeitstempel,
-            'transaktionen': self.transaktionen,
+        return hashlib.sha256(self.kopf_bytes()).hexdigest()
+
+    def berechne_merkle_wurzel(self):
+        "Eine Methode, die die Merkle-Wurzel aus den Transaktionen des Blocks neu berechnet (z.B. zur Prüfung empfangener Blöcke)."
+
+        return berechne_merkle_wurzel(self.transaktionen)
+
+    def ziel_hex(self):
+        "Eine Methode, die das Ziel als 64-stelligen Hex-String zurückgibt, wie er im Block-Kopf steht."
+
+        return format(self.ziel, '064x')
+
+    def hash_vorlage(self):
+        "Eine Methode, die den serialisierten Block-Kopf einmalig in den Teil vor und nach der Nonce aufteilt."
+
+        # json.dumps mit sort_keys ordnet die Schlüssel als index, merkle_wurzel, nonce, vorheriger_hash, zeitstempel, ziel.
+        # Der Kopf hat unabhängig von der Anzahl der Transaktionen eine feste Größe.
+        präfix = json.dumps({'index': self.index, 'merkle_wurzel': self.merkle_wurzel}, sort_keys=True)
+        präfix = präfix[:-1] + ', "nonce": '
+        rest = json.dumps({
             'vorheriger_hash': self.vorheriger_hash,
-            'nonce': self.nonce
-        }
+            'zeitstempel': self.zeitstempel,
+            'ziel': self.ziel_hex()
+        }, sort_keys=True)
+        suffix = ', ' + rest[1:]
 
-        block_als_string = json.dumps(block_als_dictinary, sort_keys=True)
-        return hashlib.sha256(block_als_string.encode()).hexdigest()
+        return präfix.encode(), suffix.encode()
     
-    def block_schürfen(self, schwierigkeit):
-        "Eine Methode, die den Proof-of-Work Algorithmus implementiert."
+    def block_schürfen(self, schürfer=None, abbruch=None, fortschritt=None):
+        "Eine Methode, die den Proof-of-Work Algorithmus für das Ziel des Blocks implementiert. Gibt False zurück, wenn das Abbruch-Event gesetzt wurde."
+
+        # Ein austauschbarer Schürfer (z.B. mining.ParallelerSchürfer) übernimmt die Nonce-Suche
+        if schürfer is not None:
+            if schürfer.schürfe(self, abbruch, fortschritt) is None:
+                return False
+        else:
+            präfix, suffix = self.hash_vorlage()
+            ziel = self.ziel
+            nonce = self.nonce
+            versuche = 0
+            start_zeit = time.perf_counter()
+
+            while True:
+                if abbruch is not None and abbruch.is_set():
+                    return False
 
-        ziel = '0' * schwierigkeit
-        while not self.hash.startswith(ziel):
-            self.nonce += 1
-            self.hash = self.berechne_hash()
+                gefundene_nonce, block_hash, anzahl = suche_nonce(präfix, suffix, ziel, nonce, 1, PRÜF_INTERVALL)
+                versuche += anzahl
+                if fortschritt is not None:
+                    fortschritt(versuche)
 
-        print(f"Block geschürft: {self.hash} mit Nonce: {self.nonce}")
+                if gefundene_nonce is not None:
+                    self.nonce, self.hash = gefundene_nonce, block_hash
+                    break
+
+                nonce += anzahl
+
+            dauer = time.perf_counter() - start_zeit
+            SCHÜRF_VERSUCHE.erhöhen(versuche)
+            HASHRATE.setzen(versuche / dauer if dauer > 0 else 0.0)
+
+        self.versiegeln()
+        logger.info("Block geschürft: %s mit Nonce: %d", self.hash, self.nonce)
+        return True
 
     def in_dictionary_umwandeln(self):
         "Eine Methode, die den Block in ein Dictionary umwandelt."
@@ -41,19 +280,68 @@ class Block:
         return {
             'index': self.index,
             'zeitstempel': self.zeitstempel,
-            'transaktionen': self.transaktionen,
+            'transaktionen': list(self.transaktionen),
+            'merkle_wurzel': self.merkle_wurzel,
             'vorheriger_hash': self.vorheriger_hash,
+            'ziel': self.ziel_hex(),
             'nonce': self.nonce,
             'hash': self.hash
         }
+
+    def als_json_bytes(self):
+        "Eine Methode, die den Block als kanonische JSON-Bytes (wie json.dumps(in_dictionary_umwandeln(), sort_keys=True)) zurückgibt."
+
+        if self._json_bytes is None:
+            return json.dumps(self.in_dictionary_umwandeln(), sort_keys=True).encode()
+
+        # "hash" steht bei sortierten Schlüsseln vor allen anderen Feldern
+        return b'{"hash": "' + self.hash.encode() + b'", ' + self._json_bytes[1:]
     
 
 class Blockchain:
-    def __init__(self, schwierigkeit=4):
+    def __init__(self, schwierigkeit=4, schürfer=None, speicher=None, mempool=None, max_transaktionen_pro_block=500,
+                 ziel_blockzeit=30.0, anpassungs_fenster=10, prüfer=None, max_zeit_in_zukunft=120.0, transaktions_index=None):
+        # Die Anpassung rechnet in ganzen Millisekunden und teilt die erwartete Zeit durch MAX_ANPASSUNG
+        if ziel_blockzeit * 1000 < MAX_ANPASSUNG or anpassungs_fenster < 2:
+            raise ValueError(f"ziel_blockzeit muss mindestens {MAX_ANPASSUNG} ms und anpassungs_fenster mindestens 2 sein.")
+
         self.chain = []
-        self.mempool = []
+        # Transaktions-ID -> Block; damit werden bereits bestätigte Transaktionen im Mempool und in neuen Blöcken abgelehnt
+        self.transaktions_index = transaktions_index if transaktions_index is not None else TransaktionsIndex()
+        self.mempool = mempool if mempool is not None else Mempool(bestätigt=self.transaktions_index.ist_bestätigt)
+        self.max_transaktionen_pro_block = max_transaktionen_pro_block
+        # Die Schwierigkeit gilt nur für den Genesis-Block, danach wird das Ziel alle anpassungs_fenster Blöcke
+        # so angepasst, dass im Mittel alle ziel_blockzeit Sekunden ein Block entsteht
         self.schwierigkeit = schwierigkeit
-        self.erzeuge_genesis_block()
+        self.start_ziel = berechne_ziel(schwierigkeit)
+        self.ziel_blockzeit = ziel_blockzeit
+        self.anpassungs_fenster = anpassungs_fenster
+        # So viele Sekunden darf der Zeitstempel eines erhaltenen Blocks vor der eigenen Uhr liegen
+        self.max_zeit_in_zukunft = max_zeit_in_zukunft
+        self.schürfer = schürfer
+        # Ein austauschbarer Prüfer (z.B. validierung.ParallelerPrüfer) übernimmt Hash- und Merkle-Prüfung langer erhaltener Chains
+        self.prüfer = prüfer
+        self.speicher = speicher
+        self._gespeicherter_checkpoint = None
+
+        # Index von Block-Hash auf Position in der Chain für Abfragen ohne Durchsuchen der Chain
+        self.hash_index = {}
+
+        # Weitere Indizes (z.B. Spendenstatistik), die bei jeder Änderung der Chain fortgeschrieben werden
+        self.indizes = [self.transaktions_index]
+
+        # Alle Änderungen an Chain, Speicher und Indizes laufen nacheinander unter diesem Lock,
+        # Leser arbeiten ohne Lock auf dem zuletzt veröffentlichten Schnappschuss
+        self._lock = threading.RLock()
+        # Summe der Arbeit aller Blöcke; bei einem Fork gewinnt die Chain mit mehr Arbeit, nicht die längere
+        self.gesamt_arbeit = 0
+        self._schnappschuss = Schnappschuss(self.chain, 0, 0, 0)
+
+        # Eine bereits gespeicherte Chain wird geladen statt neu angefangen
+        if speicher is not None and len(speicher) > 0:
+            self.lade_aus_speicher()
+        else:
+            self.erzeuge_genesis_block()
 
     def erzeuge_genesis_block(self):
         "Eine Methode, die den Genesis-Block erstellt."
@@ -68,134 +356,713 @@ class Blockchain:
             }],
             vorheriger_hash="0",
             nonce=0,
+            ziel=self.start_ziel
         )
 
-        self.chain.append(genesis_block)
-        print(f"Genesis Block erstellt: {genesis_block.hash[:16]}") # Ausgabe der ersten 16 Zeichen des Hashs
+        genesis_block.versiegeln()
+        self.block_anhängen(genesis_block)
+        self.setze_checkpoint(0)
+        logger.info("Genesis Block erstellt: %.16s", genesis_block.hash) # Ausgabe der ersten 16 Zeichen des Hashs
+
+    def lade_aus_speicher(self):
+        "Eine Methode, die die Chain aus dem Block-Speicher lädt und nur Blöcke nach dem gespeicherten Checkpoint erneut prüft."
+
+        try:
+            self.chain = [self.speicher.lese_block(index) for index in range(len(self.speicher))]
+        except KeyError as e:
+            raise ValueError(f"{self.speicher.pfad} enthält Blöcke in einem älteren Format (Feld {e} fehlt). Bitte die Datei löschen und neu synchronisieren.")
+        self.hash_index = {block.hash: index for index, block in enumerate(self.chain)}
+        self.gesamt_arbeit = sum(arbeit(block.ziel) for block in self.chain)
+        self._indizes_neu_aufbauen()
+        self._veröffentlichen()
+
+        checkpoint = self.speicher.lade_checkpoint()
+        if checkpoint is not None and checkpoint[0] < len(self.chain) and self.chain[checkpoint[0]].hash == checkpoint[1]:
+            self.setze_checkpoint(checkpoint[0])
+        else:
+            self.setze_checkpoint(0)
+
+        logger.info("%d Blöcke aus %s geladen, davon %d bereits verifiziert.", len(self.chain), self.speicher.pfad, self.verifizierte_höhe + 1)
+
+        # Ungültige Blöcke am Ende (z.B. nach einem Absturz) werden verworfen
+        if not self.ist_chain_valide():
+            logger.warning("Gespeicherte Chain ab Block %d ungültig. Verwerfe die folgenden Blöcke.", self.verifizierte_höhe + 1)
+            with self._lock:
+                for block in self.chain[self.verifizierte_höhe + 1:]:
+                    self.hash_index.pop(block.hash, None)
+                self.chain = self.chain[:self.verifizierte_höhe + 1]
+                self.gesamt_arbeit = sum(arbeit(block.ziel) for block in self.chain)
+                self._indizes_neu_aufbauen()
+                self.speicher.kürzen(len(self.chain))
+                self._veröffentlichen()
+
+    def _veröffentlichen(self):
+        "Eine Methode, die nach einer abgeschlossenen Änderung einen neuen Schnappschuss für die Leser bereitstellt."
+
+        speicher_generation = self.speicher.generation if self.speicher is not None else 0
+        for index in self.indizes:
+            index.veröffentlichen()
+        self._schnappschuss = Schnappschuss(self.chain, len(self.chain), speicher_generation, self.gesamt_arbeit)
+
+    def schnappschuss(self):
+        "Eine Methode, die den zuletzt veröffentlichten, unveränderlichen Stand der Chain zurückgibt."
+
+        return self._schnappschuss
+
+    def block_anhängen(self, block):
+        "Eine Methode, die einen Block an die Chain und, falls vorhanden, an den Block-Speicher anhängt; schlägt das fehl, bleiben Chain, Speicher und Indizes unverändert."
+
+        with self._lock:
+            # Die Chain wird erst geändert, wenn Indizes und Speicher fortgeschrieben sind
+            self._indizes_fortschreiben([], [block])
+            self._speicher_schreiben(len(self.chain), [block])
+
+            self.hash_index[block.hash] = len(self.chain)
+            self.chain.append(block)
+            self.gesamt_arbeit += arbeit(block.ziel)
+            self._veröffentlichen()
+
+    def _indizes_fortschreiben(self, entfernte_blöcke, hinzugefügte_blöcke):
+        "Eine Methode, die die Indizes um die entfernten Blöcke (vom Ende her) zurückrollt und mit den neuen fortschreibt; bei einem Fehler werden sie aus der noch unveränderten Chain neu aufgebaut."
+
+        try:
+            for index in self.indizes:
+                for block in reversed(entfernte_blöcke):
+                    index.block_entfernen(block)
+                for block in hinzugefügte_blöcke:
+                    index.block_hinzufügen(block)
+        except Exception:
+            self._indizes_neu_aufbauen()
+            raise
+
+    def _indizes_neu_aufbauen(self):
+        for index in self.indizes:
+            index.neu_aufbauen(self.chain)
+            index.veröffentlichen()
+
+    def _speicher_schreiben(self, ab, blöcke):
+        "Eine Methode, die den Block-Speicher ab Position ab durch die Blöcke ersetzt; bei einem Fehler werden Speicher und Indizes wieder auf den Stand der noch unveränderten Chain gebracht."
+
+        if self.speicher is None:
+            return
+
+        try:
+            self.speicher.kürzen(ab)
+            for block in blöcke:
+                self.speicher.anhängen(block)
+        except Exception:
+            self._indizes_neu_aufbauen()
+            self.speicher.kürzen(ab)
+            for block in self.chain[ab:]:
+                self.speicher.anhängen(block)
+            raise
+
+    def registriere_index(self, index):
+        "Eine Methode, die einen Index mit block_hinzufügen/block_entfernen/neu_aufbauen/veröffentlichen aus der aktuellen Chain aufbaut und ab jetzt fortschreibt."
+
+        with self._lock:
+            index.neu_aufbauen(self.chain)
+            index.veröffentlichen()
+            self.indizes.append(index)
+
+    def hole_block(self, index):
+        "Eine Methode, die den Block an der angegebenen Position zurückgibt oder None, falls es ihn nicht gibt."
+
+        schnappschuss = self.schnappschuss()
+        if 0 <= index < schnappschuss.länge:
+            return schnappschuss.chain[index]
+        return None
+
+    def hole_block_nach_hash(self, block_hash):
+        "Eine Methode, die den Block mit dem angegebenen Hash über den Hash-Index zurückgibt oder None."
+
+        index = self.hash_index.get(block_hash)
+        block = self.hole_block(index) if index is not None else None
+
+        # Der Index kann bereits zu einer neueren Chain gehören als der Schnappschuss
+        if block is None or block.hash != block_hash:
+            return None
+        return block
+
+    def iteriere_block_bytes(self, von=0, bis=None, schnappschuss=None):
+        "Ein Generator, der die JSON-Bytes der Blöcke eines Schnappschusses liefert, mit Block-Speicher direkt aus der Log-Datei."
+
+        if schnappschuss is None:
+            schnappschuss = self.schnappschuss()
+        if bis is None or bis > schnappschuss.länge:
+            bis = schnappschuss.länge
+
+        for index in range(von, bis):
+            block_bytes = None
+            if self.speicher is not None:
+                # Wurde das Log seit dem Schnappschuss gekürzt, stehen dort evtl. schon andere Blöcke
+                block_bytes = self.speicher.lese_bytes(index, generation=schnappschuss.speicher_generation)
+            if block_bytes is None:
+                block_bytes = schnappschuss.chain[index].als_json_bytes()
+            yield block_bytes
 
     def hole_letzten_block(self):
         "Eine Methode, die den letzten Block der Blockchain zurückgibt."
-        return self.chain[-1]
+
+        schnappschuss = self.schnappschuss()
+        return schnappschuss.chain[schnappschuss.länge - 1]
     
     def füge_transaktion_hinzu(self, transaktion):
         "Eine Methode, die eine Transaktion zum Mempool hinzufügt."
         
-        # Ist die Transaktion gültig?
-        notwendige_felder = ['sender', 'empfänger', 'betrag']
-        if not all(feld in transaktion for feld in notwendige_felder):
-            print("Ungültige Transaktion. Fehlende Felder.")
+        # Ist die Transaktion gültig (Felder vorhanden, Betrag eine positive Zahl)?
+        grund = prüfe_transaktion(transaktion)
+        if grund is not None:
+            logger.debug("Ungültige Transaktion: %s", grund)
+            TRANSAKTIONEN.erhöhen(status='ungültig')
             return False
         
         # ist ein Zeitstempel vorhanden?
         if 'zeitstempel' not in transaktion:
             transaktion['zeitstempel'] = time.time()
 
-        self.mempool.append(transaktion)
-        print(f"Transaktion hinzugefügt: {transaktion}")
+        # Duplikate, bereits bestätigte Transaktionen und Transaktionen bei vollem Mempool werden abgelehnt
+        if self.mempool.hinzufügen(transaktion) is None:
+            TRANSAKTIONEN.erhöhen(status='abgelehnt')
+            return False
+
+        TRANSAKTIONEN.erhöhen(status='aufgenommen')
+        logger.debug("Transaktion hinzugefügt: %s", transaktion)
         return True
+
+    def füge_transaktionen_hinzu(self, transaktionen):
+        "Eine Methode, die mehrere Transaktionen gesammelt zum Mempool hinzufügt und pro Transaktion (ID oder None, Status) zurückgibt."
+
+        ergebnisse = [None] * len(transaktionen)
+        gültige = []
+
+        # Jede Transaktion wird einzeln wie bei füge_transaktion_hinzu geprüft
+        for position, transaktion in enumerate(transaktionen):
+            if prüfe_transaktion(transaktion) is not None:
+                ergebnisse[position] = (None, 'ungültig')
+                continue
+            if 'zeitstempel' not in transaktion:
+                transaktion['zeitstempel'] = time.time()
+            gültige.append(position)
+
+        # Alle gültigen Transaktionen werden unter einmaligem Sperren des Mempools aufgenommen
+        for position, ergebnis in zip(gültige, self.mempool.hinzufügen_mehrere([transaktionen[i] for i in gültige])):
+            ergebnisse[position] = ergebnis
+
+        aufgenommen = sum(1 for _, status in ergebnisse if status == 'aufgenommen')
+        TRANSAKTIONEN.erhöhen(aufgenommen, status='aufgenommen')
+        if aufgenommen < len(transaktionen):
+            ungültig = len(transaktionen) - len(gültige)
+            if ungültig:
+                TRANSAKTIONEN.erhöhen(ungültig, status='ungültig')
+            if len(gültige) > aufgenommen:
+                TRANSAKTIONEN.erhöhen(len(gültige) - aufgenommen, status='abgelehnt')
+        logger.debug("%d von %d Transaktionen hinzugefügt.", aufgenommen, len(transaktionen))
+        return ergebnisse
     
-    def schürfe_offene_transaktionen(self):
-        "Eine Methode, die alle offenen Transaktionen im Mempool zu einem neuen Block schürft."
+    def schürfe_offene_transaktionen(self, abbruch=None, fortschritt=None):
+        "Eine Methode, die die ältesten offenen Transaktionen zu einem neuen Block schürft und diesen zurückgibt (False bei Abbruch)."
 
         #Überprüfen, dass Mempool nicht leer ist
 
         if not self.mempool:
-            print("Keine offenen Transaktionen zum Schürfen.")
+            logger.info("Keine offenen Transaktionen zum Schürfen.")
             return False
         
-        print(f"Starte das Schürfen von {len(self.mempool)} Transaktionen...")
+        # Höchstens max_transaktionen_pro_block der ältesten Transaktionen kommen in den Block
+        ausgewählte = self.mempool.hole_älteste(self.max_transaktionen_pro_block)
+        schnappschuss = self.schnappschuss()
+        letzter_block = schnappschuss.chain[schnappschuss.länge - 1]
+        ziel = self.berechne_ziel_für(schnappschuss.chain, schnappschuss.länge)
+        logger.info("Starte das Schürfen von %d Transaktionen (Schwierigkeit %.2f)...", len(ausgewählte), schwierigkeit_aus_ziel(ziel))
 
+        # Geht die eigene Uhr gegenüber den Peers nach, muss der Block trotzdem nach dem Median der Vorgänger liegen
+        zeitstempel = max(time.time(), self.median_zeit(schnappschuss.chain, schnappschuss.länge) + 0.001)
+
+        # Geschürft wird ohne Lock, damit Leser, neue Transaktionen und Peer-Blöcke nicht warten müssen
         neuer_block = Block(
-            index=len(self.chain),
-            zeitstempel=time.time(),
-            transaktionen=self.mempool.copy(),
-            vorheriger_hash=self.hole_letzten_block().hash
+            index=letzter_block.index + 1,
+            zeitstempel=zeitstempel,
+            transaktionen=[transaktion for _, transaktion in ausgewählte],
+            vorheriger_hash=letzter_block.hash,
+            ziel=ziel
         )
 
         # Schürfen des Blocks
         start_zeit = time.time()
-        neuer_block.block_schürfen(self.schwierigkeit)
+        if not neuer_block.block_schürfen(self.schürfer, abbruch, fortschritt):
+            logger.info("Schürfen abgebrochen.")
+            SCHÜRF_ERGEBNISSE.erhöhen(ergebnis='abgebrochen')
+            return False
         end_zeit = time.time()
 
         schürf_dauer = end_zeit - start_zeit
-        print(f"Block geschürft in {schürf_dauer:.2f} Sekunden.") # Ausgabe der Schürfdauer (:.2f für 2 Dezimalstellen)
-        self.chain.append(neuer_block)
-        print(f"Neuer Block hinzugefügt: {neuer_block.hash[:16]}") # Ausgabe der ersten 16 Zeichen des Hashs
-        self.mempool = []  # Leeren des Mempools nach dem Schürfen
-        return True
+        SCHÜRF_DAUER.beobachten(schürf_dauer)
+        logger.info("Block geschürft in %.2f Sekunden.", schürf_dauer) # Ausgabe der Schürfdauer mit 2 Dezimalstellen
+
+        with self._lock:
+            # Wurde die Chain während des Schürfens geändert (z.B. durch einen Block einer Peer-Node), passt der Block nicht mehr.
+            # Verglichen wird mit der Chain selbst, nicht mit dem veröffentlichten Schnappschuss.
+            if self.chain[-1].hash != neuer_block.vorheriger_hash:
+                logger.info("Die Chain hat sich während des Schürfens geändert. Block wird verworfen.")
+                SCHÜRF_ERGEBNISSE.erhöhen(ergebnis='verworfen')
+                return False
+
+            self.block_anhängen(neuer_block)
+            # Nur die geschürften Transaktionen entfernen, während des Schürfens eingegangene bleiben erhalten
+            self.mempool.entfernen(txid for txid, _ in ausgewählte)
+
+        SCHÜRF_ERGEBNISSE.erhöhen(ergebnis='erfolgreich')
+        logger.info("Neuer Block hinzugefügt: %.16s", neuer_block.hash) # Ausgabe der ersten 16 Zeichen des Hashs
+        return neuer_block
     
-    def ist_chain_valide(self):
-        "Eine Methode, die überprüft, ob die Blockchain gültig ist."
-
-        for i in range(1, len(self.chain)):
-            aktueller_block = self.chain[i]
-            vorheriger_block = self.chain[i - 1]
-
-            # Überprüfen des Hashs
-            if aktueller_block.hash != aktueller_block.berechne_hash():
-                print(f"Ungültiger Hash bei Block {aktueller_block.index}")
-                print("Erwartet:", aktueller_block.berechne_hash())
-                print("Gefunden:", aktueller_block.hash)
+    def berechne_ziel_für(self, chain, höhe):
+        "Eine Methode, die das Ziel zurückgibt, das der Block an der angegebenen Höhe nach den vorherigen Blöcken der Chain haben muss."
+
+        vorheriger_block = chain[höhe - 1]
+
+        # Nur alle anpassungs_fenster Blöcke wird angepasst, dazwischen gilt das Ziel des Vorgängers
+        if höhe % self.anpassungs_fenster != 0:
+            return vorheriger_block.ziel
+
+        # Der Genesis-Block entsteht beim Start der Node und nicht beim Schürfen, er wird daher nicht mitgemessen
+        erster_index = max(höhe - self.anpassungs_fenster, 1)
+        abstände = höhe - 1 - erster_index
+        if abstände < 1:
+            return vorheriger_block.ziel
+
+        # Ganzzahlig in Millisekunden rechnen, damit alle Nodes auf dasselbe Ergebnis kommen
+        erwartet = int(self.ziel_blockzeit * abstände * 1000)
+        gemessen = int((vorheriger_block.zeitstempel - chain[erster_index].zeitstempel) * 1000)
+
+        # Ausreißer (und falsche Zeitstempel) können das Ziel pro Anpassung nur begrenzt verschieben
+        gemessen = min(max(gemessen, erwartet // MAX_ANPASSUNG, 1), erwartet * MAX_ANPASSUNG)
+
+        # Zu schnelle Blöcke verkleinern das Ziel (schwerer), zu langsame vergrößern es
+        return max(1, min(vorheriger_block.ziel * gemessen // erwartet, MAX_ZIEL))
+
+    def median_zeit(self, chain, höhe):
+        "Eine Methode, die den Median der Zeitstempel der bis zu MEDIAN_BLÖCKE Blöcke vor der angegebenen Höhe zurückgibt."
+
+        zeitstempel = sorted(block.zeitstempel for block in chain[max(höhe - MEDIAN_BLÖCKE, 0):höhe])
+        return zeitstempel[len(zeitstempel) // 2]
+
+    def nächstes_ziel(self):
+        "Eine Methode, die das Ziel des nächsten zu schürfenden Blocks zurückgibt."
+
+        schnappschuss = self.schnappschuss()
+        return self.berechne_ziel_für(schnappschuss.chain, schnappschuss.länge)
+
+    def prüfe_block(self, aktueller_block, vorheriger_block, erwartetes_ziel, median_zeit, herkunft="", max_zeit=None,
+                    gesehen=None, bestätigt_bis=0):
+        "Eine Methode, die Hash, Verkettung, Zeitstempel, Ziel, Schwierigkeit und die Eindeutigkeit der Transaktionen eines einzelnen Blocks überprüft."
+
+        # Überprüfen des Hashs
+        berechneter_hash = aktueller_block.berechne_hash()
+        if aktueller_block.hash != berechneter_hash:
+            logger.warning("Ungültiger Hash bei Block %d%s (erwartet: %s, gefunden: %s)",
+                           aktueller_block.index, herkunft, berechneter_hash, aktueller_block.hash)
+            GEPRÜFTE_BLÖCKE.erhöhen(ergebnis='ungültig')
+            return False
+
+        # Passen die Transaktionen zur Merkle-Wurzel im Block-Kopf? Die IDs werden auch für die Eindeutigkeit gebraucht.
+        txids = [transaktions_id(transaktion) for transaktion in aktueller_block.transaktionen]
+        if aktueller_block.merkle_wurzel != merkle_wurzel_aus_ids(txids):
+            logger.warning("Ungültige Merkle-Wurzel bei Block %d%s", aktueller_block.index, herkunft)
+            GEPRÜFTE_BLÖCKE.erhöhen(ergebnis='ungültig')
+            return False
+
+        if not self.prüfe_transaktionen(aktueller_block, herkunft):
+            GEPRÜFTE_BLÖCKE.erhöhen(ergebnis='ungültig')
+            return False
+
+        if not self.prüfe_eindeutigkeit(aktueller_block, txids, set() if gesehen is None else gesehen, bestätigt_bis, herkunft):
+            GEPRÜFTE_BLÖCKE.erhöhen(ergebnis='ungültig')
+            return False
+
+        # Überprüfen des vorherigen Hashs
+        if aktueller_block.vorheriger_hash != vorheriger_block.hash:
+            logger.warning("Ungültiger vorheriger Hash bei Block %d%s", aktueller_block.index, herkunft)
+            GEPRÜFTE_BLÖCKE.erhöhen(ergebnis='ungültig')
+            return False
+
+        if not self.prüfe_zeitstempel(aktueller_block, median_zeit, max_zeit, herkunft):
+            GEPRÜFTE_BLÖCKE.erhöhen(ergebnis='ungültig')
+            return False
+
+        # Hat der Block das Ziel, das sich aus den vorherigen Blöcken ergibt?
+        if aktueller_block.ziel != erwartetes_ziel:
+            logger.warning("Falsches Ziel bei Block %d%s.", aktueller_block.index, herkunft)
+            GEPRÜFTE_BLÖCKE.erhöhen(ergebnis='ungültig')
+            return False
+
+        # Erfüllt der Block die Schwierigkeit?
+        if int(aktueller_block.hash, 16) >= aktueller_block.ziel:
+            logger.warning("Block %d%s erfüllt nicht die Schwierigkeit.", aktueller_block.index, herkunft)
+            GEPRÜFTE_BLÖCKE.erhöhen(ergebnis='ungültig')
+            return False
+
+        GEPRÜFTE_BLÖCKE.erhöhen(ergebnis='gültig')
+        return True
+
+    def prüfe_eindeutigkeit(self, block, txids, gesehen, bestätigt_bis, herkunft=""):
+        "Eine Methode, die überprüft, dass keine Transaktion eines Blocks doppelt, in gesehen oder in einem Block der eigenen Chain vor bestätigt_bis vorkommt, und die IDs in gesehen aufnimmt."
+
+        # Sonst würde dieselbe Spende mehrfach gebucht, z.B. wenn sie per Gossip erst nach ihrem Block eintrifft
+        for txid in txids:
+            erster_block = self.transaktions_index.finde_block(txid)
+            if txid in gesehen or (erster_block is not None and erster_block < bestätigt_bis):
+                logger.warning("Transaktion %.16s in Block %d%s ist bereits bestätigt.", txid, block.index, herkunft)
                 return False
+            gesehen.add(txid)
+        return True
 
-            # Überprüfen des vorherigen Hashs
-            if aktueller_block.vorheriger_hash != vorheriger_block.hash:
-                print(f"Ungültiger vorheriger Hash bei Block {aktueller_block.index}")
+    def prüfe_zeitstempel(self, block, median_zeit, max_zeit=None, herkunft=""):
+        "Eine Methode, die überprüft, ob ein Block nach dem Median seiner Vorgänger und, falls max_zeit angegeben ist, nicht danach entstanden ist."
+
+        # Sonst könnten vor- oder rückdatierte Blöcke die Anpassung des Ziels beliebig verschieben
+        zeitstempel = block.zeitstempel
+        if isinstance(zeitstempel, bool) or not isinstance(zeitstempel, (int, float)) or not math.isfinite(zeitstempel):
+            logger.warning("Ungültiger Zeitstempel bei Block %d%s", block.index, herkunft)
+            return False
+        if zeitstempel <= median_zeit:
+            logger.warning("Zeitstempel von Block %d%s liegt nicht nach dem Median der vorherigen Blöcke.", block.index, herkunft)
+            return False
+        if max_zeit is not None and zeitstempel > max_zeit:
+            logger.warning("Zeitstempel von Block %d%s liegt zu weit in der Zukunft.", block.index, herkunft)
+            return False
+        return True
+
+    def prüfe_transaktionen(self, block, herkunft=""):
+        "Eine Methode, die überprüft, ob alle Transaktionen eines Blocks wohlgeformt sind und einen endlichen, positiven Betrag haben."
+
+        # Sonst scheitern Statistik und Indizes beim Fortschreiben, nachdem der Block schon geprüft wurde
+        for transaktion in block.transaktionen:
+            grund = prüfe_transaktion(transaktion)
+            if grund is not None:
+                logger.warning("Ungültige Transaktion in Block %d%s: %s", block.index, herkunft, grund)
                 return False
-            
-            # Erfüllt der Block die Schwierigkeit?
-            if not aktueller_block.hash.startswith('0' * self.schwierigkeit):
-                print(f"Block {aktueller_block.index} erfüllt nicht die Schwierigkeit.")
+        return True
+
+    def setze_checkpoint(self, höhe):
+        "Eine Methode, die sich die höchste bereits überprüfte Blockhöhe und deren Hash merkt."
+
+        with self._lock:
+            neuer_tip_hash = self.chain[höhe].hash
+            if self.speicher is not None and (höhe, neuer_tip_hash) != self._gespeicherter_checkpoint:
+                self.speicher.speichere_checkpoint(höhe, neuer_tip_hash)
+                self._gespeicherter_checkpoint = (höhe, neuer_tip_hash)
+
+            self.verifizierte_höhe = höhe
+            self.verifizierter_tip_hash = neuer_tip_hash
+
+    def checkpoint_ist_aktuell(self, schnappschuss=None):
+        "Eine Methode, die überprüft, ob der gemerkte Checkpoint noch zur aktuellen Chain bzw. zum Schnappschuss passt."
+
+        if schnappschuss is None:
+            schnappschuss = self.schnappschuss()
+        höhe, tip_hash = self.verifizierte_höhe, self.verifizierter_tip_hash
+        return höhe < schnappschuss.länge and schnappschuss.chain[höhe].hash == tip_hash
+
+    def _checkpoint_übernehmen(self, schnappschuss, höhe, gültig):
+        "Eine Methode, die das Ergebnis einer Prüfung auf einem Schnappschuss als Checkpoint übernimmt, sofern die Chain nicht inzwischen ersetzt wurde."
+
+        with self._lock:
+            if self.chain is not schnappschuss.chain:
+                return
+            # Eine gleichzeitige Prüfung eines neueren Schnappschusses kann schon weiter gekommen sein
+            if gültig and self.checkpoint_ist_aktuell() and self.verifizierte_höhe > höhe:
+                return
+            self.setze_checkpoint(höhe)
+
+    def ist_chain_valide(self, vollständig=False):
+        "Eine Methode, die überprüft, ob die Blockchain gültig ist. Ohne vollständig=True werden nur Blöcke nach dem Checkpoint geprüft."
+
+        with VALIDIERUNGS_DAUER.messen(art='eigen'):
+            return self._ist_chain_valide(vollständig)
+
+    def _ist_chain_valide(self, vollständig):
+        # Geprüft wird ohne Lock auf einem Schnappschuss
+        schnappschuss = self.schnappschuss()
+        chain = schnappschuss.chain
+
+        start_index = 1
+        if not vollständig and self.checkpoint_ist_aktuell(schnappschuss):
+            start_index = self.verifizierte_höhe + 1
+
+        # Eigene, bereits angenommene Blöcke werden nicht verworfen, nur weil die Uhr inzwischen zurückgestellt wurde.
+        # Transaktionen vor start_index stehen im Index, die der geprüften Blöcke werden unterwegs gesammelt.
+        gesehen = set()
+        for i in range(start_index, schnappschuss.länge):
+            if not self.prüfe_block(chain[i], chain[i - 1], self.berechne_ziel_für(chain, i), self.median_zeit(chain, i),
+                                    gesehen=gesehen, bestätigt_bis=start_index):
+                self._checkpoint_übernehmen(schnappschuss, i - 1, gültig=False)
                 return False
-            
+
+        self._checkpoint_übernehmen(schnappschuss, schnappschuss.länge - 1, gültig=True)
         return True
     
-    def ist_erhaltene_chain_valide(self, erhaltene_chain):
-        "Eine Methode, die überprüft, ob eine erhaltene Blockchain gültig ist."
+    def ist_erhaltene_chain_valide(self, erhaltene_chain, ab_index=1):
+        "Eine Methode, die überprüft, ob eine erhaltene Blockchain ab dem angegebenen Index gültig ist."
 
+        with VALIDIERUNGS_DAUER.messen(art='erhalten'):
+            return self._ist_erhaltene_chain_valide(erhaltene_chain, ab_index)
+
+    def _ist_erhaltene_chain_valide(self, erhaltene_chain, ab_index):
         # Ist die Chain leer?
         if not erhaltene_chain:
-            print("Erhaltene Chain ist leer.")
+            logger.warning("Erhaltene Chain ist leer.")
             return False
         
+        # Ein fremder Genesis-Block muss mit derselben Anfangsschwierigkeit erstellt worden sein
+        if ab_index <= 0 and erhaltene_chain[0].ziel != self.start_ziel:
+            logger.warning("Der Genesis-Block der erhaltenen Chain hat eine andere Anfangsschwierigkeit.")
+            return False
 
-        for i in range(1, len(erhaltene_chain)): # 1, da der Genesis-Block nicht überprüft werden muss
-            aktueller_block = erhaltene_chain[i]
-            vorheriger_block = erhaltene_chain[i - 1]
+        # ab Index 1, da der Genesis-Block nicht überprüft werden muss
+        start_index = max(ab_index, 1)
+        max_zeit = time.time() + self.max_zeit_in_zukunft
+        # Nur ein mit der eigenen Chain gemeinsamer Anfang steht im Transaktions-Index, ein fremder Genesis-Block nicht
+        bestätigt_bis = start_index if ab_index > 0 else 0
+        if self.prüfer is not None and self.prüfer.lohnt_sich(len(erhaltene_chain) - start_index):
+            return self._parallel_prüfen(erhaltene_chain, start_index, max_zeit, bestätigt_bis)
 
-            # Überprüfen des Hashs
-            if aktueller_block.hash != aktueller_block.berechne_hash():
-                print(f"Ungültiger Hash bei Block {aktueller_block.index} in der erhaltenen Chain")
-                print("Erwartet:", aktueller_block.berechne_hash())
-                print("Gefunden:", aktueller_block.hash)
+        gesehen = set()
+        for i in range(start_index, len(erhaltene_chain)):
+            erwartetes_ziel = self.berechne_ziel_für(erhaltene_chain, i)
+            median_zeit = self.median_zeit(erhaltene_chain, i)
+            if not self.prüfe_block(erhaltene_chain[i], erhaltene_chain[i - 1], erwartetes_ziel, median_zeit,
+                                    " in der erhaltenen Chain", max_zeit, gesehen, bestätigt_bis):
                 return False
+            
+        logger.info("Erhaltene Chain ist gültig.")
+        return True
+
+    def prüfe_verkettung(self, chain, von, herkunft="", max_zeit=None, bestätigt_bis=None):
+        "Eine Methode, die Verkettung, Zeitstempel, Ziel, Schwierigkeit und (eindeutige) Transaktionen ab von in einem Durchlauf ohne Nachrechnen der Hashes prüft und die Position des ersten ungültigen Blocks bzw. len(chain) zurückgibt."
+
+        if bestätigt_bis is None:
+            bestätigt_bis = von
+
+        gesehen = set()
+        for i in range(von, len(chain)):
+            aktueller_block, vorheriger_block = chain[i], chain[i - 1]
 
-            # Überprüfen des vorherigen Hashs
             if aktueller_block.vorheriger_hash != vorheriger_block.hash:
-                print(f"Ungültiger vorheriger Hash bei Block {aktueller_block.index} in der erhaltenen Chain")
-                return False
-            
-            # Erfüllt der Block die Schwierigkeit?
-            if not aktueller_block.hash.startswith('0' * self.schwierigkeit):
-                print(f"Block {aktueller_block.index} in der erhaltenen Chain erfüllt nicht die Schwierigkeit.")
-                return False
-            
-        print("Erhaltene Chain ist gültig.")
+                logger.warning("Ungültiger vorheriger Hash bei Block %d%s", aktueller_block.index, herkunft)
+                return i
+
+            if not self.prüfe_zeitstempel(aktueller_block, self.median_zeit(chain, i), max_zeit, herkunft):
+                return i
+
+            if aktueller_block.ziel != self.berechne_ziel_für(chain, i):
+                logger.warning("Falsches Ziel bei Block %d%s.", aktueller_block.index, herkunft)
+                return i
+
+            if not self.prüfe_transaktionen(aktueller_block, herkunft):
+                return i
+
+            txids = [transaktions_id(transaktion) for transaktion in aktueller_block.transaktionen]
+            if not self.prüfe_eindeutigkeit(aktueller_block, txids, gesehen, bestätigt_bis, herkunft):
+                return i
+
+            # Ob der angegebene Hash zum Block passt, wird danach parallel geprüft
+            if int(aktueller_block.hash, 16) >= aktueller_block.ziel:
+                logger.warning("Block %d%s erfüllt nicht die Schwierigkeit.", aktueller_block.index, herkunft)
+                return i
+
+        return len(chain)
+
+    def _parallel_prüfen(self, erhaltene_chain, start_index, max_zeit=None, bestätigt_bis=None):
+        "Eine Methode, die erst die Verkettung sequenziell und dann Hashes und Merkle-Wurzeln bis zum ersten ungültigen Block parallel prüft."
+
+        herkunft = " in der erhaltenen Chain"
+        grenze = self.prüfe_verkettung(erhaltene_chain, start_index, herkunft, max_zeit, bestätigt_bis)
+
+        # Blöcke ab einer gebrochenen Verkettung müssen nicht mehr nachgerechnet werden
+        ungültig = self.prüfer.finde_ungültigen_block(erhaltene_chain, start_index, grenze)
+        if ungültig is not None:
+            position, grund = ungültig
+            logger.warning("%s bei Block %d%s", grund, erhaltene_chain[position].index, herkunft)
+            GEPRÜFTE_BLÖCKE.erhöhen(position - start_index, ergebnis='gültig')
+            GEPRÜFTE_BLÖCKE.erhöhen(ergebnis='ungültig')
+            return False
+
+        GEPRÜFTE_BLÖCKE.erhöhen(grenze - start_index, ergebnis='gültig')
+        if grenze < len(erhaltene_chain):
+            GEPRÜFTE_BLÖCKE.erhöhen(ergebnis='ungültig')
+            return False
+
+        logger.info("Erhaltene Chain ist gültig (%d Blöcke parallel geprüft).", grenze - start_index)
         return True
+
+    def finde_gemeinsamen_verifizierten_block(self, neue_chain):
+        "Eine Methode, die per binärer Suche den höchsten verifizierten Block findet, den die neue Chain mit der eigenen teilt."
+
+        schnappschuss = self.schnappschuss()
+        if not neue_chain or not self.checkpoint_ist_aktuell(schnappschuss):
+            return -1
+
+        # Da jeder Block den Hash seines Vorgängers enthält, stimmen vor einem gemeinsamen Block auch alle früheren überein
+        links, rechts = 0, min(self.verifizierte_höhe, len(neue_chain) - 1, schnappschuss.länge - 1)
+        gemeinsamer_index = -1
+        while links <= rechts:
+            mitte = (links + rechts) // 2
+            if neue_chain[mitte].hash == schnappschuss.chain[mitte].hash:
+                gemeinsamer_index = mitte
+                links = mitte + 1
+            else:
+                rechts = mitte - 1
+
+        return gemeinsamer_index
         
+    def erzeuge_block_locator(self):
+        "Eine Methode, die Hashes in exponentiell wachsenden Abständen vom Tip bis zum Genesis-Block zurückgibt."
+
+        schnappschuss = self.schnappschuss()
+        locator = []
+        index = schnappschuss.länge - 1
+        schritt = 1
+
+        # Die letzten 10 Blöcke einzeln, danach mit doppelter Schrittweite
+        while index > 0:
+            locator.append(schnappschuss.chain[index].hash)
+            if len(locator) >= 10:
+                schritt *= 2
+            index -= schritt
+
+        locator.append(schnappschuss.chain[0].hash)
+        return locator
+
+    def finde_locator_block(self, locator):
+        "Eine Methode, die den Index des ersten Blocks aus dem Locator zurückgibt, der in der eigenen Chain vorkommt, oder -1."
+
+        for block_hash in locator:
+            index = self.hash_index.get(block_hash)
+            if index is not None:
+                return index
+        return -1
+
     def ersetze_chain(self, neue_chain):
-        "Eine Methode, die die aktuelle Chain durch eine neue Chain ersetzt, wenn diese gültig und länger ist."
+        "Eine Methode, die die aktuelle Chain durch eine neue Chain ersetzt, wenn diese gültig ist und mehr Arbeit enthält."
+
+        # Gemeinsamen, bereits verifizierten Anfang übernehmen und nur die neuen Blöcke prüfen
+        gemeinsamer_index = self.finde_gemeinsamen_verifizierten_block(neue_chain)
+        if gemeinsamer_index >= 0:
+            logger.info("Gemeinsamer verifizierter Block bei Index %d. Prüfe nur die folgenden Blöcke.", gemeinsamer_index)
+
+        return self.ersetze_chain_ab(gemeinsamer_index, neue_chain[gemeinsamer_index + 1:])
+
+    def ersetze_chain_ab(self, gemeinsamer_index, neue_blöcke):
+        "Eine Methode, die alle Blöcke nach dem gemeinsamen Block durch die neuen Blöcke ersetzt, wenn die Chain dadurch gültig ist und mehr Arbeit enthält."
 
-        if len(neue_chain) <= len(self.chain):
-            print("Die neue Chain ist nicht länger als die aktuelle Chain. Ersetzung abgelehnt.")
+        # Die neuen Blöcke werden ohne Lock gegen einen Schnappschuss geprüft, übernommen wird danach unter dem Lock
+        schnappschuss = self.schnappschuss()
+
+        # Der gemeinsame Block kommt meist von einer Peer-Node; -1 bedeutet eine vollständig neue Chain
+        if (isinstance(gemeinsamer_index, bool) or not isinstance(gemeinsamer_index, int)
+                or not -1 <= gemeinsamer_index < schnappschuss.länge):
+            logger.warning("Ungültiger gemeinsamer Block %r. Ersetzung abgelehnt.", gemeinsamer_index)
             return False
-        
-        if not self.ist_erhaltene_chain_valide(neue_chain):
-            print("Die neue Chain ist ungültig. Ersetzung abgelehnt.")
+
+        # Verglichen wird nur die Arbeit der Blöcke nach dem gemeinsamen Block, der Anfang ist auf beiden Seiten gleich
+        neue_arbeit = sum(arbeit(block.ziel) for block in neue_blöcke)
+        if neue_arbeit <= sum(arbeit(block.ziel) for block in schnappschuss.chain[gemeinsamer_index + 1:schnappschuss.länge]):
+            logger.info("Die neue Chain enthält nicht mehr Arbeit als die aktuelle Chain. Ersetzung abgelehnt.")
             return False
-        
-        self.chain = neue_chain
-        print("Die aktuelle Chain wurde erfolgreich durch die neue Chain ersetzt.")
+
+        if gemeinsamer_index >= 0:
+            # Neue Blöcke dürfen nur an einen bereits verifizierten eigenen Block anschließen
+            if gemeinsamer_index > self.verifizierte_höhe or not self.checkpoint_ist_aktuell(schnappschuss):
+                self.ist_chain_valide()
+            if (gemeinsamer_index >= schnappschuss.länge or gemeinsamer_index > self.verifizierte_höhe
+                    or not self.checkpoint_ist_aktuell(schnappschuss)):
+                logger.warning("Gemeinsamer Block %d ist nicht verifiziert. Ersetzung abgelehnt.", gemeinsamer_index)
+                return False
+            neue_chain = schnappschuss.chain[:gemeinsamer_index + 1] + list(neue_blöcke)
+        else:
+            neue_chain = list(neue_blöcke)
+
+        if not self.ist_erhaltene_chain_valide(neue_chain, ab_index=gemeinsamer_index + 1):
+            logger.warning("Die neue Chain ist ungültig. Ersetzung abgelehnt.")
+            return False
+
+        with self._lock:
+            # Während der Prüfung kann die eigene Chain gewachsen oder ersetzt worden sein
+            # Eine kürzere Chain mit mehr Arbeit kann den gemeinsamen Block inzwischen ganz verdrängt haben
+            if gemeinsamer_index >= 0 and (gemeinsamer_index >= len(self.chain)
+                                           or self.chain[gemeinsamer_index].hash != neue_chain[gemeinsamer_index].hash):
+                logger.info("Die eigene Chain wurde während der Prüfung ersetzt. Ersetzung abgelehnt.")
+                return False
+            entfernte_blöcke = self.chain[gemeinsamer_index + 1:]
+            entfernte_arbeit = sum(arbeit(block.ziel) for block in entfernte_blöcke)
+            if neue_arbeit <= entfernte_arbeit:
+                logger.info("Die eigene Chain ist während der Prüfung gewachsen. Ersetzung abgelehnt.")
+                return False
+
+            hinzugefügte_blöcke = neue_chain[gemeinsamer_index + 1:]
+
+            # Indizes und Block-Speicher (nur die Blöcke nach dem gemeinsamen Anfang) vor der Chain austauschen,
+            # damit ein Fehler dabei die eigene Chain unverändert lässt
+            self._indizes_fortschreiben(entfernte_blöcke, hinzugefügte_blöcke)
+            self._speicher_schreiben(gemeinsamer_index + 1, hinzugefügte_blöcke)
+
+            for block in entfernte_blöcke:
+                self.hash_index.pop(block.hash, None)
+            for index in range(gemeinsamer_index + 1, len(neue_chain)):
+                self.hash_index[neue_chain[index].hash] = index
+
+            # Transaktionen verworfener Blöcke wieder aufnehmen, bereits in den neuen Blöcken enthaltene entfernen
+            self.mempool.wieder_aufnehmen(
+                transaktion for block in entfernte_blöcke if block.index > 0 for transaktion in block.transaktionen
+            )
+            if self.mempool:
+                self.mempool.entfernen(
+                    transaktions_id(transaktion) for block in hinzugefügte_blöcke for transaktion in block.transaktionen
+                )
+
+            # Die Chain wird als neue Liste ausgetauscht, alte Schnappschüsse bleiben dadurch unverändert
+            self.chain = neue_chain
+            self.gesamt_arbeit += neue_arbeit - entfernte_arbeit
+            self.setze_checkpoint(len(self.chain) - 1)
+            self._veröffentlichen()
+
+        logger.info("Die aktuelle Chain wurde erfolgreich durch die neue Chain ersetzt.")
         return True
-    
-    
\ No newline at end of file
+
+    def füge_empfangenen_block_hinzu(self, block):
+        "Eine Methode, die einen einzelnen Block einer Peer-Node direkt anhängt, wenn er auf den aktuellen Tip folgt, und 'angehängt', 'bekannt', 'abzweigung', 'waise' oder 'ungültig' zurückgibt."
+
+        if self.hole_block_nach_hash(block.hash) is not None:
+            return 'bekannt'
+
+        schnappschuss = self.schnappschuss()
+        tip = schnappschuss.chain[schnappschuss.länge - 1]
+        if block.vorheriger_hash != tip.hash:
+            # Ein Block auf einem älteren eigenen Block bringt meist nicht mehr Arbeit als die eigenen Blöcke danach, einer mit unbekanntem Vorgänger evtl. schon
+            return 'abzweigung' if self.hole_block_nach_hash(block.vorheriger_hash) is not None else 'waise'
+
+        # Geprüft wird nur der neue Block gegen den Tip, unabhängig von der Länge der Chain
+        if block.index != tip.index + 1:
+            logger.warning("Falscher Index %d bei Block von einer Peer-Node (erwartet: %d)", block.index, tip.index + 1)
+            GEPRÜFTE_BLÖCKE.erhöhen(ergebnis='ungültig')
+            return 'ungültig'
+        erwartetes_ziel = self.berechne_ziel_für(schnappschuss.chain, schnappschuss.länge)
+        median_zeit = self.median_zeit(schnappschuss.chain, schnappschuss.länge)
+        if not self.prüfe_block(block, tip, erwartetes_ziel, median_zeit, " von einer Peer-Node",
+                                time.time() + self.max_zeit_in_zukunft, bestätigt_bis=schnappschuss.länge):
+            return 'ungültig'
+
+        with self._lock:
+            # Während der Prüfung kann ein anderer Block angehängt oder die Chain ersetzt worden sein
+            if self.chain[-1].hash != block.vorheriger_hash:
+                if block.hash in self.hash_index:
+                    return 'bekannt'
+                return 'abzweigung' if block.vorheriger_hash in self.hash_index else 'waise'
+
+            self.block_anhängen(block)
+            if self.mempool:
+                self.mempool.entfernen(transaktions_id(transaktion) for transaktion in block.transaktionen)
+
+        logger.info("Block %d von einer Peer-Node angehängt: %.16s", block.index, block.hash)
+        return 'angehängt'
@@ -0,0 +1,176 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+from blockchain import Block
+
+logger = logging.getLogger(__name__)
+
+# Jeder Datensatz beginnt mit seiner Länge als 4-Byte Big-Endian Zahl
+LÄNGEN_FORMAT = struct.Struct('>I')
+
+FSYNC_MODI = ('immer', 'intervall', 'nie')
+
+
+class BlockSpeicher:
+    "Ein Append-only-Log, das versiegelte Blöcke als längenpräfixiertes kanonisches JSON auf der Festplatte ablegt."
+
+    def __init__(self, pfad, fsync_modus='immer', fsync_intervall=1.0):
+        if fsync_modus not in FSYNC_MODI:
+            raise ValueError(f"Unbekannter fsync-Modus: {fsync_modus}. Erlaubt: {', '.join(FSYNC_MODI)}")
+
+        self.pfad = pfad
+        self.checkpoint_pfad = pfad + '.checkpoint'
+        self.fsync_modus = fsync_modus
+        self.fsync_intervall = fsync_intervall
+
+        verzeichnis = os.path.dirname(pfad)
+        if verzeichnis:
+            os.makedirs(verzeichnis, exist_ok=True)
+
+        self._datei = open(pfad, 'a+b')
+        self._mmap = None
+        self._letzter_fsync = time.time()
+
+        # Schützt Datei, Einblendung und Offset-Index gegen gleichzeitiges Lesen und Kürzen
+        self._lock = threading.RLock()
+
+        # Wird bei jedem Kürzen erhöht, damit Leser erkennen, dass ein Index nicht mehr denselben Block enthält
+        self.generation = 0
+
+        # Offset-Index: Startposition jedes Datensatzes in der Datei
+        self.offsets = []
+        self._größe = 0
+        self._index_aufbauen()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _index_aufbauen(self):
+        "Eine Methode, die den Offset-Index aus den Längenpräfixen aufbaut und einen unvollständigen letzten Datensatz abschneidet."
+
+        dateigröße = os.path.getsize(self.pfad)
+        position = 0
+
+        with open(self.pfad, 'rb') as datei:
+            while position + LÄNGEN_FORMAT.size <= dateigröße:
+                datei.seek(position)
+                (länge,) = LÄNGEN_FORMAT.unpack(datei.read(LÄNGEN_FORMAT.size))
+                if position + LÄNGEN_FORMAT.size + länge > dateigröße:
+                    break
+                self.offsets.append(position)
+                position += LÄNGEN_FORMAT.size + länge
+
+        # Reste eines abgebrochenen Schreibvorgangs entfernen
+        if position < dateigröße:
+            logger.warning("Unvollständiger Datensatz am Ende von %s wird abgeschnitten (%d Bytes).", self.pfad, dateigröße - position)
+            self._datei.truncate(position)
+            self._fsync()
+
+        self._größe = position
+
+    def _hole_mmap(self):
+        "Eine Methode, die die Log-Datei (neu) in den Speicher einblendet, falls sie seit dem letzten Mal gewachsen ist."
+
+        if self._größe == 0:
+            return None
+
+        if self._mmap is None or len(self._mmap) < self._größe:
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = mmap.mmap(self._datei.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return self._mmap
+
+    def _fsync(self):
+        self._datei.flush()
+        os.fsync(self._datei.fileno())
+        self._letzter_fsync = time.time()
+
+    def _fsync_nach_richtlinie(self):
+        "Eine Methode, die je nach fsync-Modus die Daten auf die Festplatte zwingt."
+
+        self._datei.flush()
+
+        if self.fsync_modus == 'immer':
+            self._fsync()
+        elif self.fsync_modus == 'intervall' and time.time() - self._letzter_fsync >= self.fsync_intervall:
+            self._fsync()
+
+    def anhängen(self, block):
+        "Eine Methode, die einen versiegelten Block an das Log anhängt."
+
+        daten = block.als_json_bytes()
+        with self._lock:
+            self._datei.write(LÄNGEN_FORMAT.pack(len(daten)) + daten)
+            self.offsets.append(self._größe)
+            self._größe += LÄNGEN_FORMAT.size + len(daten)
+            self._fsync_nach_richtlinie()
+
+    def kürzen(self, länge):
+        "Eine Methode, die das Log auf die ersten länge Blöcke kürzt (z.B. vor dem Ersetzen der Chain ab einem Fork)."
+
+        with self._lock:
+            if länge >= len(self.offsets):
+                return
+
+            # Vor dem Abschneiden muss die Einblendung entfernt werden, sonst droht ein Zugriff hinter das Dateiende
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+
+            self._größe = self.offsets[länge]
+            del self.offsets[länge:]
+            self._datei.truncate(self._größe)
+            self._fsync()
+            self.generation += 1
+
+    def lese_bytes(self, index, generation=None):
+        "Eine Methode, die die kanonischen JSON-Bytes des Blocks mit dem angegebenen Index zurückgibt (None, falls seit generation gekürzt wurde)."
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return None
+
+            speicher = self._hole_mmap()
+            start = self.offsets[index]
+            (länge,) = LÄNGEN_FORMAT.unpack_from(speicher, start)
+            start += LÄNGEN_FORMAT.size
+            return speicher[start:start + länge]
+
+    def lese_block(self, index):
+        "Eine Methode, die den Block mit dem angegebenen Index aus dem Log lädt."
+
+        return Block.aus_json_bytes(self.lese_bytes(index))
+
+    def speichere_checkpoint(self, höhe, block_hash):
+        "Eine Methode, die die höchste verifizierte Blockhöhe atomar neben dem Log speichert."
+
+        temporärer_pfad = self.checkpoint_pfad + '.tmp'
+        with open(temporärer_pfad, 'w') as datei:
+            json.dump({'höhe': höhe, 'hash': block_hash}, datei)
+        os.replace(temporärer_pfad, self.checkpoint_pfad)
+
+    def lade_checkpoint(self):
+        "Eine Methode, die den gespeicherten Checkpoint als (höhe, hash) zurückgibt oder None, falls keiner vorhanden ist."
+
+        try:
+            with open(self.checkpoint_pfad) as datei:
+                daten = json.load(datei)
+            return daten['höhe'], daten['hash']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def schließen(self):
+        "Eine Methode, die die Log-Datei sauber schließt."
+
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            self._fsync()
+            self._datei.close()
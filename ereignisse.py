@@ -0,0 +1,224 @@
+import json
+import logging
+import queue
+import threading
+import uuid
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Ab so vielen neuen Blöcken auf einmal (z.B. nach einer Synchronisation) wird statt einzelner Blöcke nur die Änderung gemeldet
+MAX_EINZELNE_BLÖCKE = 10
+
+NEU_LADEN = b'event: neu_laden\ndata: {}\n\n'
+
+
+def sse_nachricht(typ, daten, ereignis_id=None):
+    "Eine Funktion, die ein Ereignis im Server-Sent-Events-Format serialisiert; daten sind ein JSON-fähiges Objekt oder bereits fertige JSON-Bytes."
+
+    if not isinstance(daten, bytes):
+        daten = json.dumps(daten).encode()
+    # JSON ohne Einrückung enthält keine Zeilenumbrüche und passt daher in eine einzige data-Zeile
+    kopf = f"id: {ereignis_id}\n" if ereignis_id is not None else ""
+    return f"{kopf}event: {typ}\ndata: ".encode() + daten + b'\n\n'
+
+
+class Abonnement:
+    "Ein Abonnent des Ereignis-Streams mit einer begrenzten Warteschlange, damit langsame Clients den Server nicht aufhalten."
+
+    def __init__(self, verteiler, warteschlangen_größe):
+        self.verteiler = verteiler
+        self.überlastet = False
+        self._warteschlange = queue.Queue(warteschlangen_größe)
+
+    def zustellen(self, nachricht):
+        "Eine Methode, die eine Nachricht ohne zu blockieren einreiht und False zurückgibt, wenn der Abonnent nicht hinterherkommt."
+
+        try:
+            self._warteschlange.put_nowait(nachricht)
+            return True
+        except queue.Full:
+            self.überlastet = True
+            return False
+
+    def nachrichten(self, keepalive=15):
+        "Ein Generator, der die Nachrichten des Abonnenten liefert und bei Stille Kommentare sendet, damit Proxys die Verbindung offen halten."
+
+        try:
+            # Der Browser verbindet sich nach 3 Sekunden neu und schickt dabei die letzte erhaltene ID mit
+            yield b'retry: 3000\n\n'
+            while not self.überlastet:
+                try:
+                    yield self._warteschlange.get(timeout=keepalive)
+                except queue.Empty:
+                    yield b': keepalive\n\n'
+
+            # Verpasste Ereignisse kann der Client nicht mehr erhalten, er muss seinen Stand neu laden
+            yield NEU_LADEN
+        finally:
+            self.verteiler.abmelden(self)
+
+
+class EreignisVerteiler:
+    "Eine Klasse, die jedes Ereignis einmalig serialisiert und an alle Abonnenten verteilt; die letzten Ereignisse werden für Wiederverbindungen aufbewahrt."
+
+    def __init__(self, max_abonnenten=100, puffer_größe=256, warteschlangen_größe=500):
+        self.max_abonnenten = max_abonnenten
+        self.warteschlangen_größe = warteschlangen_größe
+
+        # Die IDs gelten nur für diesen Prozess, nach einem Neustart der Node muss der Client neu laden
+        self._kennung = uuid.uuid4().hex[:8]
+        self._letzte_nummer = 0
+        self._puffer = deque(maxlen=puffer_größe)
+        self._abonnenten = set()
+        self._lock = threading.Lock()
+
+    def anzahl_abonnenten(self):
+        "Eine Methode, die die Anzahl der verbundenen Abonnenten zurückgibt."
+
+        return len(self._abonnenten)
+
+    def veröffentlichen(self, typ, daten):
+        "Eine Methode, die ein Ereignis an alle Abonnenten verteilt, ohne auf langsame Abonnenten zu warten."
+
+        with self._lock:
+            self._letzte_nummer += 1
+            nachricht = sse_nachricht(typ, daten, f"{self._kennung}-{self._letzte_nummer}")
+            self._puffer.append((self._letzte_nummer, nachricht))
+
+            for abonnement in list(self._abonnenten):
+                if not abonnement.zustellen(nachricht):
+                    logger.info("Ereignis-Abonnent kommt nicht hinterher und wird getrennt.")
+                    self._abonnenten.discard(abonnement)
+
+    def abonnieren(self, letzte_id=None):
+        "Eine Methode, die einen neuen Abonnenten anmeldet und ihm die seit letzte_id verpassten Ereignisse zustellt; None, wenn zu viele verbunden sind."
+
+        with self._lock:
+            if len(self._abonnenten) >= self.max_abonnenten:
+                return None
+
+            abonnement = Abonnement(self, self.warteschlangen_größe)
+            if letzte_id:
+                verpasste = self._verpasste_ereignisse(letzte_id)
+                if verpasste is None or len(verpasste) >= self.warteschlangen_größe:
+                    abonnement.zustellen(NEU_LADEN)
+                else:
+                    for nachricht in verpasste:
+                        abonnement.zustellen(nachricht)
+
+            self._abonnenten.add(abonnement)
+            return abonnement
+
+    def _verpasste_ereignisse(self, letzte_id):
+        "Eine Methode, die die Nachrichten nach letzte_id aus dem Puffer zurückgibt oder None, wenn sie dort nicht mehr (oder nie) vorhanden waren."
+
+        kennung, _, nummer = letzte_id.partition('-')
+        if kennung != self._kennung or not nummer.isdigit():
+            return None
+
+        nummer = int(nummer)
+        älteste_nummer = self._puffer[0][0] if self._puffer else self._letzte_nummer + 1
+        if nummer > self._letzte_nummer or nummer < älteste_nummer - 1:
+            return None
+
+        return [nachricht for ereignis_nummer, nachricht in self._puffer if ereignis_nummer > nummer]
+
+    def abmelden(self, abonnement):
+        "Eine Methode, die einen Abonnenten entfernt (z.B. wenn der Browser die Verbindung geschlossen hat)."
+
+        with self._lock:
+            self._abonnenten.discard(abonnement)
+
+
+class BlockEreignisse:
+    "Ein Index, der neue Blöcke und Änderungen der Chain als Ereignisse meldet, sobald sie veröffentlicht sind."
+
+    def __init__(self, verteiler, bei_änderung=None):
+        self.verteiler = verteiler
+        self.bei_änderung = bei_änderung
+        self._hinzugefügt = []
+        self._kleinster_entfernter_index = None
+
+    def neu_aufbauen(self, chain):
+        "Eine Methode, die nichts melden muss, da eine vollständig neu aufgebaute Chain keine einzelnen Änderungen enthält."
+
+        self._hinzugefügt = []
+        self._kleinster_entfernter_index = None
+
+    def block_hinzufügen(self, block):
+        "Eine Methode, die einen neuen Block bis zur Veröffentlichung vormerkt."
+
+        self._hinzugefügt.append(block)
+
+    def block_entfernen(self, block):
+        "Eine Methode, die sich den kleinsten entfernten Block-Index bis zur Veröffentlichung merkt."
+
+        self._kleinster_entfernter_index = block.index
+
+    def veröffentlichen(self):
+        "Eine Methode, die die vorgemerkten Änderungen als block- bzw. chain-Ereignis verteilt."
+
+        hinzugefügt, self._hinzugefügt = self._hinzugefügt, []
+        kleinster_entfernter_index, self._kleinster_entfernter_index = self._kleinster_entfernter_index, None
+        if not hinzugefügt and kleinster_entfernter_index is None:
+            return
+
+        if kleinster_entfernter_index is None and len(hinzugefügt) <= MAX_EINZELNE_BLÖCKE:
+            # Die JSON-Bytes des Blocks sind bereits zwischengespeichert und werden unverändert weitergegeben
+            for block in hinzugefügt:
+                self.verteiler.veröffentlichen('block', block.als_json_bytes())
+        else:
+            erster_index = hinzugefügt[0].index if hinzugefügt else kleinster_entfernter_index
+            if kleinster_entfernter_index is not None:
+                erster_index = min(erster_index, kleinster_entfernter_index)
+            länge = hinzugefügt[-1].index + 1 if hinzugefügt else kleinster_entfernter_index
+            self.verteiler.veröffentlichen('chain', {'gemeinsamer_index': erster_index - 1, 'länge': länge})
+
+        if self.bei_änderung is not None:
+            self.bei_änderung()
+
+
+class ÄnderungsMelder:
+    "Ein Hintergrund-Thread, der einen Zustand abfragt und nur die geänderten Felder als Ereignis verteilt, solange es Abonnenten gibt."
+
+    def __init__(self, verteiler, typ, abfrage, intervall=None, verzögerung=0.1):
+        self.verteiler = verteiler
+        self.typ = typ
+        self.abfrage = abfrage
+        self.intervall = intervall
+        self.verzögerung = verzögerung
+
+        self._letzter_stand = {}
+        self._anstoß = threading.Event()
+        self._thread = threading.Thread(target=self._arbeiten, daemon=True)
+        self._thread.start()
+
+    def anstoßen(self):
+        "Eine Methode, die eine Abfrage auslöst, ohne zu warten; mehrere Anstöße kurz hintereinander werden zusammengefasst."
+
+        self._anstoß.set()
+
+    def _arbeiten(self):
+        "Eine Methode, die im Hintergrund-Thread nach jedem Anstoß bzw. Intervall die Änderungen verteilt."
+
+        while True:
+            # Ohne Intervall wird nur nach einem Anstoß abgefragt
+            if self._anstoß.wait(self.intervall):
+                self._anstoß.clear()
+                self._anstoß.wait(self.verzögerung)
+                self._anstoß.clear()
+
+            if not self.verteiler.anzahl_abonnenten():
+                continue
+
+            try:
+                stand = self.abfrage()
+            except Exception as e:
+                logger.warning("Abfrage für %s-Ereignisse fehlgeschlagen: %s", self.typ, e)
+                continue
+
+            änderungen = {schlüssel: wert for schlüssel, wert in stand.items() if self._letzter_stand.get(schlüssel) != wert}
+            self._letzter_stand = stand
+            if änderungen:
+                self.verteiler.veröffentlichen(self.typ, änderungen)
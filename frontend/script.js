@@ -5,7 +5,11 @@ const nodes = [
 
 let aktuellenodeindex = 0;
 let organisationen = [];
-let updateZeitIntervall;
+
+// Eine Verbindung zu /events pro Node; die Ereignisse der aktuellen Node aktualisieren das Dashboard
+let ereignisQuellen = [];
+let aktuelleStatistik = {};
+let letzteBlöcke = [];
 
 
 function aktuellenNodeholen() {
@@ -74,31 +78,31 @@ function datumFormatieren(datumString) {
 }
 
 
-async function updateNodeStatus() {
-    for (let i = 0; i < nodes.length; i++) {
-        const statusElement = document.querySelector(`#node${i + 1}-status`);
-        if (!statusElement) continue;
+function setzeNodeStatus(i, online, text) {
+    const statusElement = document.querySelector(`#node${i + 1}-status`);
+    if (!statusElement) return;
 
-        const indikator = statusElement.querySelector('.node-indicator');
-        const blocksElement = statusElement.querySelector('.node-blocks');
+    const indikator = statusElement.querySelector('.node-indicator');
+    indikator.classList.toggle('online', online);
+    indikator.classList.toggle('offline', !online);
+    if (text !== undefined) {
+        statusElement.querySelector('.node-blocks').textContent = text;
+    }
+}
 
+async function updateNodeStatus() {
+    for (let i = 0; i < nodes.length; i++) {
         try {
             const response = await fetch(`${nodes[i]}/health`, { timeout: 5000 });
             const data = await response.json();
 
             if (data && typeof data === 'object') {
-                indikator.classList.remove('offline');
-                indikator.classList.add('online');
-                blocksElement.textContent = `${data.blöcke || data.blocks || 0} Blöcke`;
+                setzeNodeStatus(i, true, `${data.blöcke || data.blocks || 0} Blöcke`);
             } else {
-                indikator.classList.remove('online');
-                indikator.classList.add('offline');
-                blocksElement.textContent = 'Keine Daten';
+                setzeNodeStatus(i, false, 'Keine Daten');
             }
         } catch (error) {
-            indikator.classList.remove('online');
-            indikator.classList.add('offline');
-            blocksElement.textContent = 'Offline';
+            setzeNodeStatus(i, false, 'Offline');
         }
 
     }
@@ -157,7 +161,7 @@ async function transaktionAbsenden(event) {
     spendenKnopf.innerHTML = '<span>⏳ Wird gesendet...</span>';
 
     try {
-        await apiRequest('/transactions/new', {
+        const antwort = await apiRequest('/transactions/new', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -170,16 +174,11 @@ async function transaktionAbsenden(event) {
         });
 
         showToast(`Spende von ${betrag}€ an ${empfänger} erfolgreich!`, 'success');
+        zeigeSpendenNachweis(antwort.txid);
 
-        // Formular zurücksetzen
+        // Formular zurücksetzen, der Zähler offener Transaktionen wird über /events aktualisiert
         document.getElementById('amount').value = '';
         document.getElementById('organization').value = '';
-
-        // Daten aktualisieren
-        setTimeout(() => {
-            ladeStatistiken();
-            ladeNeueTransaktionen();
-        }, 1000);
     } catch (error) {
         console.error('Fehler beim Spenden:', error);
         showToast('Spende fehlgeschlagen. Versuche es erneut.', 'error');
@@ -189,6 +188,85 @@ async function transaktionAbsenden(event) {
     }
 }
 
+function hexZuBytes(hex) {
+    const bytes = new Uint8Array(hex.length / 2);
+    for (let i = 0; i < bytes.length; i++) {
+        bytes[i] = parseInt(hex.substr(i * 2, 2), 16);
+    }
+    return bytes;
+}
+
+function bytesZuHex(bytes) {
+    return Array.from(bytes, byte => byte.toString(16).padStart(2, '0')).join('');
+}
+
+async function sha256(bytes) {
+    return new Uint8Array(await crypto.subtle.digest('SHA-256', bytes));
+}
+
+// Prüft einen Inklusionsbeweis von /transactions/<txid>/proof für die eigene txid, ohne den Block oder die Chain zu laden
+async function prüfeInklusionsbeweis(txid, beweis) {
+    // 1. Der Block-Kopf muss genau den angegebenen Block-Hash ergeben
+    const kopfHash = bytesZuHex(await sha256(new TextEncoder().encode(beweis.kopf)));
+    if (kopfHash !== beweis.block_hash) {
+        return false;
+    }
+
+    // 2. Die Merkle-Wurzel wird aus dem geprüften Kopf genommen, nicht aus dem Rest der Antwort
+    const merkleWurzel = JSON.parse(beweis.kopf).merkle_wurzel;
+
+    // 3. Von der eigenen Transaktions-ID (nicht der aus der Antwort) entlang des Pfads bis zur Wurzel hashen
+    //    (innere Knoten mit Präfix 0x01), sonst könnte die Node den Beweis einer anderen Transaktion liefern
+    let aktuellerHash = hexZuBytes(txid);
+    for (const schritt of beweis.pfad) {
+        const geschwister = hexZuBytes(schritt.hash);
+        const [links, rechts] = schritt.seite === 'links' ? [geschwister, aktuellerHash] : [aktuellerHash, geschwister];
+
+        const daten = new Uint8Array(1 + links.length + rechts.length);
+        daten[0] = 0x01;
+        daten.set(links, 1);
+        daten.set(rechts, 1 + links.length);
+        aktuellerHash = await sha256(daten);
+    }
+
+    return bytesZuHex(aktuellerHash) === merkleWurzel;
+}
+
+async function spendeVerifizieren(txid) {
+    let beweis;
+    try {
+        beweis = await apiRequest(`/transactions/${txid}/proof`);
+    } catch (error) {
+        showToast('Die Spende ist noch in keinem Block enthalten.', 'error');
+        return;
+    }
+
+    if (await prüfeInklusionsbeweis(txid, beweis)) {
+        showToast(`Spende ist in Block #${beweis.block_index} enthalten (${beweis.bestätigungen} Bestätigungen).`, 'success');
+    } else {
+        showToast('Der Inklusionsbeweis ist ungültig!', 'error');
+    }
+}
+
+function zeigeSpendenNachweis(txid) {
+    const nachricht = document.getElementById('donation-message');
+    if (!nachricht || !txid) return;
+
+    nachricht.className = 'message success';
+    nachricht.innerHTML = '';
+
+    const text = document.createElement('span');
+    text.textContent = `Transaktions-ID: ${txid.substring(0, 16)}... `;
+
+    const knopf = document.createElement('button');
+    knopf.type = 'button';
+    knopf.className = 'btn btn-secondary btn-small';
+    knopf.textContent = '🔍 Aufnahme prüfen';
+    knopf.addEventListener('click', () => spendeVerifizieren(txid));
+
+    nachricht.append(text, knopf);
+}
+
 async function ladeStatistiken() {
     try {
         const data = await apiRequest('/stats');
@@ -198,42 +276,48 @@ async function ladeStatistiken() {
             return;
         }
 
-        document.querySelector('#total-donations-quick').textContent = `${data.gesamt_transaktionen || 0} €`;
-        document.querySelector('#total-blocks-quick').textContent = data.anzahl_blöcke || 0;
-        document.querySelector('#pending-transactions-quick').textContent = data.anzahl_offene_transaktionen || 0;
-
-        const validBadge = document.querySelector('#chain-valid-quick');
-        if (data.chain_valide) {
-            validBadge.innerHTML = '<span class="status-badge valid">✓ Gültig</span>';
-        } else {
-            validBadge.innerHTML = '<span class="status-badge invalid">✗ Ungültig</span>';
-        }
-
-        const organisationListe = document.querySelector('#org-list');
-        organisationListe.innerHTML = '';
-
-        if (data.transaktionen_pro_organisation && typeof data.transaktionen_pro_organisation === 'object') {
-            const sortierteOrganisationen = Object.entries(data.transaktionen_pro_organisation)
-                .sort((a, b) => b[1] - a[1]);
-
-            sortierteOrganisationen.forEach(([organisation, anzahl]) => {
-                const item = document.createElement('div');
-                item.className = 'org-item';
-                item.innerHTML = `
-                    <span class="org-name">${organisation}</span>
-                    <span class="org-amount">${anzahl} €</span>
-                `;
-                organisationListe.appendChild(item);
-            });
-        }
+        aktuelleStatistik = data;
+        zeigeStatistiken(data);
     } catch (error) {
         console.error('Fehler beim Laden der Statistiken:', error);
     }
 }
 
+function zeigeStatistiken(data) {
+    document.querySelector('#total-donations-quick').textContent = `${data.gesamt_transaktionen || 0} €`;
+    document.querySelector('#total-blocks-quick').textContent = data.anzahl_blöcke || 0;
+    document.querySelector('#pending-transactions-quick').textContent = data.anzahl_offene_transaktionen || 0;
+
+    const validBadge = document.querySelector('#chain-valid-quick');
+    if (data.chain_valide) {
+        validBadge.innerHTML = '<span class="status-badge valid">✓ Gültig</span>';
+    } else {
+        validBadge.innerHTML = '<span class="status-badge invalid">✗ Ungültig</span>';
+    }
+
+    const organisationListe = document.querySelector('#org-list');
+    organisationListe.innerHTML = '';
+
+    if (data.transaktionen_pro_organisation && typeof data.transaktionen_pro_organisation === 'object') {
+        const sortierteOrganisationen = Object.entries(data.transaktionen_pro_organisation)
+            .sort((a, b) => b[1] - a[1]);
+
+        sortierteOrganisationen.forEach(([organisation, anzahl]) => {
+            const item = document.createElement('div');
+            item.className = 'org-item';
+            item.innerHTML = `
+                <span class="org-name">${organisation}</span>
+                <span class="org-amount">${anzahl} €</span>
+            `;
+            organisationListe.appendChild(item);
+        });
+    }
+}
+
 async function ladeNeueTransaktionen() {
     try {
-        const data = await apiRequest('/chain');
+        // Für die letzten 10 Transaktionen reichen die letzten 10 Blöcke
+        const data = await apiRequest('/chain?from=-10');
 
         if (!data || typeof data !== 'object') {
             console.warn('Keine gültigen Chain-Daten von der API erhalten');
@@ -242,56 +326,58 @@ async function ladeNeueTransaktionen() {
             return;
         }
 
-        const chain = data.chain || [];
+        letzteBlöcke = Array.isArray(data.chain) ? data.chain : [];
+        zeigeNeueTransaktionen();
+    } catch (error) {
+        console.error('Fehler beim Laden der Transaktionen:', error);
         const container = document.querySelector('#recent-transactions');
+        container.innerHTML = '<p class="loading">Fehler beim Laden</p>';
+    }
 
-        let alleTransaktionen = [];
-        if (Array.isArray(chain)) {
-            for (let i = 0; i < chain.length; i++) {
-                const block = chain[i];
-                const transactions = block.transaktionen || block.daten || [];
-                if (Array.isArray(transactions)) {
-                    transactions.forEach(transaktion => {
-                        alleTransaktionen.push({
-                            ...transaktion,
-                            blockIndex: block.index,
-                            zeitstempel: block.zeitstempel
-                        });
-                    });
-                }
-            }
-        }
-
-        // Hier können Sie die gesammelten Transaktionen anzeigen
-        alleTransaktionen.reverse();
+}
 
-        const letzteTransaktionen = alleTransaktionen.slice(0, 10);
-        if(letzteTransaktionen.length === 0) {
-            container.innerHTML = '<p class="loading">Noch keine Transaktionen</p>';
-            return;
+function zeigeNeueTransaktionen() {
+    const container = document.querySelector('#recent-transactions');
+
+    let alleTransaktionen = [];
+    for (let i = 0; i < letzteBlöcke.length; i++) {
+        const block = letzteBlöcke[i];
+        const transactions = block.transaktionen || block.daten || [];
+        if (Array.isArray(transactions)) {
+            transactions.forEach(transaktion => {
+                alleTransaktionen.push({
+                    ...transaktion,
+                    blockIndex: block.index,
+                    zeitstempel: block.zeitstempel
+                });
+            });
         }
+    }
 
-        container.innerHTML = '<div class="transaction-list"></div>';
-        const list = container.querySelector('.transaction-list');
+    // Neueste Transaktionen zuerst
+    alleTransaktionen.reverse();
 
-        letzteTransaktionen.forEach(transaktion => {
-            const item = document.createElement('div');
-             item.className = 'transaction-item';
-             item.innerHTML = `
-                <div class="transaction-info">
-                    <span class="transaction-sender">${transaktion.sender}</span>
-                    <span class="transaction-recipient">→ ${transaktion.empfänger}</span>
-                </div>
-                <span class="transaction-amount">${transaktion.betrag} €</span>
-            `;
-            list.appendChild(item);
-        })
-    } catch (error) {
-        console.error('Fehler beim Laden der Transaktionen:', error);
-        const container = document.querySelector('#recent-transactions');
-        container.innerHTML = '<p class="loading">Fehler beim Laden</p>';
+    const letzteTransaktionen = alleTransaktionen.slice(0, 10);
+    if(letzteTransaktionen.length === 0) {
+        container.innerHTML = '<p class="loading">Noch keine Transaktionen</p>';
+        return;
     }
 
+    container.innerHTML = '<div class="transaction-list"></div>';
+    const list = container.querySelector('.transaction-list');
+
+    letzteTransaktionen.forEach(transaktion => {
+        const item = document.createElement('div');
+         item.className = 'transaction-item';
+         item.innerHTML = `
+            <div class="transaction-info">
+                <span class="transaction-sender">${transaktion.sender}</span>
+                <span class="transaction-recipient">→ ${transaktion.empfänger}</span>
+            </div>
+            <span class="transaction-amount">${transaktion.betrag} €</span>
+        `;
+        list.appendChild(item);
+    })
 }
 
 
@@ -321,29 +407,7 @@ async function ladeBlockchain() {
         const reversedChain = [...chain].reverse();
 
         reversedChain.forEach(block => {
-            const item = document.createElement('div');
-            item.className = 'block-item';
-
-            const transactions = block.transaktionen || block.daten || [];
-            const txCount = Array.isArray(transactions) ? transactions.length : 0;
-            const time = datumFormatieren(block.zeitstempel);
-
-            item.innerHTML = `
-                <div class="block-header">
-                    <span class="block-index">Block #${block.index}</span>
-                    <span class="block-time">${time}</span>
-                </div>
-                <div class="block-hash">
-                    <strong>Hash:</strong> ${block.hash}
-                </div>
-                <div class="block-hash">
-                    <strong>Previous:</strong> ${block.vorheriger_hash}
-                </div>
-                <div class="block-transactions">
-                    <strong>Transaktionen:</strong> ${txCount} | <strong>Nonce:</strong> ${block.nonce}
-                </div>
-            `;
-            list.appendChild(item);
+            list.appendChild(blockElementErstellen(block));
         });
 
     } catch (error) {
@@ -353,6 +417,108 @@ async function ladeBlockchain() {
     }
 }
 
+function blockElementErstellen(block) {
+    const item = document.createElement('div');
+    item.className = 'block-item';
+
+    const transactions = block.transaktionen || block.daten || [];
+    const txCount = Array.isArray(transactions) ? transactions.length : 0;
+    const time = datumFormatieren(block.zeitstempel);
+
+    item.innerHTML = `
+        <div class="block-header">
+            <span class="block-index">Block #${block.index}</span>
+            <span class="block-time">${time}</span>
+        </div>
+        <div class="block-hash">
+            <strong>Hash:</strong> ${block.hash}
+        </div>
+        <div class="block-hash">
+            <strong>Previous:</strong> ${block.vorheriger_hash}
+        </div>
+        <div class="block-transactions">
+            <strong>Transaktionen:</strong> ${txCount} | <strong>Nonce:</strong> ${block.nonce}
+        </div>
+    `;
+    return item;
+}
+
+// ==================== SERVER-SENT EVENTS ====================
+
+async function alleDatenLaden() {
+    await ladeStatistiken();
+    await ladeNeueTransaktionen();
+    await ladeBlockchain();
+}
+
+// Ein neuer Block der aktuellen Node wird ohne erneutes Laden der Chain in die Ansichten eingefügt
+function blockEmpfangen(block) {
+    letzteBlöcke = [...letzteBlöcke.filter(vorhanden => vorhanden.index < block.index), block].slice(-10);
+    zeigeNeueTransaktionen();
+
+    const list = document.querySelector('#blockchain-view .block-list');
+    if (list) {
+        list.prepend(blockElementErstellen(block));
+    } else {
+        ladeBlockchain();
+    }
+}
+
+function verbindeMitEreignissen() {
+    ereignisQuellen.forEach(quelle => quelle.close());
+
+    ereignisQuellen = nodes.map((node, i) => {
+        const quelle = new EventSource(`${node}/events`);
+        const istAktuell = () => i === aktuellenodeindex;
+
+        quelle.addEventListener('open', () => setzeNodeStatus(i, true));
+
+        // Der Browser verbindet sich selbst neu; das Dashboard wechselt solange zu einer erreichbaren Node
+        quelle.addEventListener('error', () => {
+            setzeNodeStatus(i, false, 'Offline');
+            const erreichbar = ereignisQuellen.findIndex(andere => andere.readyState === EventSource.OPEN);
+            if (istAktuell() && erreichbar >= 0) {
+                aktuellenodeindex = erreichbar;
+                alleDatenLaden();
+            }
+        });
+
+        quelle.addEventListener('block', event => {
+            const block = JSON.parse(event.data);
+            setzeNodeStatus(i, true, `${block.index + 1} Blöcke`);
+            if (istAktuell()) blockEmpfangen(block);
+        });
+
+        // Die Chain wurde ab einem gemeinsamen Block ersetzt (z.B. nach dem Konsens)
+        quelle.addEventListener('chain', event => {
+            const änderung = JSON.parse(event.data);
+            setzeNodeStatus(i, true, `${änderung.länge} Blöcke`);
+            if (istAktuell()) alleDatenLaden();
+        });
+
+        // stats und mempool enthalten nur die geänderten Felder von /stats
+        ['stats', 'mempool'].forEach(typ => {
+            quelle.addEventListener(typ, event => {
+                const änderungen = JSON.parse(event.data);
+                if (änderungen.anzahl_blöcke !== undefined) {
+                    setzeNodeStatus(i, true, `${änderungen.anzahl_blöcke} Blöcke`);
+                }
+                if (istAktuell()) {
+                    Object.assign(aktuelleStatistik, änderungen);
+                    zeigeStatistiken(aktuelleStatistik);
+                }
+            });
+        });
+
+        // Ereignisse wurden verpasst (Neustart der Node oder zu langsame Verbindung)
+        quelle.addEventListener('neu_laden', () => {
+            if (istAktuell()) alleDatenLaden();
+        });
+
+        return quelle;
+    });
+}
+
 async function syncNodes() {
     const btn = document.getElementById('sync-nodes');
     const msg = document.getElementById('admin-message');
@@ -396,25 +562,30 @@ async function manualMine() {
     btn.textContent = '⏳ Mining...';
     
     try {
-        await apiRequest('/mine', {
+        const antwort = await apiRequest('/mine', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             }
         });
+
+        // Das Schürfen läuft im Hintergrund: Status abfragen, bis der Auftrag beendet ist
+        let auftrag = antwort.auftrag;
+        while (auftrag.status === 'wartend' || auftrag.status === 'läuft') {
+            btn.textContent = `⏳ Mining... (${Math.round(auftrag.hashrate)} H/s)`;
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            auftrag = await apiRequest(antwort.status_url);
+        }
+
+        if (auftrag.status !== 'fertig') {
+            throw new Error(auftrag.nachricht || 'Schürf-Auftrag abgebrochen');
+        }
         
+        // Der neue Block kommt über /events ins Dashboard
         msg.className = 'message success';
         msg.textContent = '✅ Block erfolgreich gemined!';
         showToast('Block gemined!', 'success');
         
-        // Daten aktualisieren
-        setTimeout(() => {
-            ladeStatistiken();
-            ladeBlockchain();
-            ladeNeueTransaktionen();
-            updateNodeStatus();
-        }, 2000);
-        
     } catch (error) {
         msg.className = 'message error';
         msg.textContent = '❌ Mining fehlgeschlagen. Keine Transaktionen vorhanden?';
@@ -439,17 +610,11 @@ async function runConsensus() {
             fetch(`${nodes[1]}/consensus`, { method: 'POST' })
         ]);
         
+        // Eine ersetzte Chain wird über /events gemeldet
         msg.className = 'message success';
         msg.textContent = '✅ Konsens erfolgreich durchgeführt!';
         showToast('Konsens durchgeführt', 'success');
         
-        // Daten aktualisieren
-        setTimeout(() => {
-            ladeStatistiken();
-            ladeBlockchain();
-            updateNodeStatus();
-        }, 1000);
-        
     } catch (error) {
         msg.className = 'message error';
         msg.textContent = '❌ Konsens fehlgeschlagen';
@@ -481,12 +646,8 @@ async function initializeApp() {
     await ladeNeueTransaktionen();
     await ladeBlockchain();
     
-    // Auto-Update alle 10 Sekunden
-    updateZeitIntervall = setInterval(async () => {
-        await updateNodeStatus();
-        await ladeStatistiken();
-        await ladeNeueTransaktionen();
-    }, 10000);
+    // Statt regelmäßig abzufragen, melden die Nodes Änderungen selbst
+    verbindeMitEreignissen();
     
     console.log('✅ App erfolgreich initialisiert!');
 }
@@ -496,7 +657,5 @@ document.addEventListener('DOMContentLoaded', initializeApp);
 
 // Cleanup beim Verlassen der Seite
 window.addEventListener('beforeunload', () => {
-    if (updateZeitIntervall) {
-        clearInterval(updateZeitIntervall);
-    }
-});
\ No newline at end of file
+    ereignisQuellen.forEach(quelle => quelle.close());
+});
@@ -0,0 +1,80 @@
+from collections import namedtuple
+
+# Summen und Anzahl der gesendeten und erhaltenen Transaktionen eines Namens (Sender oder Empfänger)
+Konto = namedtuple('Konto', ['gespendet', 'erhalten', 'anzahl_gespendet', 'anzahl_erhalten'])
+
+LEERES_KONTO = Konto(0.0, 0.0, 0, 0)
+
+
+class KontenIndex:
+    "Ein Index, der für jeden Sender und Empfänger die gesendeten und erhaltenen Beträge bei jedem neuen oder entfernten Block fortschreibt."
+
+    def __init__(self):
+        self.neu_aufbauen([])
+
+    def neu_aufbauen(self, chain):
+        "Eine Methode, die den Index aus einer vollständigen Chain aufbaut."
+
+        # Veröffentlichter Stand und die seit der letzten Veröffentlichung geänderten Konten
+        self._konten = {}
+        self._geändert = {}
+
+        for block in chain:
+            self.block_hinzufügen(block)
+
+        self.veröffentlichen()
+
+    def veröffentlichen(self):
+        "Eine Methode, die die geänderten Konten übernimmt; jedes Konto wird dabei als Ganzes ausgetauscht und daher atomar gelesen."
+
+        geändert, self._geändert = self._geändert, {}
+        for name, konto in geändert.items():
+            if konto.anzahl_gespendet or konto.anzahl_erhalten:
+                self._konten[name] = konto
+            else:
+                self._konten.pop(name, None)
+
+    def block_hinzufügen(self, block):
+        "Eine Methode, die die Transaktionen eines neuen Blocks am Ende der Chain auf den Konten bucht."
+
+        # Genesis-Block überspringen
+        if block.index == 0:
+            return
+
+        for transaktion in block.transaktionen:
+            betrag = float(transaktion['betrag'])
+            self._buchen(transaktion['sender'], betrag, 0.0, 1, 0)
+            self._buchen(transaktion['empfänger'], 0.0, betrag, 0, 1)
+
+    def block_entfernen(self, block):
+        "Eine Methode, die die Buchungen des letzten Blocks der Chain wieder rückgängig macht (z.B. bei einem Fork)."
+
+        if block.index == 0:
+            return
+
+        for transaktion in block.transaktionen:
+            betrag = float(transaktion['betrag'])
+            self._buchen(transaktion['sender'], -betrag, 0.0, -1, 0)
+            self._buchen(transaktion['empfänger'], 0.0, -betrag, 0, -1)
+
+    def _buchen(self, name, gespendet, erhalten, anzahl_gespendet, anzahl_erhalten):
+        konto = self._geändert.get(name) or self._konten.get(name, LEERES_KONTO)
+        self._geändert[name] = Konto(
+            konto.gespendet + gespendet,
+            konto.erhalten + erhalten,
+            konto.anzahl_gespendet + anzahl_gespendet,
+            konto.anzahl_erhalten + anzahl_erhalten
+        )
+
+    def konto(self, name):
+        "Eine Methode, die das Konto zum zuletzt veröffentlichten Stand zurückgibt oder None, falls der Name in keiner Transaktion vorkommt."
+
+        return self._konten.get(name)
+
+    def guthaben(self, name):
+        "Eine Methode, die das bestätigte Guthaben (erhalten minus gespendet) zurückgibt oder None, falls der Name noch nie etwas erhalten hat und als externer Spender nicht begrenzt ist."
+
+        konto = self._konten.get(name)
+        if konto is None or not konto.anzahl_erhalten:
+            return None
+        return konto.erhalten - konto.gespendet
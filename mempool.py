@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import math
+import threading
+from collections import OrderedDict
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+VERDRÄNGUNGS_STRATEGIEN = ('älteste', 'ablehnen')
+
+# Rundungsfehler beim Aufsummieren der Beträge sollen keine gedeckte Transaktion ablehnen
+DECKUNGS_TOLERANZ = 1e-9
+
+
+def transaktions_id(transaktion):
+    "Eine Funktion, die den SHA-256 Hash der kanonisch serialisierten Transaktion als eindeutige ID zurückgibt."
+
+    return hashlib.sha256(json.dumps(transaktion, sort_keys=True).encode()).hexdigest()
+
+
+def prüfe_transaktion(transaktion):
+    "Eine Funktion, die Felder und Betrag einer Transaktion prüft und den Grund zurückgibt, falls sie ungültig ist, sonst None."
+
+    if not isinstance(transaktion, dict) or not all(feld in transaktion for feld in ('sender', 'empfänger', 'betrag')):
+        return 'Fehlende Felder.'
+    if not isinstance(transaktion['sender'], str) or not isinstance(transaktion['empfänger'], str):
+        return 'Sender und Empfänger müssen Texte sein.'
+
+    betrag = transaktion['betrag']
+    if isinstance(betrag, bool) or not isinstance(betrag, (int, float)) or not math.isfinite(betrag):
+        return 'Der Betrag muss eine endliche Zahl sein.'
+    if betrag <= 0:
+        return 'Der Betrag muss positiv sein.'
+    return None
+
+
+class Mempool:
+    "Eine Klasse für offene Transaktionen mit Hash-Index gegen Duplikate und einer Warteschlange in Eingangsreihenfolge."
+
+    def __init__(self, kapazität=10000, verdrängung='älteste', deckung=None, bestätigt=None):
+        if verdrängung not in VERDRÄNGUNGS_STRATEGIEN:
+            raise ValueError(f"Unbekannte Verdrängungsstrategie: {verdrängung}. Erlaubt: {', '.join(VERDRÄNGUNGS_STRATEGIEN)}")
+
+        self.kapazität = kapazität
+        self.verdrängung = verdrängung
+        # Optional eine Funktion, die das bestätigte Guthaben eines Senders zurückgibt (None = nicht begrenzt)
+        self.deckung = deckung
+        # Optional eine Funktion, die prüft, ob eine Transaktions-ID bereits in der Chain steht
+        self.bestätigt = bestätigt
+
+        # Transaktions-ID -> Transaktion; die Einfügereihenfolge entspricht dem Alter
+        self._transaktionen = OrderedDict()
+        # Sender -> (Summe, Anzahl) der offenen Transaktionen, damit das verfügbare Guthaben ohne Durchlauf bekannt ist
+        self._ausgehend = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._transaktionen)
+
+    def __iter__(self):
+        # Über eine Kopie iterieren, damit gleichzeitiges Einfügen oder Entfernen nicht stört
+        with self._lock:
+            return iter(list(self._transaktionen.values()))
+
+    def __contains__(self, txid):
+        return txid in self._transaktionen
+
+    def _aufnehmen(self, txid, transaktion):
+        "Eine Methode, die eine Transaktion bei gehaltenem Lock aufnimmt und (Status, ID einer verdrängten Transaktion oder None) zurückgibt."
+
+        if txid in self._transaktionen:
+            return 'duplikat', None
+
+        # Ein verspätet per Gossip eintreffender Block-Inhalt darf nicht erneut geschürft werden
+        if self.bestätigt is not None and self.bestätigt(txid):
+            return 'bestätigt', None
+
+        # Ohne gültigen Betrag wäre die Deckung nicht prüfbar
+        if prüfe_transaktion(transaktion) is not None:
+            return 'ungültig', None
+
+        # Offene Transaktionen des Senders sind vom bestätigten Guthaben bereits abgezogen
+        if self.deckung is not None:
+            guthaben = self.deckung(transaktion['sender'])
+            if guthaben is not None:
+                offen, _ = self._ausgehend.get(transaktion['sender'], (0.0, 0))
+                if transaktion['betrag'] > guthaben - offen + DECKUNGS_TOLERANZ:
+                    return 'ungedeckt', None
+
+        verdrängte_id = None
+        if len(self._transaktionen) >= self.kapazität:
+            if self.verdrängung == 'ablehnen':
+                return 'voll', None
+            verdrängte_id, verdrängte_transaktion = self._transaktionen.popitem(last=False)
+            self._ausgang_buchen(verdrängte_transaktion, -1)
+
+        self._transaktionen[txid] = transaktion
+        self._ausgang_buchen(transaktion, 1)
+        return 'aufgenommen', verdrängte_id
+
+    def _ausgang_buchen(self, transaktion, vorzeichen):
+        "Eine Methode, die eine aufgenommene (vorzeichen=1) oder entfernte (-1) Transaktion bei gehaltenem Lock in den offenen Beträgen ihres Senders verbucht."
+
+        sender = transaktion['sender']
+        summe, anzahl = self._ausgehend.get(sender, (0.0, 0))
+        if anzahl + vorzeichen:
+            self._ausgehend[sender] = (summe + vorzeichen * transaktion['betrag'], anzahl + vorzeichen)
+        else:
+            del self._ausgehend[sender]
+
+    def hinzufügen(self, transaktion):
+        "Eine Methode, die eine Transaktion aufnimmt und ihre ID zurückgibt, oder None bei Duplikaten, bereits bestätigten oder ungültigen Transaktionen, vollem Mempool bzw. fehlender Deckung."
+
+        txid = transaktions_id(transaktion)
+        with self._lock:
+            status, verdrängte_id = self._aufnehmen(txid, transaktion)
+
+        if status == 'duplikat':
+            logger.debug("Duplikat-Transaktion ignoriert")
+            return None
+        if status == 'bestätigt':
+            logger.debug("Bereits bestätigte Transaktion ignoriert")
+            return None
+        if status == 'ungültig':
+            logger.debug("Ungültige Transaktion ignoriert")
+            return None
+        if status == 'voll':
+            logger.warning("Mempool ist voll. Transaktion abgelehnt.")
+            return None
+        if status == 'ungedeckt':
+            logger.debug("Transaktion von %s übersteigt das verfügbare Guthaben.", transaktion['sender'])
+            return None
+        if verdrängte_id is not None:
+            logger.warning("Mempool ist voll. Älteste Transaktion %.16s verdrängt.", verdrängte_id)
+        return txid
+
+    def hinzufügen_mehrere(self, transaktionen):
+        "Eine Methode, die mehrere Transaktionen unter einmaligem Sperren aufnimmt und pro Transaktion (ID, Status) zurückgibt."
+
+        # Die Hashes werden außerhalb des Locks berechnet
+        txids = [transaktions_id(transaktion) for transaktion in transaktionen]
+        ergebnisse = []
+        verdrängt = 0
+
+        with self._lock:
+            for txid, transaktion in zip(txids, transaktionen):
+                status, verdrängte_id = self._aufnehmen(txid, transaktion)
+                if verdrängte_id is not None:
+                    verdrängt += 1
+                ergebnisse.append((txid, status))
+
+        if verdrängt:
+            logger.warning("Mempool ist voll. %d älteste Transaktionen verdrängt.", verdrängt)
+        return ergebnisse
+
+    def älteste(self):
+        "Eine Methode, die die älteste offene Transaktion zurückgibt oder None, falls der Mempool leer ist."
+
+        with self._lock:
+            return next(iter(self._transaktionen.values()), None)
+
+    def ausgehend(self, sender):
+        "Eine Methode, die Summe und Anzahl der offenen Transaktionen eines Senders zurückgibt."
+
+        with self._lock:
+            return self._ausgehend.get(sender, (0.0, 0))
+
+    def hole_älteste(self, anzahl):
+        "Eine Methode, die bis zu anzahl der ältesten Transaktionen als Liste von (ID, Transaktion) zurückgibt, ohne sie zu entfernen."
+
+        with self._lock:
+            return list(islice(self._transaktionen.items(), anzahl))
+
+    def entfernen(self, txids):
+        "Eine Methode, die die angegebenen Transaktionen (z.B. nach dem Schürfen) aus dem Mempool entfernt."
+
+        with self._lock:
+            for txid in txids:
+                transaktion = self._transaktionen.pop(txid, None)
+                if transaktion is not None:
+                    self._ausgang_buchen(transaktion, -1)
+
+    def wieder_aufnehmen(self, transaktionen):
+        "Eine Methode, die Transaktionen aus verworfenen Blöcken (z.B. nach einem Fork) wieder als älteste offene Transaktionen aufnimmt."
+
+        with self._lock:
+            for transaktion in reversed(list(transaktionen)):
+                txid = transaktions_id(transaktion)
+                if txid in self._transaktionen:
+                    continue
+                # Bei vollem Mempool haben die neuen Transaktionen Vorrang vor den wieder aufgenommenen
+                if len(self._transaktionen) >= self.kapazität:
+                    break
+                self._transaktionen[txid] = dict(transaktion)
+                self._transaktionen.move_to_end(txid, last=False)
+                self._ausgang_buchen(transaktion, 1)
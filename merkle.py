@@ -0,0 +1,118 @@
+import hashlib
+
+from mempool import transaktions_id
+
+# Präfix für innere Knoten, damit ein innerer Knoten nie als Blatt (Hash einer JSON-Transaktion) ausgegeben werden kann
+INNERER_KNOTEN = b'\x01'
+
+
+def _knoten_hash(links, rechts):
+    return hashlib.sha256(INNERER_KNOTEN + links + rechts).digest()
+
+
+def merkle_ebenen(txids):
+    "Eine Funktion, die alle Ebenen des Merkle-Baums von den Blättern (Transaktions-IDs) bis zur Wurzel als Bytes zurückgibt."
+
+    ebene = [bytes.fromhex(txid) for txid in txids]
+    if not ebene:
+        return [[hashlib.sha256(b'').digest()]]
+
+    ebenen = [ebene]
+    while len(ebene) > 1:
+        # Bei ungerader Anzahl wird der letzte Knoten unverändert eine Ebene nach oben übernommen
+        nächste = [_knoten_hash(ebene[i], ebene[i + 1]) for i in range(0, len(ebene) - 1, 2)]
+        if len(ebene) % 2:
+            nächste.append(ebene[-1])
+        ebenen.append(nächste)
+        ebene = nächste
+
+    return ebenen
+
+
+def berechne_merkle_wurzel(transaktionen):
+    "Eine Funktion, die die Merkle-Wurzel über die IDs der Transaktionen als Hex-String berechnet."
+
+    return merkle_wurzel_aus_ids([transaktions_id(transaktion) for transaktion in transaktionen])
+
+
+def merkle_wurzel_aus_ids(txids):
+    "Eine Funktion, die die Merkle-Wurzel über bereits berechnete Transaktions-IDs als Hex-String berechnet."
+
+    return merkle_ebenen(txids)[-1][0].hex()
+
+
+def erzeuge_merkle_beweis(txids, position):
+    "Eine Funktion, die den Pfad der Geschwister-Hashes von der Transaktions-ID an position bis zur Merkle-Wurzel zurückgibt."
+
+    ebenen = merkle_ebenen(txids)
+    pfad = []
+
+    for ebene in ebenen[:-1]:
+        geschwister = position ^ 1
+        # Ein übernommener letzter Knoten hat kein Geschwister, auf dieser Ebene gibt es nichts zu hashen
+        if geschwister < len(ebene):
+            pfad.append({
+                'hash': ebene[geschwister].hex(),
+                'seite': 'links' if geschwister < position else 'rechts'
+            })
+        position //= 2
+
+    return pfad
+
+
+def prüfe_merkle_beweis(txid, pfad, merkle_wurzel):
+    "Eine Funktion, die überprüft, ob der Pfad die Transaktions-ID mit der Merkle-Wurzel verbindet."
+
+    aktueller_hash = bytes.fromhex(txid)
+    for schritt in pfad:
+        geschwister = bytes.fromhex(schritt['hash'])
+        if schritt['seite'] == 'links':
+            aktueller_hash = _knoten_hash(geschwister, aktueller_hash)
+        else:
+            aktueller_hash = _knoten_hash(aktueller_hash, geschwister)
+
+    return aktueller_hash.hex() == merkle_wurzel
+
+
+class TransaktionsIndex:
+    "Ein Index von Transaktions-ID auf die Position des Blocks, der die Transaktion enthält."
+
+    def __init__(self):
+        self.neu_aufbauen([])
+
+    def neu_aufbauen(self, chain):
+        "Eine Methode, die den Index aus einer vollständigen Chain aufbaut."
+
+        self.block_nach_txid = {}
+        for block in chain:
+            self.block_hinzufügen(block)
+
+    def block_hinzufügen(self, block):
+        "Eine Methode, die die Transaktionen eines neuen Blocks am Ende der Chain in den Index aufnimmt."
+
+        # Neue Blöcke enthalten nur unbestätigte Transaktionen; steht eine (in älteren Log-Dateien) doch
+        # in mehreren Blöcken, zeigt der Index auf den ersten davon
+        for transaktion in block.transaktionen:
+            self.block_nach_txid.setdefault(transaktions_id(transaktion), block.index)
+
+    def block_entfernen(self, block):
+        "Eine Methode, die die Transaktionen des letzten Blocks der Chain wieder aus dem Index entfernt."
+
+        # Da Blöcke nur vom Ende her entfernt werden, bleibt ein Eintrag auf einen früheren Block mit derselben Transaktion gültig
+        for transaktion in block.transaktionen:
+            txid = transaktions_id(transaktion)
+            if self.block_nach_txid.get(txid) == block.index:
+                del self.block_nach_txid[txid]
+
+    def veröffentlichen(self):
+        "Eine Methode, die nichts tun muss, da einzelne Einträge atomar gelesen werden."
+
+    def ist_bestätigt(self, txid):
+        "Eine Methode, die prüft, ob die Transaktion bereits in einem Block der Chain enthalten ist."
+
+        return txid in self.block_nach_txid
+
+    def finde_block(self, txid):
+        "Eine Methode, die die Position des Blocks mit der Transaktion zurückgibt oder None."
+
+        return self.block_nach_txid.get(txid)
@@ -0,0 +1,194 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Standard-Grenzen der Histogramme in Sekunden (wie im Prometheus-Client)
+STANDARD_GRENZEN = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _wert_formatieren(wert):
+    if wert == float('inf'):
+        return '+Inf'
+    return repr(float(wert)) if isinstance(wert, float) else str(wert)
+
+
+def _labels_formatieren(namen, werte):
+    "Eine Funktion, die Label-Namen und -Werte im Prometheus-Textformat ({a=\"1\",b=\"2\"}) zusammensetzt."
+
+    if not namen:
+        return ''
+    paare = []
+    for name, wert in zip(namen, werte):
+        wert = str(wert).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        paare.append(f'{name}="{wert}"')
+    return '{' + ','.join(paare) + '}'
+
+
+class _Metrik:
+    "Gemeinsame Grundlage aller Metriken: Name, Beschreibung, Label-Namen und ein Lock für gleichzeitige Zugriffe."
+
+    typ = None
+
+    def __init__(self, name, hilfe, labels=()):
+        self.name = name
+        self.hilfe = hilfe
+        self.label_namen = tuple(labels)
+        self._lock = threading.Lock()
+        self._werte = {}
+
+    def _schlüssel(self, labels):
+        if set(labels) != set(self.label_namen):
+            raise ValueError(f"Metrik {self.name} erwartet die Labels {self.label_namen}, erhalten: {tuple(labels)}")
+        return tuple(labels[name] for name in self.label_namen)
+
+    def als_text(self):
+        "Eine Methode, die die Metrik im Prometheus-Textformat zurückgibt."
+
+        zeilen = [f"# HELP {self.name} {self.hilfe}", f"# TYPE {self.name} {self.typ}"]
+        with self._lock:
+            werte = dict(self._werte)
+        for schlüssel, wert in sorted(werte.items()):
+            zeilen.append(f"{self.name}{_labels_formatieren(self.label_namen, schlüssel)} {_wert_formatieren(wert)}")
+        return zeilen
+
+
+class Zähler(_Metrik):
+    "Ein Zähler, der nur wachsen kann (z.B. Anzahl geschürfter Blöcke)."
+
+    typ = 'counter'
+
+    def erhöhen(self, wert=1, **labels):
+        "Eine Methode, die den Zähler für die angegebenen Labels um wert erhöht."
+
+        schlüssel = self._schlüssel(labels)
+        with self._lock:
+            self._werte[schlüssel] = self._werte.get(schlüssel, 0) + wert
+
+
+class Messwert(_Metrik):
+    "Ein Messwert, der beliebig steigen und fallen kann; mit funktion wird er erst beim Abruf von /metrics ermittelt."
+
+    typ = 'gauge'
+
+    def __init__(self, name, hilfe, labels=(), funktion=None):
+        super().__init__(name, hilfe, labels)
+        self.funktion = funktion
+
+    def setzen(self, wert, **labels):
+        "Eine Methode, die den Messwert für die angegebenen Labels setzt."
+
+        schlüssel = self._schlüssel(labels)
+        with self._lock:
+            self._werte[schlüssel] = wert
+
+    def als_text(self):
+        if self.funktion is not None:
+            self.setzen(self.funktion())
+        return super().als_text()
+
+
+class Histogramm(_Metrik):
+    "Ein Histogramm, das Beobachtungen (z.B. Dauern in Sekunden) in kumulativen Klassen sowie Summe und Anzahl erfasst."
+
+    typ = 'histogram'
+
+    def __init__(self, name, hilfe, labels=(), grenzen=STANDARD_GRENZEN):
+        super().__init__(name, hilfe, labels)
+        self.grenzen = tuple(sorted(grenzen))
+
+    def beobachten(self, wert, **labels):
+        "Eine Methode, die eine Beobachtung in die passende Klasse einsortiert."
+
+        schlüssel = self._schlüssel(labels)
+        klasse = bisect.bisect_left(self.grenzen, wert)
+        with self._lock:
+            eintrag = self._werte.get(schlüssel)
+            if eintrag is None:
+                # Anzahl pro Klasse (letzte Klasse: größer als alle Grenzen), Summe, Gesamtanzahl
+                eintrag = self._werte[schlüssel] = [[0] * (len(self.grenzen) + 1), 0.0, 0]
+            eintrag[0][klasse] += 1
+            eintrag[1] += wert
+            eintrag[2] += 1
+
+    @contextmanager
+    def messen(self, **labels):
+        "Ein Kontextmanager, der die Dauer des Blocks in Sekunden beobachtet."
+
+        start_zeit = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.beobachten(time.perf_counter() - start_zeit, **labels)
+
+    def als_text(self):
+        zeilen = [f"# HELP {self.name} {self.hilfe}", f"# TYPE {self.name} {self.typ}"]
+        with self._lock:
+            werte = {schlüssel: (list(klassen), summe, anzahl) for schlüssel, (klassen, summe, anzahl) in self._werte.items()}
+
+        label_namen = self.label_namen + ('le',)
+        for schlüssel, (klassen, summe, anzahl) in sorted(werte.items()):
+            kumuliert = 0
+            for grenze, anzahl_klasse in zip(self.grenzen + (float('inf'),), klassen):
+                kumuliert += anzahl_klasse
+                labels = _labels_formatieren(label_namen, schlüssel + (_wert_formatieren(grenze),))
+                zeilen.append(f"{self.name}_bucket{labels} {kumuliert}")
+            labels = _labels_formatieren(self.label_namen, schlüssel)
+            zeilen.append(f"{self.name}_sum{labels} {_wert_formatieren(summe)}")
+            zeilen.append(f"{self.name}_count{labels} {anzahl}")
+        return zeilen
+
+
+class Registrierung:
+    "Eine Sammlung von Metriken, die gemeinsam im Prometheus-Textformat ausgegeben werden."
+
+    def __init__(self):
+        self._metriken = {}
+        self._lock = threading.Lock()
+
+    def registrieren(self, metrik):
+        "Eine Methode, die eine Metrik aufnimmt; eine bereits registrierte Metrik gleichen Namens wird stattdessen zurückgegeben."
+
+        with self._lock:
+            vorhanden = self._metriken.get(metrik.name)
+            if vorhanden is not None:
+                if type(vorhanden) is not type(metrik) or vorhanden.label_namen != metrik.label_namen:
+                    raise ValueError(f"Metrik {metrik.name} ist bereits mit anderem Typ oder anderen Labels registriert.")
+                return vorhanden
+            self._metriken[metrik.name] = metrik
+            return metrik
+
+    def als_text(self):
+        "Eine Methode, die alle Metriken im Prometheus-Textformat (Version 0.0.4) zurückgibt."
+
+        with self._lock:
+            metriken = list(self._metriken.values())
+        zeilen = []
+        for metrik in metriken:
+            zeilen.extend(metrik.als_text())
+        return '\n'.join(zeilen) + '\n'
+
+
+# Gemeinsame Registrierung, in die alle Module ihre Metriken eintragen
+REGISTRIERUNG = Registrierung()
+
+
+def zähler(name, hilfe, labels=()):
+    "Eine Funktion, die einen Zähler in der gemeinsamen Registrierung anlegt."
+
+    return REGISTRIERUNG.registrieren(Zähler(name, hilfe, labels))
+
+
+def messwert(name, hilfe, labels=(), funktion=None):
+    "Eine Funktion, die einen Messwert in der gemeinsamen Registrierung anlegt."
+
+    metrik = REGISTRIERUNG.registrieren(Messwert(name, hilfe, labels))
+    if funktion is not None:
+        metrik.funktion = funktion
+    return metrik
+
+
+def histogramm(name, hilfe, labels=(), grenzen=STANDARD_GRENZEN):
+    "Eine Funktion, die ein Histogramm in der gemeinsamen Registrierung anlegt."
+
+    return REGISTRIERUNG.registrieren(Histogramm(name, hilfe, labels, grenzen))
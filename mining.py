@@ -0,0 +1,138 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+from blockchain import HASHRATE, PRÜF_INTERVALL, SCHÜRF_VERSUCHE, suche_nonce
+
+logger = logging.getLogger(__name__)
+
+# Werden in jedem Worker-Prozess durch den Initializer des Pools gesetzt
+_stop_event = None
+_versuche_zähler = None
+
+
+def _worker_initialisieren(stop_event, versuche_zähler):
+    "Eine Funktion, die das gemeinsame Stop-Event und den gemeinsamen Versuchszähler im Worker-Prozess hinterlegt."
+
+    global _stop_event, _versuche_zähler
+    _stop_event = stop_event
+    _versuche_zähler = versuche_zähler
+
+
+def _nonce_bereich_durchsuchen(präfix, suffix, ziel, start_nonce, schrittweite):
+    "Eine Funktion, die jede n-te Nonce ab start_nonce durchsucht, bis ein gültiger Hash gefunden oder das Stop-Event gesetzt ist."
+
+    nonce = start_nonce
+    versuche = 0
+
+    while not _stop_event.is_set():
+        gefundene_nonce, block_hash, anzahl = suche_nonce(präfix, suffix, ziel, nonce, schrittweite, PRÜF_INTERVALL)
+        versuche += anzahl
+        with _versuche_zähler.get_lock():
+            _versuche_zähler.value += anzahl
+
+        if gefundene_nonce is not None:
+            return gefundene_nonce, block_hash, versuche
+
+        nonce += anzahl * schrittweite
+
+    return None, None, versuche
+
+
+class ParallelerSchürfer:
+    "Ein Schürfer, der den Nonce-Raum auf mehrere Prozesse aufteilt."
+
+    def __init__(self, anzahl_worker=None):
+        self.anzahl_worker = anzahl_worker or os.cpu_count() or 1
+        self.letzte_hashrate = 0.0
+        self._stop_event = multiprocessing.Event()
+        self._versuche_zähler = multiprocessing.Value('Q', 0)
+        self._pool = None
+
+    def _hole_pool(self):
+        "Eine Methode, die den Prozess-Pool beim ersten Schürfen erstellt und danach wiederverwendet."
+
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(
+                processes=self.anzahl_worker,
+                initializer=_worker_initialisieren,
+                initargs=(self._stop_event, self._versuche_zähler)
+            )
+        return self._pool
+
+    def schürfe(self, block, abbruch=None, fortschritt=None):
+        "Eine Methode, die eine gültige Nonce für das Ziel des Blocks parallel sucht und Nonce und Hash im Block setzt. Gibt None zurück, wenn abgebrochen wurde."
+
+        pool = self._hole_pool()
+        self._stop_event.clear()
+        with self._versuche_zähler.get_lock():
+            self._versuche_zähler.value = 0
+
+        # Der Block wird nur einmal serialisiert, die Worker setzen nur noch die Nonce ein
+        präfix, suffix = block.hash_vorlage()
+
+        gefunden = []
+        beendet = threading.Event()
+
+        def ergebnis_verarbeiten(ergebnis):
+            # Der erste Worker mit gültigem Hash stoppt alle anderen
+            if ergebnis[0] is not None:
+                gefunden.append(ergebnis)
+                self._stop_event.set()
+                beendet.set()
+
+        def fehler_verarbeiten(fehler):
+            self._stop_event.set()
+            beendet.set()
+
+        start_zeit = time.time()
+        aufträge = [
+            pool.apply_async(
+                _nonce_bereich_durchsuchen,
+                (präfix, suffix, block.ziel, block.nonce + worker, self.anzahl_worker),
+                callback=ergebnis_verarbeiten,
+                error_callback=fehler_verarbeiten
+            )
+            for worker in range(self.anzahl_worker)
+        ]
+
+        # Während die Worker suchen, Fortschritt melden und auf Abbruch reagieren
+        while not beendet.wait(0.2):
+            if abbruch is not None and abbruch.is_set():
+                self._stop_event.set()
+                break
+            if fortschritt is not None:
+                fortschritt(self._versuche_zähler.value)
+
+        versuche = sum(auftrag.get()[2] for auftrag in aufträge)
+        dauer = time.time() - start_zeit
+        self.letzte_hashrate = versuche / dauer if dauer > 0 else 0.0
+        SCHÜRF_VERSUCHE.erhöhen(versuche)
+        HASHRATE.setzen(self.letzte_hashrate)
+        if fortschritt is not None:
+            fortschritt(versuche)
+
+        logger.info("%d Hashes mit %d Workern in %.2f Sekunden (%.0f H/s)", versuche, self.anzahl_worker, dauer, self.letzte_hashrate)
+
+        if not gefunden:
+            return None
+
+        block.nonce, block.hash, _ = gefunden[0]
+        return {
+            'nonce': block.nonce,
+            'hash': block.hash,
+            'versuche': versuche,
+            'dauer': dauer,
+            'hashrate': self.letzte_hashrate
+        }
+
+    def schließen(self):
+        "Eine Methode, die alle Worker-Prozesse beendet."
+
+        if self._pool is not None:
+            self._stop_event.set()
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
@@ -1,17 +1,141 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
-from blockchain import Blockchain, Block
+from blockchain import Blockchain, Block, schwierigkeit_aus_ziel
+from mining import ParallelerSchürfer
+from validierung import ParallelerPrüfer
+from blockspeicher import BlockSpeicher
+from peers import PeerNetzwerk, TransaktionsBündler
+from mempool import Mempool, prüfe_transaktion, transaktions_id
+from statistik import SpendenStatistik
+from konten import LEERES_KONTO, KontenIndex
+from merkle import TransaktionsIndex, erzeuge_merkle_beweis
+from auftraege import SchürfWarteschlange
+from ereignisse import BlockEreignisse, EreignisVerteiler, ÄnderungsMelder
+from waisen import WaisenPool
+from concurrent.futures import ThreadPoolExecutor
+import binaerformat
+import metriken
+import protokollierung
 import requests
 import threading
+import logging
 import time
+import os
+import json
+
+# Log-Level (DEBUG, INFO, WARNING, ERROR) und höchstens so viele gleichartige Meldungen pro Sekunde (0 = unbegrenzt)
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_MAX_PRO_SEKUNDE = int(os.environ.get('LOG_MAX_PRO_SEKUNDE', 10))
+protokollierung.einrichten(LOG_LEVEL, LOG_MAX_PRO_SEKUNDE)
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
 
-# eigene Blockchain-Instanz erstellen
-blockchain = Blockchain()
-
-bekannte_nodes = set()
+KONSENS_ERGEBNISSE = metriken.zähler(
+    'blockchain_konsens_ergebnisse_gesamt', 'Durchläufe der Konsens-Logik nach Ergebnis.', labels=('ergebnis',)
+)
+SYNCHRONISATIONEN = metriken.zähler(
+    'blockchain_synchronisationen_gesamt', 'Synchronisationen mit einzelnen Peer-Nodes nach Ergebnis.', labels=('ergebnis',)
+)
+EMPFANGENE_BLÖCKE = metriken.zähler(
+    'blockchain_empfangene_bloecke_gesamt', 'Von Peer-Nodes gemeldete Blöcke nach Ergebnis.', labels=('ergebnis',)
+)
+KONSENS_DAUER = metriken.histogramm('blockchain_konsens_dauer_sekunden', 'Dauer eines Durchlaufs der Konsens-Logik.')
+HTTP_DAUER = metriken.histogramm(
+    'blockchain_http_anfrage_dauer_sekunden', 'Bearbeitungsdauer der HTTP-Anfragen an diese Node.',
+    labels=('endpunkt', 'methode', 'status')
+)
+
+# Anzahl der Prozesse für das Schürfen (Standard: alle CPU-Kerne)
+SCHÜRF_WORKER = int(os.environ.get('SCHUERF_WORKER', os.cpu_count() or 1))
+
+# Ablage der Blöcke auf der Festplatte und fsync-Richtlinie (immer, intervall oder nie)
+BLOCK_SPEICHER_PFAD = os.environ.get('BLOCK_SPEICHER', os.path.join('daten', 'blockchain.log'))
+FSYNC_MODUS = os.environ.get('FSYNC_MODUS', 'immer')
+
+# Größe des Mempools, Verhalten bei vollem Mempool (älteste oder ablehnen) und maximale Transaktionen pro Block
+MEMPOOL_KAPAZITÄT = int(os.environ.get('MEMPOOL_KAPAZITAET', 10000))
+MEMPOOL_VERDRÄNGUNG = os.environ.get('MEMPOOL_VERDRAENGUNG', 'älteste')
+# Sender, die selbst Spenden erhalten haben, dürfen höchstens ihr Guthaben weitergeben (geprüft bei Aufnahme in den Mempool)
+KONTOSTAND_PRÜFEN = os.environ.get('KONTOSTAND_PRUEFEN', 'false').lower() == 'true'
+MAX_BLOCK_TRANSAKTIONEN = int(os.environ.get('MAX_BLOCK_TRANSAKTIONEN', 500))
+
+# Schwierigkeit des Genesis-Blocks (Anzahl führender Hex-Nullen), danach wird sie automatisch angepasst
+START_SCHWIERIGKEIT = int(os.environ.get('START_SCHWIERIGKEIT', 4))
+
+# Angestrebte Zeit zwischen zwei Blöcken in Sekunden und Anzahl Blöcke, nach denen die Schwierigkeit angepasst wird.
+# Beide Werte gehören zu den Konsensregeln und müssen auf allen Nodes gleich sein.
+ZIEL_BLOCKZEIT = float(os.environ.get('ZIEL_BLOCKZEIT', 30))
+ANPASSUNGS_FENSTER = int(os.environ.get('ANPASSUNGS_FENSTER', 10))
+
+# So viele Sekunden darf ein erhaltener Block vor der eigenen Uhr liegen
+MAX_ZEIT_IN_ZUKUNFT = float(os.environ.get('MAX_ZEIT_IN_ZUKUNFT', 120))
+
+# Anzahl der Prozesse für die Prüfung erhaltener Chains und Anzahl Blöcke, ab der parallel geprüft wird
+PRÜF_WORKER = int(os.environ.get('PRUEF_WORKER', os.cpu_count() or 1))
+PARALLEL_PRÜFEN_AB = int(os.environ.get('PARALLEL_PRUEFEN_AB', 200))
+
+# Anzahl der Blöcke pro Anfrage beim Nachladen von einer Peer-Node
+SYNC_SEITENGRÖSSE = 500
+
+# Maximale Anzahl Transaktionen pro Anfrage an die Batch-Endpunkte
+MAX_BATCH_GRÖSSE = int(os.environ.get('MAX_BATCH_GROESSE', 1000))
+
+# Ausgehende Transaktionen werden gesammelt und gebündelt an die Peers gesendet
+GOSSIP_BÜNDEL_GRÖSSE = int(os.environ.get('GOSSIP_BUENDEL_GROESSE', 100))
+GOSSIP_BÜNDEL_INTERVALL = int(os.environ.get('GOSSIP_BUENDEL_INTERVALL_MS', 50)) / 1000
+
+# Höchstzahl aufbewahrter Blöcke ohne bekannten Vorgänger und Anzahl fehlender Vorgänger, die einzeln nachgeladen werden,
+# bevor stattdessen über die Konsens-Logik ab dem gemeinsamen Block synchronisiert wird
+MAX_WAISEN = int(os.environ.get('MAX_WAISEN', 100))
+MAX_VORGÄNGER_NACHLADEN = int(os.environ.get('MAX_VORGAENGER_NACHLADEN', 16))
+
+# gzip-Stufe für Chain und Blöcke an Clients, die gzip akzeptieren (0 = nicht komprimieren)
+GZIP_STUFE = int(os.environ.get('GZIP_STUFE', 6))
+
+# Höchstzahl gleichzeitig verbundener Dashboards an /events und Abstand, in dem Änderungen des Mempools gemeldet werden
+MAX_EREIGNIS_ABONNENTEN = int(os.environ.get('MAX_EREIGNIS_ABONNENTEN', 100))
+EREIGNIS_INTERVALL = int(os.environ.get('EREIGNIS_INTERVALL_MS', 500)) / 1000
+
+# Port des Flask-Servers (z.B. für mehrere Nodes auf einem Rechner)
+PORT = int(os.environ.get('PORT', 5000))
+
+# Gesendete und erhaltene Beträge pro Name, wird nach dem Laden der Chain aufgebaut und danach fortgeschrieben
+konten_index = KontenIndex()
+
+# Transaktions-ID -> Block für Inklusionsbeweise; die Blockchain lehnt damit auch bereits bestätigte Transaktionen ab
+transaktions_index = TransaktionsIndex()
+
+# eigene Blockchain-Instanz erstellen (lädt eine bereits gespeicherte Chain)
+blockchain = Blockchain(
+    schwierigkeit=START_SCHWIERIGKEIT,
+    schürfer=ParallelerSchürfer(anzahl_worker=SCHÜRF_WORKER),
+    speicher=BlockSpeicher(BLOCK_SPEICHER_PFAD, fsync_modus=FSYNC_MODUS),
+    mempool=Mempool(
+        kapazität=MEMPOOL_KAPAZITÄT, verdrängung=MEMPOOL_VERDRÄNGUNG,
+        deckung=konten_index.guthaben if KONTOSTAND_PRÜFEN else None,
+        bestätigt=transaktions_index.ist_bestätigt
+    ),
+    max_transaktionen_pro_block=MAX_BLOCK_TRANSAKTIONEN,
+    ziel_blockzeit=ZIEL_BLOCKZEIT,
+    anpassungs_fenster=ANPASSUNGS_FENSTER,
+    max_zeit_in_zukunft=MAX_ZEIT_IN_ZUKUNFT,
+    transaktions_index=transaktions_index,
+    # Mit nur einem Prozess wäre die parallele Prüfung wegen der Übertragung langsamer als die sequenzielle
+    prüfer=ParallelerPrüfer(anzahl_worker=PRÜF_WORKER, min_blöcke=PARALLEL_PRÜFEN_AB) if PRÜF_WORKER > 1 else None
+)
+
+# Keep-Alive-Sessions und paralleles Senden an die Peer-Nodes
+peer_netzwerk = PeerNetzwerk()
+bekannte_nodes = peer_netzwerk.bekannte_nodes
+transaktions_bündler = TransaktionsBündler(
+    peer_netzwerk, max_anzahl=GOSSIP_BÜNDEL_GRÖSSE, max_wartezeit=GOSSIP_BÜNDEL_INTERVALL
+)
+
+# Gemeldete Blöcke, deren Vorgänger noch fehlt; ihre Vorgänger werden nacheinander in einem eigenen Thread nachgeladen
+waisen_pool = WaisenPool(max_anzahl=MAX_WAISEN)
+waisen_auflöser = ThreadPoolExecutor(max_workers=1, thread_name_prefix='waisen')
 
 ORGANISATIONEN = [
     "Rotes Kreuz",
@@ -21,153 +145,430 @@ ORGANISATIONEN = [
     "Ärzte ohne Grenzen"
 ]
 
+# Spendensummen und Spenden pro Organisation/Sender, wird bei jeder Änderung der Chain fortgeschrieben
+spenden_statistik = SpendenStatistik(ORGANISATIONEN)
+blockchain.registriere_index(spenden_statistik)
+
+blockchain.registriere_index(konten_index)
+
+def statistiken_erstellen():
+    "Eine Funktion, die die Statistiken der Node für /stats und die stats-Ereignisse zusammenstellt."
+
+    # Summen kommen aus dem fortgeschriebenen Index statt aus einem Durchlauf über alle Blöcke
+    gesamt_transaktionen, transaktionen_pro_organisation = spenden_statistik.summen()
+    return {
+        'gesamt_transaktionen': gesamt_transaktionen,
+        'transaktionen_pro_organisation': transaktionen_pro_organisation,
+        'anzahl_blöcke': blockchain.schnappschuss().länge,
+        'anzahl_offene_transaktionen': len(blockchain.mempool),
+        'schwierigkeit': schwierigkeit_aus_ziel(blockchain.nächstes_ziel()),
+        'ziel_blockzeit': blockchain.ziel_blockzeit,
+        'chain_valide': blockchain.ist_chain_valide()
+    }
+
+# Neue Blöcke, Änderungen der Statistiken und des Mempools werden per Server-Sent Events an die Dashboards gemeldet.
+# Die Statistiken werden nur nach Änderungen der Chain neu berechnet, unabhängig von der Anzahl der Dashboards.
+ereignis_verteiler = EreignisVerteiler(max_abonnenten=MAX_EREIGNIS_ABONNENTEN)
+statistik_melder = ÄnderungsMelder(ereignis_verteiler, 'stats', statistiken_erstellen)
+mempool_melder = ÄnderungsMelder(
+    ereignis_verteiler, 'mempool', lambda: {'anzahl_offene_transaktionen': len(blockchain.mempool)},
+    intervall=EREIGNIS_INTERVALL
+)
+blockchain.registriere_index(BlockEreignisse(ereignis_verteiler, bei_änderung=statistik_melder.anstoßen))
+
+# Werte, die erst beim Abruf von /metrics ermittelt werden
+metriken.messwert('blockchain_mempool_transaktionen', 'Offene Transaktionen im Mempool.', funktion=lambda: len(blockchain.mempool))
+metriken.messwert('blockchain_bloecke', 'Anzahl Blöcke der eigenen Chain.', funktion=lambda: blockchain.schnappschuss().länge)
+metriken.messwert('blockchain_bekannte_nodes', 'Anzahl bekannter Peer-Nodes.', funktion=lambda: len(bekannte_nodes))
+metriken.messwert('blockchain_ereignis_abonnenten', 'Verbundene Abonnenten von /events.', funktion=ereignis_verteiler.anzahl_abonnenten)
+
+@app.before_request
+def anfrage_beginnen():
+    "Eine Methode, die sich den Beginn der Anfrage für die Metriken merkt."
+
+    g.start_zeit = time.perf_counter()
+
+@app.after_request
+def anfrage_beenden(response):
+    "Eine Methode, die die Bearbeitungsdauer der Anfrage pro Endpunkt erfasst."
+
+    start_zeit = g.get('start_zeit')
+    if start_zeit is not None:
+        # Die Route statt des Pfads als Label, damit z.B. jeder Block-Index keine eigene Zeitreihe erzeugt
+        endpunkt = request.url_rule.rule if request.url_rule is not None else 'unbekannt'
+        HTTP_DAUER.beobachten(time.perf_counter() - start_zeit,
+                              endpunkt=endpunkt, methode=request.method, status=response.status_code)
+    return response
+
+def lese_int_parameter(name, standard=None):
+    "Eine Funktion, die einen Query-Parameter als ganze Zahl liest und bei ungültigen Werten einen ValueError wirft."
+
+    wert = request.args.get(name)
+    if wert is None or wert == '':
+        return standard
+    return int(wert)
+
+def bevorzugt_binärformat():
+    "Eine Funktion, die angibt, ob der Client laut Accept-Header das Binärformat statt JSON bevorzugt (ohne Angabe: JSON)."
+
+    return request.accept_mimetypes.best_match([binaerformat.JSON_MIMETYP, binaerformat.MIMETYP]) == binaerformat.MIMETYP
+
+def antwort_streamen(teile, mimetype):
+    "Eine Funktion, die eine gestreamte Antwort erstellt und sie mit gzip komprimiert, wenn der Client das akzeptiert."
+
+    headers = {'Vary': 'Accept, Accept-Encoding'}
+    if GZIP_STUFE > 0 and request.accept_encodings['gzip']:
+        teile = binaerformat.gzip_komprimieren(teile, GZIP_STUFE)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(teile, status=200, mimetype=mimetype, headers=headers)
+
+def block_antwort(block):
+    "Eine Funktion, die einen einzelnen Block im ausgehandelten Format zurückgibt."
+
+    if bevorzugt_binärformat():
+        return antwort_streamen(binaerformat.kodiere_blöcke([block]), binaerformat.MIMETYP)
+    return antwort_streamen([block.als_json_bytes()], binaerformat.JSON_MIMETYP)
+
+def block_daten_aus_antwort(response):
+    "Eine Funktion, die die Blöcke einer Antwort von /chain oder /blocks/... als Liste von Dictionaries zurückgibt, im Binärformat oder als JSON."
+
+    # Nodes ohne Binärformat antworten weiterhin mit JSON
+    if response.headers.get('Content-Type', '').startswith(binaerformat.MIMETYP):
+        _, blöcke = binaerformat.dekodiere_blöcke(response.content)
+        return blöcke
+
+    daten = response.json()
+    return daten['chain'] if 'chain' in daten else [daten]
+
+def lade_blöcke_von_peer(node, von, bis):
+    "Eine Funktion, die die Blöcke von (inklusive) bis (exklusive) seitenweise von einer Peer-Node lädt, bevorzugt im Binärformat."
+
+    blöcke = []
+    while von < bis:
+        response = peer_netzwerk.anfrage(
+            node, 'GET', '/chain',
+            params={'from': von, 'to': bis, 'limit': SYNC_SEITENGRÖSSE},
+            headers={'Accept': binaerformat.ACCEPT}
+        )
+        response.raise_for_status()
+        seite = block_daten_aus_antwort(response)
+        if not seite:
+            break
+
+        blöcke.extend(Block.aus_dictionary(block_daten) for block_daten in seite)
+        von += len(seite)
+
+    return blöcke
+
+def tip_arbeit(tip):
+    "Eine Funktion, die die Arbeit der Chain laut Tip einer Peer-Node zurückgibt oder None, falls sie fehlt (ältere Nodes) oder ungültig ist."
+
+    try:
+        return int(tip['arbeit'], 16)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def hole_tip(node):
+    "Eine Funktion, die Höhe, Hash, Länge und Arbeit der Chain einer Peer-Node abfragt und bei einem unbrauchbaren Tip einen ValueError auslöst."
+
+    response = peer_netzwerk.anfrage(node, 'GET', '/chain/tip')
+    response.raise_for_status()
+    tip = response.json()
+
+    # Ein fehlerhafter Tip soll nur diese Node überspringen und nicht die ganze Konsens-Logik abbrechen
+    länge = tip.get('länge') if isinstance(tip, dict) else None
+    if isinstance(länge, bool) or not isinstance(länge, int) or länge < 1:
+        raise ValueError(f"Ungültige Kettenlänge im Tip von {node}: {länge!r}")
+    if 'arbeit' in tip and tip_arbeit(tip) is None:
+        raise ValueError(f"Ungültige Arbeit im Tip von {node}: {tip['arbeit']!r}")
+
+    # Ob die Node Transaktionen im Binärformat annimmt, steht in ihrem Tip
+    peer_netzwerk.formate_merken(node, tip.get('formate', [binaerformat.JSON_MIMETYP]))
+    return tip
+
+def hat_mehr_arbeit(tip):
+    "Eine Funktion, die prüft, ob die Chain einer Peer-Node laut Tip mehr Arbeit enthält als die eigene; ohne Angabe zählt wie bisher die Länge."
+
+    schnappschuss = blockchain.schnappschuss()
+    arbeit = tip_arbeit(tip)
+    if arbeit is None:
+        return tip['länge'] > schnappschuss.länge
+    return arbeit > schnappschuss.arbeit
+
+def synchronisiere_mit_peer(node, tip=None):
+    "Eine Funktion, die nur die fehlenden Blöcke einer Peer-Node lädt und übernimmt, wenn deren Chain mehr Arbeit enthält."
+
+    # 1. Tip vergleichen: Ist der Peer überhaupt weiter?
+    if tip is None:
+        tip = hole_tip(node)
+    logger.info("Peer %s hat eine Kettenlänge von: %d Blöcken", node, tip['länge'])
+
+    if not hat_mehr_arbeit(tip):
+        return False
+
+    # 2. Gemeinsamen Block über den Block-Locator finden
+    response = peer_netzwerk.anfrage(
+        node, 'POST', '/sync/locator',
+        json={'locator': blockchain.erzeuge_block_locator()}
+    )
+    response.raise_for_status()
+    gemeinsamer_index = response.json().get('gemeinsamer_index')
+    # Ein negativer Anfang würde bei /chain vom Ende her zählen
+    if isinstance(gemeinsamer_index, bool) or not isinstance(gemeinsamer_index, int) or not -1 <= gemeinsamer_index < tip['länge']:
+        raise ValueError(f"Ungültiger gemeinsamer Block von {node}: {gemeinsamer_index!r}")
+    logger.info("Gemeinsamer Block mit %s bei Index %d. Lade %d Blöcke.", node, gemeinsamer_index, tip['länge'] - gemeinsamer_index - 1)
+
+    # 3. Nur die fehlenden Blöcke laden, prüfen und übernehmen, falls die Chain dadurch mehr Arbeit enthält
+    neue_blöcke = lade_blöcke_von_peer(node, gemeinsamer_index + 1, tip['länge'])
+    if blockchain.ersetze_chain_ab(gemeinsamer_index, neue_blöcke):
+        logger.info("Erhaltene Kette ist gültig und wird übernommen.")
+        SYNCHRONISATIONEN.erhöhen(ergebnis='übernommen')
+        return True
+
+    logger.info("Erhaltene Kette ist ungültig oder enthält nicht mehr Arbeit.")
+    SYNCHRONISATIONEN.erhöhen(ergebnis='abgelehnt')
+    return False
+
+def melde_synchronisationsfehler(node, fehler):
+    "Eine Funktion, die einen Fehler bei der Synchronisation mit einer Peer-Node protokolliert und zählt."
+
+    if isinstance(fehler, requests.exceptions.Timeout):
+        logger.warning("Timeout bei der Anfrage an Node %s", node)
+    else:
+        logger.warning("Fehler bei der Anfrage an Node %s: %s", node, fehler)
+    SYNCHRONISATIONEN.erhöhen(ergebnis='fehler')
+
 def konsens_logik():
 
-    ersetzt = False
-    maximale_lange = len(blockchain.chain)
-    neue_chain = None
+    with KONSENS_DAUER.messen():
+        ergebnis = _konsens_durchführen()
+    KONSENS_ERGEBNISSE.erhöhen(ergebnis='ersetzt' if ergebnis['ersetzt'] else 'unverändert')
+    return ergebnis
 
-    print("Starte Konsens-Logik... Aktuelle Kettenlänge:", maximale_lange)
+def _konsens_durchführen():
 
-    # Jede bekannte Node abfragen
-    for node in bekannte_nodes:
-        try:
-            print(f"Abfrage der Node {node}...")
-            response = requests.get(f'{node}/chain', timeout=5) # Anfrage mit Timeout von 5 Sekunden
-
-            if response.status_code == 200:
-                daten = response.json()
-                erhaltene_chain = daten['chain']
-                erhaltene_länge = daten['länge']
-
-                print(f"Peer hat eine Kettenlänge von: {erhaltene_länge} Blöcken")
-
-                print(f"Erhaltene Kettenlänge von {node}: {erhaltene_länge}")
-
-                # Überprüfen, ob die erhaltene Chain länger ist
-                if erhaltene_länge > maximale_lange:
-                    print("Erhaltene Kette ist länger. Überprüfe Gültigkeit...")
-
-                    # Chain nachbauen und anschließend validieren
-                    temporäre_chain = []
-                    for block_daten in erhaltene_chain:
-                        block = Block(
-                            index=block_daten['index'],
-                            zeitstempel=block_daten['zeitstempel'],
-                            daten=block_daten['daten'],
-                            vorheriger_hash=block_daten['vorheriger_hash'],
-                            nonce=block_daten['nonce']
-                        )
-                        block.hash = block_daten['hash']
-                        temporäre_chain.append(block)
-
-                    # Valide ?
-                    if blockchain.ist_erhaltene_chain_valide(temporäre_chain):
-                        maximale_lange = erhaltene_länge
-                        neue_chain = temporäre_chain
-                        ersetzt = True
-                        print("Erhaltene Kette ist gültig und wird übernommen.")
-                    else:
-                        print("Erhaltene Kette ist ungültig.")
-
-        except requests.exceptions.Timeout:
-            print(f"Timeout bei der Anfrage an Node {node}")
-        except Exception as e:
-            print(f"Fehler bei der Anfrage an Node {node}: {e}")
+    ersetzt = False
+
+    logger.info("Starte Konsens-Logik... Aktuelle Kettenlänge: %d", blockchain.schnappschuss().länge)
+
+    # Tips aller bekannten Nodes gleichzeitig abfragen
+    tips = {}
+    for node, (tip, fehler) in peer_netzwerk.an_alle_parallel(hole_tip).items():
+        if isinstance(fehler, requests.exceptions.Timeout):
+            logger.warning("Timeout bei der Anfrage an Node %s", node)
+        elif fehler is not None:
+            logger.warning("Fehler bei der Anfrage an Node %s: %s", node, fehler)
+        else:
+            tips[node] = tip
+
+    # Nur mit Nodes synchronisieren, die weiter sind; deren Chains werden gleichzeitig geladen und geprüft.
+    # Die Übernahme unter dem Lock der Blockchain lässt dabei nur eine Chain zu, die mehr Arbeit als die aktuelle enthält.
+    kandidaten = {node: tip for node, tip in tips.items() if hat_mehr_arbeit(tip)}
+    for node, (übernommen, fehler) in peer_netzwerk.an_alle_parallel(
+            lambda node: synchronisiere_mit_peer(node, kandidaten[node]), nodes=kandidaten).items():
+        if übernommen:
+            ersetzt = True
+        elif fehler is not None:
+            melde_synchronisationsfehler(node, fehler)
+
+    # Hat eine leichtere Chain eine schwerere während deren Prüfung verdrängt, wird die schwerste einmal nachgeladen
+    if kandidaten:
+        schwerster_node = max(kandidaten, key=lambda node: (tip_arbeit(kandidaten[node]) or 0, kandidaten[node]['länge']))
+        if hat_mehr_arbeit(kandidaten[schwerster_node]):
+            try:
+                if synchronisiere_mit_peer(schwerster_node, kandidaten[schwerster_node]):
+                    ersetzt = True
+            except Exception as e:
+                melde_synchronisationsfehler(schwerster_node, e)
 
     if ersetzt:
-        blockchain.chain = neue_chain
-        print("Die aktuelle Chain wurde durch die neue Chain ersetzt.")
+        # Ein laufender Schürf-Auftrag baut auf dem alten Tip auf und ist damit hinfällig
+        schürf_warteschlange.aktuellen_abbrechen("Neuer Block von einer Peer-Node erhalten.")
+        logger.info("Die aktuelle Chain wurde durch die neue Chain ersetzt.")
         return {
             'nachricht': "Die aktuelle Chain wurde durch die neue Chain ersetzt.",
-            'länge': len(blockchain.chain),
+            'länge': blockchain.schnappschuss().länge,
             'ersetzt': True
         }
     else:
-        print("Die aktuelle Chain ist die längste. Keine Änderungen vorgenommen.")
+        logger.info("Die aktuelle Chain enthält die meiste Arbeit. Keine Änderungen vorgenommen.")
         return {
-            'nachricht': "Die aktuelle Chain ist die längste. Keine Änderungen vorgenommen.",
-            'länge': len(blockchain.chain),
+            'nachricht': "Die aktuelle Chain enthält die meiste Arbeit. Keine Änderungen vorgenommen.",
+            'länge': blockchain.schnappschuss().länge,
             'ersetzt': False
         }
         
 def neue_transaktion_senden(transaktion):
-    "Eine Methode, die eine neue Transaktion an alle bekannten Nodes sendet."
+    "Eine Methode, die eine neue Transaktion zum gebündelten Senden an alle bekannten Nodes vormerkt."
+
+    neue_transaktionen_senden([transaktion])
+
+def neue_transaktionen_senden(transaktionen):
+    "Eine Methode, die neue Transaktionen zum gebündelten Senden an alle bekannten Nodes vormerkt."
 
     # kennt die Node überhaupt andere Nodes?
     if not bekannte_nodes:
-        print("Keine bekannten Nodes vorhanden. Transaktion wird nicht gesendet.")
+        logger.debug("Keine bekannten Nodes vorhanden. Transaktionen werden nicht gesendet.")
         return
-    
-    for node in bekannte_nodes:
-        try:
-            response = requests.post(
-                f"{node}/transactions/receive",
-                json=transaktion,
-                timeout=5
-            )
-            if response.status_code == 201:
-                print(f"Transaktion erfolgreich an Node {node} gesendet.")
-            else:
-                print(f"Fehler beim Senden der Transaktion an Node {node}: {response.status_code}")
-        except Exception as e:
-            print(f"Fehler beim Senden der Transaktion an Node {node}: {e}")
 
-def neuen_block_senden():
-    "Eine Methode, die den neu geminten Block an alle bekannten Nodes sendet."
+    transaktions_bündler.hinzufügen_mehrere(transaktionen)
+
+def neuen_block_senden(block):
+    "Eine Methode, die einen neuen Block im Hintergrund parallel an alle bekannten Nodes sendet, damit diese ihn direkt anhängen können."
 
     # kennt die Node überhaupt andere Nodes?
     if not bekannte_nodes:
-        print("Keine bekannten Nodes vorhanden. Block wird nicht gesendet.")
+        logger.info("Keine bekannten Nodes vorhanden. Block wird nicht gesendet.")
         return
-    
-    for node in bekannte_nodes:
+
+    binär = b''.join(binaerformat.kodiere_blöcke([block]))
+
+    def inhalt(node):
+        # Nodes ohne Binärformat erhalten die JSON-Bytes des Blocks (ältere Nodes starten damit wie bisher die Konsens-Logik)
+        if peer_netzwerk.unterstützt_format(node, binaerformat.MIMETYP):
+            return {'data': binär, 'headers': {'Content-Type': binaerformat.MIMETYP}}
+        return {'data': block.als_json_bytes(), 'headers': {'Content-Type': binaerformat.JSON_MIMETYP}}
+
+    peer_netzwerk.an_alle_senden('POST', '/blocks/receive', 200, f"Block {block.index}", anfrage_für=inhalt)
+
+def hole_block_von_peers(block_hash):
+    "Eine Funktion, die einen Block anhand seines Hashs nacheinander bei den bekannten Nodes anfragt und den ersten gefundenen oder None zurückgibt."
+
+    for node in peer_netzwerk.nodes():
         try:
-            response = requests.post(
-                f"{node}/blocks/receive",
-                json={},
-                timeout=5
+            response = peer_netzwerk.anfrage(
+                node, 'GET', f'/blocks/by-hash/{block_hash}', headers={'Accept': binaerformat.ACCEPT}
             )
-            if response.status_code == 200:
-                print(f"Block-Benachrichtigung an Node {node} gesendet.")
-            else:
-                print(f"Fehler beim Senden des Blocks an Node {node}: {response.status_code}")
+            if response.status_code != 200:
+                continue
+            block = Block.aus_dictionary(block_daten_aus_antwort(response)[0])
+            if block.hash == block_hash:
+                return block
         except Exception as e:
-            print(f"Fehler beim Senden des Blocks an Node {node}: {e}")
+            logger.warning("Fehler beim Laden von Block %.16s von Node %s: %s", block_hash, node, e)
+
+    return None
+
+def nach_übernahme(blöcke):
+    "Eine Funktion, die nach dem Anhängen gemeldeter Blöcke den laufenden Schürf-Auftrag abbricht und die Blöcke an die Peers weiterleitet."
+
+    if not blöcke:
+        return
+
+    # Ein laufender Schürf-Auftrag baut auf dem alten Tip auf und ist damit hinfällig
+    schürf_warteschlange.aktuellen_abbrechen("Neuer Block von einer Peer-Node erhalten.")
+
+    # Weiterleiten, damit der Block auch Nodes erreicht, die den Absender nicht kennen; wer ihn schon hat, antwortet mit 'bekannt'
+    for block in blöcke:
+        neuen_block_senden(block)
+
+def waisen_anschließen():
+    "Eine Funktion, die wartende Waisen anhängt, deren Vorgänger inzwischen der Tip ist, und die angehängten Blöcke zurückgibt."
+
+    angehängt = []
+    while True:
+        tip_hash = blockchain.hole_letzten_block().hash
+        for waise in waisen_pool.nachfolger_entnehmen(tip_hash):
+            ergebnis = blockchain.füge_empfangenen_block_hinzu(waise)
+            EMPFANGENE_BLÖCKE.erhöhen(ergebnis=ergebnis)
+            if ergebnis == 'angehängt':
+                angehängt.append(waise)
+                break
+        else:
+            return angehängt
+
+def block_annehmen(block):
+    "Eine Funktion, die einen gemeldeten Block an den Tip anhängt oder als Waise vormerkt und das Ergebnis zurückgibt."
+
+    ergebnis = blockchain.füge_empfangenen_block_hinzu(block)
+    EMPFANGENE_BLÖCKE.erhöhen(ergebnis=ergebnis)
+
+    if ergebnis == 'angehängt':
+        nach_übernahme([block] + waisen_anschließen())
+    elif ergebnis == 'waise' and waisen_pool.hinzufügen(block):
+        logger.info("Vorgänger von Block %d ist unbekannt. Lade fehlende Vorgänger nach.", block.index)
+        waisen_auflöser.submit(waise_auflösen, block)
+
+    return ergebnis
+
+def waise_auflösen(waise):
+    "Eine Funktion, die die fehlenden Vorgänger einer Waise einzeln nachlädt und die Blöcke übernimmt, wenn die Chain dadurch mehr Arbeit enthält; fehlen zu viele, wird über die Konsens-Logik synchronisiert."
+
+    try:
+        # Die Waise kann inzwischen über ihren eingetroffenen Vorgänger angeschlossen worden sein
+        if waise.hash not in waisen_pool:
+            return
+
+        # Rückwärts nachladen, bis ein Vorgänger in der eigenen Chain gefunden ist
+        zweig = [waise]
+        vorgänger = blockchain.hole_block_nach_hash(waise.vorheriger_hash)
+        while vorgänger is None and len(zweig) <= MAX_VORGÄNGER_NACHLADEN:
+            fehlender_hash = zweig[-1].vorheriger_hash
+            block = waisen_pool.hole(fehlender_hash) or hole_block_von_peers(fehlender_hash)
+            if block is None:
+                break
+            zweig.append(block)
+            vorgänger = blockchain.hole_block_nach_hash(block.vorheriger_hash)
+        zweig.reverse()
+
+        for block in zweig:
+            waisen_pool.entfernen(block.hash)
+
+        # Während des Nachladens bereits auf anderem Weg angehängte Blöcke überspringen
+        while zweig and blockchain.hole_block_nach_hash(zweig[0].hash) is not None:
+            vorgänger = zweig.pop(0)
+        if not zweig:
+            nach_übernahme(waisen_anschließen())
+            return
+
+        if vorgänger is None:
+            logger.info("Vorgänger von Block %d nicht gefunden. Synchronisiere ab dem gemeinsamen Block.", waise.index)
+            konsens_logik()
+        elif blockchain.ersetze_chain_ab(vorgänger.index, zweig):
+            nach_übernahme(zweig)
+
+        nach_übernahme(waisen_anschließen())
+    except Exception as e:
+        logger.exception("Fehler beim Nachladen der Vorgänger von Block %d: %s", waise.index, e)
+
+# Schürf-Aufträge (manuell und automatisch) werden nacheinander im Hintergrund abgearbeitet
+schürf_warteschlange = SchürfWarteschlange(blockchain, nach_dem_schürfen=neuen_block_senden)
 
 def automatisch_transaktionen_schürfen_thread():
     "Ein Thread, der automatisch Blöcke schürft, wenn genügend Transaktionen im Mempool sind oder eine bestimmte Zeit vergangen ist."
 
-    print("Automatischer Schürf-Thread gestartet.")
+    logger.info("Automatischer Schürf-Thread gestartet.")
 
     while True:
         time.sleep(30) # Wartezeit zwischen den Prüfungen
 
         try:
+            # Läuft bereits ein Schürf-Auftrag, wird kein weiterer eingereiht
+            if schürf_warteschlange.ist_beschäftigt():
+                continue
+
             # Bedingung 1: Mempool-Größe ist größer als oder gleich 5
             if len(blockchain.mempool) >= 5:
-                print("Mempool hat genügend Transaktionen. Starte automatisches Schürfen...")
-                blockchain.schürfe_offene_transaktionen()
-                neuen_block_senden()
+                logger.info("Mempool hat genügend Transaktionen. Starte automatisches Schürfen...")
+                schürf_warteschlange.einreihen('automatisch')
                 continue
 
             # Bedingung 2: Älteste Transaktion ist älter als 2 Minuten
             if blockchain.mempool:
-                älteste_transaktion = blockchain.mempool[0]
+                älteste_transaktion = blockchain.mempool.älteste()
                 alter = time.time() - älteste_transaktion.get('zeitstempel', time.time())
 
                 if alter >= 120: # 2 Minuten
-                    print("Automatisches Mining: Transaktionen sind älter als 2 Minuten.")
-                    blockchain.schürfe_offene_transaktionen()
-                    neuen_block_senden()
+                    logger.info("Automatisches Mining: Transaktionen sind älter als 2 Minuten.")
+                    schürf_warteschlange.einreihen('automatisch')
 
         except Exception as e:
-            print(f"Fehler im automatischen Schürf-Thread: {e}")
+            logger.exception("Fehler im automatischen Schürf-Thread: %s", e)
 
 def mit_peer_nodes_synchronisieren_thread():
     "Ein Thread, der die Blockchain regelmäßig mit den Peer-Nodes synchronisiert."
 
-    print("Synchronisations-Thread mit Peer-Nodes gestartet.")
+    logger.info("Synchronisations-Thread mit Peer-Nodes gestartet.")
 
     time.sleep(30)  # Erste Wartezeit vor der ersten Synchronisation
 
@@ -175,11 +576,11 @@ def mit_peer_nodes_synchronisieren_thread():
         time.sleep(60) # Wartezeit zwischen den Synchronisationen
 
         try:
-            print("Starte Synchronisation mit Peer-Nodes...")
+            logger.info("Starte Synchronisation mit Peer-Nodes...")
             ergebnis = konsens_logik()
-            print(f"Synchronisation abgeschlossen: {ergebnis['nachricht']}")
+            logger.info("Synchronisation abgeschlossen: %s", ergebnis['nachricht'])
         except Exception as e:
-            print(f"Fehler im Synchronisations-Thread: {e}")
+            logger.exception("Fehler im Synchronisations-Thread: %s", e)
 
 
 
@@ -187,23 +588,101 @@ def mit_peer_nodes_synchronisieren_thread():
 def health():
     "Eine Methode, die den Gesundheitszustand der Node zurückgibt"
 
+    # Mit ?vollstaendig=true wird die gesamte Chain statt nur der neuen Blöcke geprüft
+    vollständig = request.args.get('vollstaendig', 'false').lower() == 'true'
+
     return jsonify({
         'status': 'online',
-        'blöcke': len(blockchain.chain),
+        'blöcke': blockchain.schnappschuss().länge,
         'offene_transaktionen': len(blockchain.mempool),
         'bekannte_nodes': len(bekannte_nodes),
-        'valide': blockchain.ist_chain_valide()
-    }, 200)
+        'valide': blockchain.ist_chain_valide(vollständig=vollständig)
+    }), 200
 
 @app.route('/chain', methods=['GET'])
 def chain_ausgeben():
-    "Eine Methode, die die gesamte Blockchain zurückgibt"
+    "Eine Methode, die die Blockchain oder mit ?from=&to=&limit= einen Ausschnitt davon zurückgibt"
+
+    # Die gesamte Antwort bezieht sich auf einen Stand, auch wenn währenddessen Blöcke hinzukommen
+    schnappschuss = blockchain.schnappschuss()
+    länge = schnappschuss.länge
+
+    # from ist inklusive, to exklusive; negative Werte zählen wie in Python vom Ende der Chain
+    try:
+        von = lese_int_parameter('from', 0)
+        bis = lese_int_parameter('to', länge)
+        limit = lese_int_parameter('limit')
+    except ValueError:
+        return jsonify({'nachricht': 'from, to und limit müssen ganze Zahlen sein.'}), 400
+
+    von, bis, _ = slice(von, bis).indices(länge)
+    bis = max(von, bis)
+    if limit is not None:
+        bis = min(bis, von + max(limit, 0))
+
+    if bevorzugt_binärformat():
+        blöcke = (schnappschuss.chain[index] for index in range(von, bis))
+        kopf = {'länge': länge, 'von': von, 'bis': bis}
+        return antwort_streamen(binaerformat.kodiere_blöcke(blöcke, kopf), binaerformat.MIMETYP)
+
+    # Die Blöcke werden als fertige JSON-Bytes direkt aus dem Block-Speicher gestreamt
+    def erzeuge_antwort():
+        yield b'{"chain": ['
+        for index, block_bytes in enumerate(blockchain.iteriere_block_bytes(von, bis, schnappschuss)):
+            yield block_bytes if index == 0 else b', ' + block_bytes
+        yield (b'], ' + json.dumps('länge').encode() + b': ' + str(länge).encode() +
+               b', "von": ' + str(von).encode() + b', "bis": ' + str(bis).encode() + b'}')
+
+    return antwort_streamen(erzeuge_antwort(), binaerformat.JSON_MIMETYP)
+
+@app.route('/chain/tip', methods=['GET'])
+def tip_ausgeben():
+    "Eine Methode, die Höhe und Hash des letzten Blocks sowie die gesamte Arbeit der Chain zurückgibt."
+
+    schnappschuss = blockchain.schnappschuss()
+    letzter_block = schnappschuss.chain[schnappschuss.länge - 1]
+    return jsonify({
+        'höhe': letzter_block.index,
+        'hash': letzter_block.hash,
+        'länge': letzter_block.index + 1,
+        'arbeit': format(schnappschuss.arbeit, 'x'),
+        'formate': [binaerformat.JSON_MIMETYP, binaerformat.MIMETYP]
+    }), 200
+
+@app.route('/sync/locator', methods=['POST'])
+def locator_abgleichen():
+    "Eine Methode, die zu einem Block-Locator einer anderen Node den höchsten gemeinsamen Block zurückgibt."
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('locator'), list):
+        return jsonify({'nachricht': 'Ungültige Anfrage. Kein Locator angegeben.'}), 400
+    if not all(isinstance(block_hash, str) for block_hash in data['locator']):
+        return jsonify({'nachricht': 'Ungültiger Locator. Erwartet wird eine Liste von Block-Hashes.'}), 400
 
-    chain_daten = [block.in_dictionary_umwandeln() for block in blockchain.chain]
     return jsonify({
-        'chain': chain_daten,
-        'länge': len(chain_daten)
-    }, 200)
+        'gemeinsamer_index': blockchain.finde_locator_block(data['locator']),
+        'länge': blockchain.schnappschuss().länge
+    }), 200
+
+@app.route('/blocks/<int:index>', methods=['GET'])
+def block_ausgeben(index):
+    "Eine Methode, die den Block an der angegebenen Position zurückgibt."
+
+    block = blockchain.hole_block(index)
+    if block is None:
+        return jsonify({'nachricht': f'Block {index} existiert nicht.'}), 404
+
+    return block_antwort(block)
+
+@app.route('/blocks/by-hash/<block_hash>', methods=['GET'])
+def block_nach_hash_ausgeben(block_hash):
+    "Eine Methode, die den Block mit dem angegebenen Hash zurückgibt."
+
+    block = blockchain.hole_block_nach_hash(block_hash)
+    if block is None:
+        return jsonify({'nachricht': 'Kein Block mit diesem Hash gefunden.'}), 404
+
+    return block_antwort(block)
 
 @app.route('/organizations', methods=['GET'])
 def organisationen_ausgeben():
@@ -213,100 +692,316 @@ def organisationen_ausgeben():
         'organisationen': ORGANISATIONEN
     }, 200)
 
-@app.route('/transactions/new', methods=['POST'])
-def neue_transaktion():
-    "Eine Methode, die eine neue Transaktion entgegennimmt und hinzufügt."
+def spenden_seite(spenden, gesamtanzahl, offset, limit):
+    "Eine Funktion, die eine Seite von Spenden mit den Angaben zur Seitenaufteilung zusammenstellt."
+
+    return jsonify({
+        'spenden': spenden,
+        'gesamtanzahl': gesamtanzahl,
+        'offset': offset,
+        'limit': limit
+    }), 200
+
+def lese_seitenparameter():
+    "Eine Funktion, die offset und limit (höchstens 500) aus den Query-Parametern liest."
+
+    offset = max(lese_int_parameter('offset', 0), 0)
+    limit = min(max(lese_int_parameter('limit', 50), 0), 500)
+    return offset, limit
+
+@app.route('/organizations/<name>/donations', methods=['GET'])
+def spenden_an_organisation(name):
+    "Eine Methode, die die Spenden an eine Organisation seitenweise (neueste zuerst) zurückgibt."
+
+    if name not in ORGANISATIONEN:
+        return jsonify({'nachricht': 'Unbekannte Organisation.'}), 404
+
+    try:
+        offset, limit = lese_seitenparameter()
+    except ValueError:
+        return jsonify({'nachricht': 'offset und limit müssen ganze Zahlen sein.'}), 400
+
+    spenden, gesamtanzahl = spenden_statistik.spenden_an(name, offset, limit)
+    return spenden_seite(spenden, gesamtanzahl, offset, limit)
+
+@app.route('/senders/<name>/donations', methods=['GET'])
+def spenden_von_sender(name):
+    "Eine Methode, die die Spenden eines Senders seitenweise (neueste zuerst) zurückgibt."
+
+    try:
+        offset, limit = lese_seitenparameter()
+    except ValueError:
+        return jsonify({'nachricht': 'offset und limit müssen ganze Zahlen sein.'}), 400
+
+    spenden, gesamtanzahl = spenden_statistik.spenden_von(name, offset, limit)
+    return spenden_seite(spenden, gesamtanzahl, offset, limit)
+
+def erstelle_transaktion(data):
+    "Eine Funktion, die aus den Angaben eines Spenders eine neue Transaktion erstellt und bei ungültigen Angaben einen ValueError auslöst."
 
-    data = request.get_json()
-    
     # Validierung
 
     erforderliche_felder = ['sender', 'empfänger', 'betrag']
-    if not all(feld in data for feld in erforderliche_felder):
-        return jsonify({'nachricht': 'Ungültige Transaktion. Fehlende Felder.'}, 400)
+    if not isinstance(data, dict) or not all(feld in data for feld in erforderliche_felder):
+        raise ValueError('Ungültige Transaktion. Fehlende Felder.')
 
     # Ist Betrag positiv?
     try:
         betrag = float(data['betrag'])
-        if betrag <= 0:
-            return jsonify({'nachricht': 'Der Betrag muss positiv sein.'}, 400)
-    except ValueError:
-        return jsonify({'nachricht': 'Der Betrag muss eine Zahl sein.'}, 400)
-    
-    transaktion = {
+    except (TypeError, ValueError):
+        raise ValueError('Der Betrag muss eine Zahl sein.')
+    if betrag <= 0:
+        raise ValueError('Der Betrag muss positiv sein.')
+
+    return {
         'sender': data['sender'] if data['sender'] else "Anoymer Spender",
         'empfänger': data['empfänger'],
         'betrag': betrag,
         'zeitstempel': time.time()
     }
 
-    blockchain.füge_transaktion_hinzu(transaktion)
+def lese_transaktions_liste():
+    "Eine Funktion, die die Liste der Transaktionen aus dem Body einer Batch-Anfrage liest (als JSON-Liste, unter 'transaktionen' oder im Binärformat) oder None zurückgibt."
+
+    if request.mimetype == binaerformat.MIMETYP:
+        try:
+            return binaerformat.dekodiere_transaktionen(request.get_data())
+        except ValueError as e:
+            logger.warning("Ungültiges Transaktionsbündel im Binärformat: %s", e)
+            return None
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('transaktionen')
+    return data if isinstance(data, list) else None
+
+def batch_antwort(ergebnisse):
+    "Eine Funktion, die die Ergebnisse pro Transaktion einer Batch-Anfrage mit einer Zusammenfassung zurückgibt."
+
+    aufgenommen = sum(1 for ergebnis in ergebnisse if ergebnis['status'] == 'aufgenommen')
+    return jsonify({
+        'ergebnisse': ergebnisse,
+        'aufgenommen': aufgenommen,
+        'abgelehnt': len(ergebnisse) - aufgenommen
+    }), 200
+
+@app.route('/transactions/new', methods=['POST'])
+def neue_transaktion():
+    "Eine Methode, die eine neue Transaktion entgegennimmt und hinzufügt."
+
+    try:
+        transaktion = erstelle_transaktion(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'nachricht': str(e)}), 400
+
+    if not blockchain.füge_transaktion_hinzu(transaktion):
+        return jsonify({'nachricht': 'Transaktion abgelehnt.'}), 400
 
     neue_transaktion_senden(transaktion)
-    print(f"Neue Transaktion erstellt: {transaktion['sender']} --> {transaktion['empfänger']} : {transaktion['betrag']}")
+    logger.debug("Neue Transaktion erstellt: %s --> %s : %s", transaktion['sender'], transaktion['empfänger'], transaktion['betrag'])
 
     return jsonify({
         'nachricht': 'Transaktion erfolgreich hinzugefügt.',
-        'transaktion': transaktion
+        'transaktion': transaktion,
+        'txid': transaktions_id(transaktion)
     }), 201
 
 @app.route('/transactions/receive', methods=['POST'])
 def empfange_transaktion():
     "Eine Methode, die eine empfangene Transaktion von einer anderen Node verarbeitet."
     
-    data = request.get_json()
+    data = request.get_json(silent=True)
 
-    erforderliche_felder = ['sender', 'empfänger', 'betrag']
-    if not all(feld in data for feld in erforderliche_felder):
-        return jsonify({'nachricht': 'Ungültige Transaktion. Fehlende Felder.'}, 400)
+    grund = prüfe_transaktion(data)
+    if grund is not None:
+        return jsonify({'nachricht': f'Ungültige Transaktion. {grund}'}), 400
 
-    # Duplikate vermeiden
+    # Duplikate über den Hash-Index des Mempools vermeiden (O(1))
+    if transaktions_id(data) in blockchain.mempool:
+        logger.debug("Duplikat-Transaktion ignoriert")
+        return jsonify({'nachricht': 'Duplikat-Transaktion ignoriert.'}), 200
+        
+    if not blockchain.füge_transaktion_hinzu(data):
+        return jsonify({'nachricht': 'Transaktion abgelehnt.'}), 400
+    logger.debug("Empfangene Transaktion hinzugefügt: %s --> %s : %s", data['sender'], data['empfänger'], data['betrag'])
 
-    for transaktion in blockchain.mempool:
-        if (transaktion['sender'] == data['sender'] and
-            transaktion['empfänger'] == data['empfänger'] and
-            transaktion['betrag'] == data['betrag'] and
-            abs(transaktion['zeitstempel'] - data['zeitstempel']) < 1):
+    return jsonify({'nachricht': 'Transaktion erfolgreich empfangen und hinzugefügt.'}), 201
 
-            print(f"Duplikat-Transaktion ignoriert")
-            return jsonify({'nachricht': 'Duplikat-Transaktion ignoriert.'}, 200)
-        
-    blockchain.füge_transaktion_hinzu(data)
-    print(f"Empfangene Transaktion hinzugefügt: {data['sender']} --> {data['empfänger']} : {data['betrag']}")
+@app.route('/accounts/<name>', methods=['GET'])
+def konto_ausgeben(name):
+    "Eine Methode, die Summen, Guthaben und offene Transaktionen eines Senders oder Empfängers sowie seine letzten Spenden und Eingänge zurückgibt."
 
-    return jsonify({'nachricht': 'Transaktion erfolgreich empfangen und hinzugefügt.'}, 201)
+    konto = konten_index.konto(name)
+    offen, anzahl_offen = blockchain.mempool.ausgehend(name)
+    if konto is None and not anzahl_offen:
+        return jsonify({'nachricht': 'Unbekanntes Konto.'}), 404
+
+    try:
+        offset, limit = lese_seitenparameter()
+    except ValueError:
+        return jsonify({'nachricht': 'offset und limit müssen ganze Zahlen sein.'}), 400
+
+    konto = konto or LEERES_KONTO
+    guthaben = konto.erhalten - konto.gespendet
+    spenden, _ = spenden_statistik.spenden_von(name, offset, limit)
+    eingänge, _ = spenden_statistik.spenden_an(name, offset, limit)
+    return jsonify({
+        'name': name,
+        'gespendet': konto.gespendet,
+        'erhalten': konto.erhalten,
+        'guthaben': guthaben,
+        'anzahl_gespendet': konto.anzahl_gespendet,
+        'anzahl_erhalten': konto.anzahl_erhalten,
+        'offen_ausgehend': offen,
+        'anzahl_offen': anzahl_offen,
+        # Nur Konten mit Eingängen werden begrenzt, alle anderen gelten als externe Spender
+        'begrenzt': KONTOSTAND_PRÜFEN and konto.anzahl_erhalten > 0,
+        'verfügbar': guthaben - offen,
+        'spenden': spenden,
+        'eingänge': eingänge,
+        'offset': offset,
+        'limit': limit
+    }), 200
+
+@app.route('/transactions/<txid>/proof', methods=['GET'])
+def transaktions_beweis(txid):
+    "Eine Methode, die den Merkle-Pfad zurückgibt, mit dem sich die Aufnahme einer Transaktion in einen Block ohne die übrigen Transaktionen prüfen lässt."
+
+    block_index = transaktions_index.finde_block(txid)
+    block = blockchain.hole_block(block_index) if block_index is not None else None
+    txids = [transaktions_id(transaktion) for transaktion in block.transaktionen] if block is not None else []
+
+    if txid not in txids:
+        return jsonify({
+            'nachricht': 'Die Transaktion ist in keinem Block enthalten.',
+            'im_mempool': txid in blockchain.mempool
+        }), 404
+
+    position = txids.index(txid)
+    return jsonify({
+        'txid': txid,
+        'transaktion': block.transaktionen[position],
+        'block_index': block.index,
+        'block_hash': block.hash,
+        # Der Block-Kopf genau so, wie er gehasht wurde, damit der Client den Hash selbst nachrechnen kann
+        'kopf': block.kopf_bytes().decode(),
+        'merkle_wurzel': block.merkle_wurzel,
+        'position': position,
+        'pfad': erzeuge_merkle_beweis(txids, position),
+        'bestätigungen': blockchain.schnappschuss().länge - block.index
+    }), 200
+
+@app.route('/transactions/batch', methods=['POST'])
+def neue_transaktionen():
+    "Eine Methode, die mehrere neue Transaktionen auf einmal entgegennimmt und das Ergebnis pro Transaktion zurückgibt."
+
+    einträge = lese_transaktions_liste()
+    if einträge is None:
+        return jsonify({'nachricht': 'Erwartet wird eine Liste von Transaktionen.'}), 400
+    if len(einträge) > MAX_BATCH_GRÖSSE:
+        return jsonify({'nachricht': f'Höchstens {MAX_BATCH_GRÖSSE} Transaktionen pro Anfrage.'}), 413
+
+    ergebnisse = [None] * len(einträge)
+    positionen = []
+    transaktionen = []
+    for position, eintrag in enumerate(einträge):
+        try:
+            transaktionen.append(erstelle_transaktion(eintrag))
+            positionen.append(position)
+        except ValueError as e:
+            ergebnisse[position] = {'index': position, 'status': 'ungültig', 'nachricht': str(e)}
+
+    aufgenommene = []
+    for position, transaktion, (txid, status) in zip(positionen, transaktionen, blockchain.füge_transaktionen_hinzu(transaktionen)):
+        ergebnisse[position] = {'index': position, 'status': status, 'txid': txid, 'transaktion': transaktion}
+        if status == 'aufgenommen':
+            aufgenommene.append(transaktion)
+
+    if aufgenommene:
+        neue_transaktionen_senden(aufgenommene)
+
+    return batch_antwort(ergebnisse)
+
+@app.route('/transactions/receive/batch', methods=['POST'])
+def empfange_transaktionen():
+    "Eine Methode, die ein Bündel von Transaktionen einer anderen Node verarbeitet und das Ergebnis pro Transaktion zurückgibt."
+
+    einträge = lese_transaktions_liste()
+    if einträge is None:
+        return jsonify({'nachricht': 'Erwartet wird eine Liste von Transaktionen.'}), 400
+    if len(einträge) > MAX_BATCH_GRÖSSE:
+        return jsonify({'nachricht': f'Höchstens {MAX_BATCH_GRÖSSE} Transaktionen pro Anfrage.'}), 413
+
+    ergebnisse = [
+        {'index': position, 'status': status, 'txid': txid}
+        for position, (txid, status) in enumerate(blockchain.füge_transaktionen_hinzu(einträge))
+    ]
+    return batch_antwort(ergebnisse)
 
 @app.route('/mine', methods=['POST'])
 def manueller_schürf_start():
-    "Eine Methode, die das Schürfen manuell startet."
+    "Eine Methode, die einen Schürf-Auftrag einreiht und sofort dessen ID zurückgibt."
     
     # sind Transaktionen im Mempool?
     if not blockchain.mempool:
-        return jsonify({'nachricht': 'Keine offenen Transaktionen zum Schürfen.'}, 400)
+        return jsonify({'nachricht': 'Keine offenen Transaktionen zum Schürfen.'}), 400
     
-    print("Manuelles Schürfen gestartet")
-    neuer_block = blockchain.schürfe_offene_transaktionen()
-    neuen_block_senden()
+    logger.info("Manuelles Schürfen gestartet")
+    auftrag = schürf_warteschlange.einreihen('manuell')
 
     return jsonify({
-        'nachricht': 'Neuer Block erfolgreich geschürft.',
-        'block': neuer_block.in_dictionary_umwandeln()
-    }), 200
+        'nachricht': 'Schürf-Auftrag eingereiht.',
+        'auftrag': auftrag.in_dictionary_umwandeln(),
+        'status_url': f'/mine/{auftrag.id}'
+    }), 202
+
+@app.route('/mine/<auftrag_id>', methods=['GET'])
+def schürf_auftrag_status(auftrag_id):
+    "Eine Methode, die Status und Fortschritt eines Schürf-Auftrags zurückgibt."
+
+    auftrag = schürf_warteschlange.hole(auftrag_id)
+    if auftrag is None:
+        return jsonify({'nachricht': 'Unbekannter Schürf-Auftrag.'}), 404
+
+    return jsonify(auftrag.in_dictionary_umwandeln()), 200
+
+def lese_empfangenen_block():
+    "Eine Funktion, die den Block aus dem Body einer Block-Meldung liest (Binärformat oder JSON) oder None zurückgibt, wenn keiner mitgesendet wurde."
+
+    if request.mimetype == binaerformat.MIMETYP:
+        _, blöcke = binaerformat.dekodiere_blöcke(request.get_data())
+        if len(blöcke) != 1:
+            raise ValueError("Erwartet wird genau ein Block.")
+        return Block.aus_dictionary(blöcke[0])
+
+    daten = request.get_json(silent=True)
+    return Block.aus_dictionary(daten) if daten else None
 
 @app.route('/blocks/receive', methods=['POST'])
 def empfange_block_benachrichtigung():
-    "Eine Methode, die eine Benachrichtigung über einen neuen Block von einer anderen Node verarbeitet."
+    "Eine Methode, die einen von einer anderen Node gesendeten Block gegen den eigenen Tip prüft und direkt anhängt."
 
-    print("Empfangene Block-Benachrichtigung von Peer-Node.")
-    ergebnis = konsens_logik()
+    try:
+        block = lese_empfangenen_block()
+    except (ValueError, KeyError, TypeError) as e:
+        return jsonify({'nachricht': f'Ungültiger Block: {e}'}), 400
 
-    return jsonify(ergebnis), 200
+    # Ältere Nodes senden nur eine Benachrichtigung ohne Block
+    if block is None:
+        logger.info("Empfangene Block-Benachrichtigung ohne Block von Peer-Node.")
+        return jsonify(konsens_logik()), 200
+
+    ergebnis = block_annehmen(block)
+    return jsonify({
+        'status': ergebnis,
+        'länge': blockchain.schnappschuss().länge
+    }), 400 if ergebnis == 'ungültig' else 200
 
 
 @app.route('/consensus', methods=['POST'])
 def konsens_starten():
     "Eine Methode, die die Konsens-Logik manuell auslöst."
-    print("Manueller Konsens-Start ausgelöst.")
+    logger.info("Manueller Konsens-Start ausgelöst.")
     ergebnis = konsens_logik()
 
     return jsonify(ergebnis), 200
@@ -324,47 +1019,49 @@ def node_registrieren():
     if not node_addresse.startswith('http://'):
         return jsonify({'nachricht': 'Ungültige Node-Adresse. Muss mit http:// beginnen.'}, 400)
     
-    bekannte_nodes.add(node_addresse)
-    print(f"Neue Node registriert: {node_addresse}")
+    peer_netzwerk.hinzufügen(node_addresse)
+    logger.info("Neue Node registriert: %s", node_addresse)
 
     return jsonify({
         'nachricht': 'Node erfolgreich registriert.',
         'gesamtanzahl_nodes': len(bekannte_nodes),
-        'bekannte_nodes': list(bekannte_nodes)}), 201
+        'bekannte_nodes': peer_netzwerk.nodes()}), 201
 
 @app.route('/nodes/list', methods=['GET'])
 def liste_bekannte_nodes():
     "Eine Methode, die die Liste der bekannten Nodes zurückgibt."
 
     return jsonify({
-        'bekannte_nodes': list(bekannte_nodes),
-        'gesamtanzahl_nodes': len(bekannte_nodes)
+        'bekannte_nodes': peer_netzwerk.nodes(),
+        'gesamtanzahl_nodes': len(bekannte_nodes),
+        'statistik': peer_netzwerk.statistik()
     }), 200
 
 @app.route('/stats', methods=['GET'])
 def node_statistiken():
     "Eine Methode, die Statistiken über die Node zurückgibt."
 
-    gesamt_transaktionen = 0.0
-    transaktionen_pro_organisation = {org: 0.0 for org in ORGANISATIONEN}
+    return jsonify(statistiken_erstellen()), 200
 
-    # Durch Blöcke iterrieren
-    for block in blockchain.chain[1:]: # [1:] Genesis-Block überspringen
-        for transaktion in block.transaktionen:
-            betrag = float(transaktion['betrag'])
-            gesamt_transaktionen += betrag
+@app.route('/events', methods=['GET'])
+def ereignisse_streamen():
+    "Eine Methode, die neue Blöcke (block), Neuaufbau der Chain (chain), Statistik- (stats) und Mempool-Änderungen (mempool) als Server-Sent Events streamt."
 
-            empfänger = transaktion['empfänger']
-            if empfänger in transaktionen_pro_organisation:
-                transaktionen_pro_organisation[empfänger] += betrag
+    # Nach einem Verbindungsabbruch schickt der Browser die ID des letzten erhaltenen Ereignisses mit
+    abonnement = ereignis_verteiler.abonnieren(request.headers.get('Last-Event-ID'))
+    if abonnement is None:
+        return jsonify({'nachricht': 'Zu viele verbundene Clients. Bitte später erneut versuchen.'}), 503
 
-    return jsonify({
-        'gesamt_transaktionen': gesamt_transaktionen,
-        'transaktionen_pro_organisation': transaktionen_pro_organisation,
-        'anzahl_blöcke': len(blockchain.chain),
-        'anzahl_offene_transaktionen': len(blockchain.mempool),
-        'chain_valide': blockchain.ist_chain_valide()
-    }), 200
+    return Response(abonnement.nachrichten(), status=200, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metriken_ausgeben():
+    "Eine Methode, die alle Metriken der Node im Prometheus-Textformat zurückgibt."
+
+    return Response(metriken.REGISTRIERUNG.als_text(), status=200, mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     # Starte Threads für automatisches Schürfen und Synchronisation
@@ -373,7 +1070,7 @@ if __name__ == '__main__':
     sync_thread = threading.Thread(target=mit_peer_nodes_synchronisieren_thread, daemon=True)
     sync_thread.start()
 
-    print("Starte Flask-Server auf Port 5000...")
-    print("Blockchain-Node ist online.")
-    print("Genesis Block Hash:", blockchain.chain[0].hash[:16]) # Ausgabe der ersten 16 Zeichen des Hashs
-    app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
+    logger.info("Starte Flask-Server auf Port %d...", PORT)
+    logger.info("Blockchain-Node ist online.")
+    logger.info("Genesis Block Hash: %.16s", blockchain.chain[0].hash) # Ausgabe der ersten 16 Zeichen des Hashs
+    app.run(host='0.0.0.0', port=PORT, debug=False)
\ No newline at end of file
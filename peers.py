@@ -0,0 +1,222 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import binaerformat
+import metriken
+
+logger = logging.getLogger(__name__)
+
+PEER_LATENZ = metriken.histogramm(
+    'blockchain_peer_anfrage_dauer_sekunden', 'Dauer der Anfragen an Peer-Nodes.', labels=('node',)
+)
+PEER_FEHLER = metriken.zähler(
+    'blockchain_peer_fehler_gesamt', 'Fehlgeschlagene Anfragen an Peer-Nodes (Verbindungsfehler oder Status ab 400).', labels=('node',)
+)
+
+
+class PeerNetzwerk:
+    "Eine Klasse, die die bekannten Nodes mit je einer Keep-Alive-Session verwaltet und Anfragen parallel an alle Peers verteilt."
+
+    def __init__(self, max_worker=16, timeout=5):
+        self.bekannte_nodes = set()
+        self.timeout = timeout
+        self.max_worker = max_worker
+        self._sessions = {}
+        self._statistik = {}
+        self._formate = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_worker, thread_name_prefix='peer')
+
+    def nodes(self):
+        "Eine Methode, die eine Momentaufnahme der bekannten Nodes zurückgibt (sicher gegen gleichzeitiges Registrieren)."
+
+        with self._lock:
+            return list(self.bekannte_nodes)
+
+    def hinzufügen(self, node):
+        "Eine Methode, die eine Node zu den bekannten Nodes hinzufügt."
+
+        with self._lock:
+            self.bekannte_nodes.add(node)
+
+    def formate_merken(self, node, formate):
+        "Eine Methode, die sich merkt, welche Medientypen eine Node (laut ihrem Tip) annimmt."
+
+        with self._lock:
+            self._formate[node] = frozenset(formate)
+
+    def unterstützt_format(self, node, mimetyp):
+        "Eine Methode, die angibt, ob eine Node den Medientyp annimmt; solange das unbekannt ist, wird nur JSON angenommen."
+
+        with self._lock:
+            return mimetyp in self._formate.get(node, ())
+
+    def _hole_session(self, node):
+        "Eine Methode, die die Keep-Alive-Session einer Node zurückgibt und sie beim ersten Zugriff anlegt."
+
+        with self._lock:
+            session = self._sessions.get(node)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_worker)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[node] = session
+                self._statistik[node] = {'anfragen': 0, 'fehler': 0, 'latenz_summe': 0.0, 'letzte_latenz': None}
+            return session
+
+    def _erfasse(self, node, latenz, fehler):
+        PEER_LATENZ.beobachten(latenz, node=node)
+        if fehler:
+            PEER_FEHLER.erhöhen(node=node)
+        with self._lock:
+            statistik = self._statistik[node]
+            statistik['anfragen'] += 1
+            statistik['latenz_summe'] += latenz
+            statistik['letzte_latenz'] = latenz
+            if fehler:
+                statistik['fehler'] += 1
+
+    def anfrage(self, node, methode, pfad, **kwargs):
+        "Eine Methode, die eine HTTP-Anfrage über die Session der Node sendet und Latenz sowie Fehler mitzählt."
+
+        session = self._hole_session(node)
+        kwargs.setdefault('timeout', self.timeout)
+
+        start_zeit = time.time()
+        try:
+            response = session.request(methode, f"{node}{pfad}", **kwargs)
+        except Exception:
+            self._erfasse(node, time.time() - start_zeit, fehler=True)
+            raise
+
+        self._erfasse(node, time.time() - start_zeit, fehler=response.status_code >= 400)
+        return response
+
+    def an_alle_parallel(self, funktion, nodes=None):
+        "Eine Methode, die funktion(node) für alle bekannten (oder die angegebenen) Nodes parallel ausführt und {node: (ergebnis, fehler)} zurückgibt."
+
+        futures = {node: self._executor.submit(funktion, node) for node in (self.nodes() if nodes is None else nodes)}
+        ergebnisse = {}
+        for node, future in futures.items():
+            try:
+                ergebnisse[node] = (future.result(), None)
+            except Exception as e:
+                ergebnisse[node] = (None, e)
+        return ergebnisse
+
+    def an_alle_senden(self, methode, pfad, erwarteter_status, beschreibung, auswerten=None, anfrage_für=None, **kwargs):
+        "Eine Methode, die eine Anfrage im Hintergrund parallel an alle bekannten Nodes sendet, ohne auf die Antworten zu warten; anfrage_für(node) kann die Argumente pro Node ergänzen."
+
+        def senden(node):
+            try:
+                node_kwargs = {**kwargs, **anfrage_für(node)} if anfrage_für is not None else kwargs
+                response = self.anfrage(node, methode, pfad, **node_kwargs)
+                if response.status_code == erwarteter_status and auswerten is not None:
+                    auswerten(node, response)
+                elif response.status_code == erwarteter_status:
+                    logger.debug("%s erfolgreich an Node %s gesendet.", beschreibung, node)
+                else:
+                    logger.warning("Fehler beim Senden (%s) an Node %s: %s", beschreibung, node, response.status_code)
+            except Exception as e:
+                logger.warning("Fehler beim Senden (%s) an Node %s: %s", beschreibung, node, e)
+
+        return [self._executor.submit(senden, node) for node in self.nodes()]
+
+    def statistik(self):
+        "Eine Methode, die pro Node Anzahl der Anfragen, Fehler und Latenzen zurückgibt."
+
+        with self._lock:
+            return {
+                node: {
+                    'anfragen': werte['anfragen'],
+                    'fehler': werte['fehler'],
+                    'durchschnittliche_latenz': werte['latenz_summe'] / werte['anfragen'] if werte['anfragen'] else None,
+                    'letzte_latenz': werte['letzte_latenz']
+                }
+                for node, werte in self._statistik.items()
+            }
+
+
+class TransaktionsBündler:
+    "Eine Klasse, die ausgehende Transaktionen sammelt und gebündelt an alle Peers sendet, sobald genug zusammen sind oder die Wartezeit abgelaufen ist."
+
+    def __init__(self, peer_netzwerk, pfad='/transactions/receive/batch', max_anzahl=100, max_wartezeit=0.05):
+        self.peer_netzwerk = peer_netzwerk
+        self.pfad = pfad
+        self.max_anzahl = max_anzahl
+        self.max_wartezeit = max_wartezeit
+
+        self._ausstehend = []
+        self._bedingung = threading.Condition()
+        self._thread = threading.Thread(target=self._arbeiten, daemon=True)
+        self._thread.start()
+
+    def hinzufügen(self, transaktion):
+        "Eine Methode, die eine Transaktion zum Senden vormerkt."
+
+        self.hinzufügen_mehrere([transaktion])
+
+    def hinzufügen_mehrere(self, transaktionen):
+        "Eine Methode, die mehrere Transaktionen zum Senden vormerkt."
+
+        with self._bedingung:
+            self._ausstehend.extend(transaktionen)
+            self._bedingung.notify()
+
+    def _arbeiten(self):
+        "Eine Methode, die im Hintergrund-Thread Bündel bildet und an alle Peers sendet."
+
+        while True:
+            with self._bedingung:
+                while not self._ausstehend:
+                    self._bedingung.wait()
+
+                # Ab der ersten Transaktion höchstens max_wartezeit auf weitere warten
+                frist = time.monotonic() + self.max_wartezeit
+                while len(self._ausstehend) < self.max_anzahl:
+                    verbleibend = frist - time.monotonic()
+                    if verbleibend <= 0:
+                        break
+                    self._bedingung.wait(verbleibend)
+
+                bündel = self._ausstehend[:self.max_anzahl]
+                del self._ausstehend[:self.max_anzahl]
+
+            if self.peer_netzwerk.nodes():
+                self.peer_netzwerk.an_alle_senden(
+                    'POST', self.pfad, 200, f"Bündel mit {len(bündel)} Transaktionen",
+                    auswerten=self._ergebnis_auswerten, anfrage_für=self._inhalt_für(bündel)
+                )
+
+    def _inhalt_für(self, bündel):
+        "Eine Methode, die eine Funktion zurückgibt, die das Bündel für jede Node im Binärformat oder (falls nicht unterstützt) als JSON liefert."
+
+        binär = None
+
+        def inhalt(node):
+            nonlocal binär
+            if not self.peer_netzwerk.unterstützt_format(node, binaerformat.MIMETYP):
+                return {'json': bündel}
+            # Das Bündel wird höchstens einmal kodiert, auch wenn es an mehrere Nodes geht
+            if binär is None:
+                binär = binaerformat.kodiere_transaktionen(bündel)
+            return {'data': binär, 'headers': {'Content-Type': binaerformat.MIMETYP}}
+
+        return inhalt
+
+    @staticmethod
+    def _ergebnis_auswerten(node, response):
+        "Eine Methode, die die Ergebnisse pro Transaktion einer Peer-Node zusammengefasst ausgibt."
+
+        anzahl_pro_status = {}
+        for ergebnis in response.json().get('ergebnisse', []):
+            anzahl_pro_status[ergebnis['status']] = anzahl_pro_status.get(ergebnis['status'], 0) + 1
+
+        zusammenfassung = ', '.join(f"{anzahl} {status}" for status, anzahl in sorted(anzahl_pro_status.items()))
+        logger.debug("Transaktionsbündel an Node %s gesendet: %s", node, zusammenfassung or 'leer')
@@ -0,0 +1,57 @@
+import logging
+import threading
+import time
+
+FORMAT = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+
+
+class RatenBegrenzer(logging.Filter):
+    "Ein Logging-Filter, der gleichartige Meldungen (gleiche Vorlage) auf höchstens max_pro_intervall pro Intervall begrenzt."
+
+    def __init__(self, max_pro_intervall=10, intervall=1.0):
+        super().__init__()
+        self.max_pro_intervall = max_pro_intervall
+        self.intervall = intervall
+        self._fenster = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.max_pro_intervall <= 0:
+            return True
+
+        # Meldungen werden mit %-Platzhaltern geloggt, die Vorlage ist daher für gleichartige Meldungen gleich
+        schlüssel = (record.name, record.msg)
+        jetzt = time.monotonic()
+
+        with self._lock:
+            start, anzahl, unterdrückt = self._fenster.get(schlüssel, (jetzt, 0, 0))
+            if jetzt - start >= self.intervall:
+                if unterdrückt:
+                    record.msg = f"{record.msg} [{unterdrückt} gleichartige Meldungen unterdrückt]"
+                start, anzahl, unterdrückt = jetzt, 0, 0
+
+            if anzahl < self.max_pro_intervall:
+                self._fenster[schlüssel] = (start, anzahl + 1, unterdrückt)
+                return True
+
+            self._fenster[schlüssel] = (start, anzahl, unterdrückt + 1)
+            return False
+
+
+def einrichten(level='INFO', max_pro_sekunde=10):
+    "Eine Funktion, die das Logging der Node mit Level und Ratenbegrenzung einrichtet (max_pro_sekunde=0 schaltet die Begrenzung ab)."
+
+    level = level.upper() if isinstance(level, str) else level
+
+    # Auch am Handler setzen, da z.B. werkzeug seinen Logger selbst auf INFO stellt
+    handler = logging.StreamHandler()
+    handler.setLevel(level)
+    handler.setFormatter(logging.Formatter(FORMAT))
+    handler.addFilter(RatenBegrenzer(max_pro_intervall=max_pro_sekunde))
+
+    wurzel = logging.getLogger()
+    for alter_handler in list(wurzel.handlers):
+        wurzel.removeHandler(alter_handler)
+    wurzel.addHandler(handler)
+    wurzel.setLevel(level)
+    return handler
@@ -0,0 +1,98 @@
+from collections import defaultdict
+
+
+class SpendenStatistik:
+    "Ein Index, der Spendensummen und Spenden pro Organisation und Sender bei jedem neuen oder entfernten Block fortschreibt."
+
+    def __init__(self, organisationen):
+        self.organisationen = list(organisationen)
+        self.neu_aufbauen([])
+
+    def neu_aufbauen(self, chain):
+        "Eine Methode, die den Index aus einer vollständigen Chain aufbaut."
+
+        self.gesamt_transaktionen = 0.0
+        self.transaktionen_pro_organisation = {organisation: 0.0 for organisation in self.organisationen}
+
+        # Empfänger bzw. Sender -> Liste von (Block-Index, Transaktion) in Chain-Reihenfolge
+        self.nach_empfänger = defaultdict(list)
+        self.nach_sender = defaultdict(list)
+
+        for block in chain:
+            self.block_hinzufügen(block)
+
+        self.veröffentlichen()
+
+    def veröffentlichen(self):
+        "Eine Methode, die nach einer abgeschlossenen Änderung der Chain die Summen als unveränderliche Momentaufnahme bereitstellt."
+
+        self._summen = (self.gesamt_transaktionen, dict(self.transaktionen_pro_organisation))
+
+    def summen(self):
+        "Eine Methode, die Gesamtsumme und Summen pro Organisation zum zuletzt veröffentlichten Stand zurückgibt."
+
+        gesamt_transaktionen, transaktionen_pro_organisation = self._summen
+        return gesamt_transaktionen, dict(transaktionen_pro_organisation)
+
+    def block_hinzufügen(self, block):
+        "Eine Methode, die die Transaktionen eines neuen Blocks am Ende der Chain in den Index aufnimmt."
+
+        # Genesis-Block überspringen
+        if block.index == 0:
+            return
+
+        for transaktion in block.transaktionen:
+            betrag = float(transaktion['betrag'])
+            self.gesamt_transaktionen += betrag
+
+            empfänger = transaktion['empfänger']
+            if empfänger in self.transaktionen_pro_organisation:
+                self.transaktionen_pro_organisation[empfänger] += betrag
+
+            self.nach_empfänger[empfänger].append((block.index, transaktion))
+            self.nach_sender[transaktion['sender']].append((block.index, transaktion))
+
+    def block_entfernen(self, block):
+        "Eine Methode, die die Transaktionen des letzten Blocks der Chain wieder aus dem Index entfernt (z.B. bei einem Fork)."
+
+        if block.index == 0:
+            return
+
+        # Blöcke werden vom Ende her entfernt, ihre Einträge stehen daher am Ende der Listen
+        for transaktion in reversed(block.transaktionen):
+            betrag = float(transaktion['betrag'])
+            self.gesamt_transaktionen -= betrag
+
+            empfänger = transaktion['empfänger']
+            if empfänger in self.transaktionen_pro_organisation:
+                self.transaktionen_pro_organisation[empfänger] -= betrag
+
+            self._letzten_eintrag_entfernen(self.nach_empfänger, empfänger)
+            self._letzten_eintrag_entfernen(self.nach_sender, transaktion['sender'])
+
+    @staticmethod
+    def _letzten_eintrag_entfernen(index, schlüssel):
+        einträge = index[schlüssel]
+        einträge.pop()
+        if not einträge:
+            del index[schlüssel]
+
+    def spenden_an(self, empfänger, offset=0, limit=50):
+        "Eine Methode, die die Spenden an einen Empfänger seitenweise, neueste zuerst, sowie deren Gesamtanzahl zurückgibt."
+
+        return self._seite(self.nach_empfänger.get(empfänger, []), offset, limit)
+
+    def spenden_von(self, sender, offset=0, limit=50):
+        "Eine Methode, die die Spenden eines Senders seitenweise, neueste zuerst, sowie deren Gesamtanzahl zurückgibt."
+
+        return self._seite(self.nach_sender.get(sender, []), offset, limit)
+
+    @staticmethod
+    def _seite(einträge, offset, limit):
+        ende = len(einträge) - offset
+        start = max(ende - limit, 0)
+        seite = [
+            {**transaktion, 'block_index': block_index}
+            for block_index, transaktion in reversed(einträge[start:max(ende, 0)])
+        ]
+        return seite, len(einträge)
@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# node.py liest seine Konfiguration beim Import aus der Umgebung: niedrigste Schwierigkeit, ein Prozess, eigene Log-Datei
+os.environ.setdefault('BLOCK_SPEICHER', os.path.join(tempfile.mkdtemp(prefix='blockchain_tests_'), 'blockchain.log'))
+os.environ.setdefault('START_SCHWIERIGKEIT', '1')
+os.environ.setdefault('SCHUERF_WORKER', '1')
+os.environ.setdefault('PRUEF_WORKER', '1')
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import node  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    "Eine Fixture, die einen Flask-Test-Client der Node zurückgibt."
+
+    return node.app.test_client()
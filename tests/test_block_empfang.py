@@ -0,0 +1,94 @@
+import time
+
+import node
+from blockchain import Block
+
+
+def spende(betrag):
+    "Eine Funktion, die eine Transaktion mit eindeutigem Zeitstempel erstellt."
+
+    return {'sender': 'Anna', 'empfänger': 'WWF', 'betrag': betrag, 'zeitstempel': time.time()}
+
+
+def block_auf_tip(transaktionen):
+    "Eine Funktion, die einen gültig geschürften Block mit den Transaktionen auf den aktuellen Tip erstellt."
+
+    tip = node.blockchain.hole_letzten_block()
+    block = Block(
+        index=tip.index + 1,
+        zeitstempel=max(time.time(), tip.zeitstempel + 0.001),
+        transaktionen=transaktionen,
+        vorheriger_hash=tip.hash,
+        ziel=node.blockchain.nächstes_ziel()
+    )
+    block.block_schürfen()
+    return block
+
+
+def bestätigte_spende():
+    "Eine Funktion, die eine Spende über einen empfangenen Block in die Chain bringt und zurückgibt."
+
+    transaktion = spende(5)
+    assert node.blockchain.füge_empfangenen_block_hinzu(block_auf_tip([transaktion])) == 'angehängt'
+    return transaktion
+
+
+def test_block_mit_neuer_spende_wird_angehängt(client):
+    response = client.post('/blocks/receive', json=block_auf_tip([spende(1)]).in_dictionary_umwandeln())
+
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'angehängt'
+
+
+def test_block_mit_bestätigter_spende_wird_abgelehnt(client):
+    transaktion = bestätigte_spende()
+    länge = node.blockchain.schnappschuss().länge
+
+    response = client.post('/blocks/receive', json=block_auf_tip([dict(transaktion)]).in_dictionary_umwandeln())
+
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'ungültig'
+    assert node.blockchain.schnappschuss().länge == länge
+
+
+def test_block_mit_doppelter_spende_wird_abgelehnt(client):
+    transaktion = spende(3)
+    länge = node.blockchain.schnappschuss().länge
+
+    response = client.post('/blocks/receive', json=block_auf_tip([transaktion, dict(transaktion)]).in_dictionary_umwandeln())
+
+    assert response.status_code == 400
+    assert node.blockchain.schnappschuss().länge == länge
+
+
+def test_bestätigte_spende_wird_nicht_erneut_aufgenommen(client):
+    transaktion = bestätigte_spende()
+
+    response = client.post('/transactions/receive/batch', json=[dict(transaktion)])
+
+    assert response.get_json()['ergebnisse'][0]['status'] == 'bestätigt'
+    assert node.transaktions_index.finde_block(response.get_json()['ergebnisse'][0]['txid']) is not None
+
+
+def test_chain_mit_doppelter_spende_ist_ungültig():
+    chain = list(node.blockchain.schnappschuss().chain)
+    transaktion = spende(2)
+    for _ in range(2):
+        tip = chain[-1]
+        block = Block(tip.index + 1, tip.zeitstempel + 1, [dict(transaktion)], tip.hash,
+                      ziel=node.blockchain.berechne_ziel_für(chain, len(chain)))
+        block.block_schürfen()
+        chain.append(block)
+
+    assert not node.blockchain.ist_erhaltene_chain_valide(chain, ab_index=len(chain) - 2)
+
+
+def test_block_mit_falschen_feldtypen_wird_mit_400_abgelehnt(client):
+    block_daten = block_auf_tip([spende(4)]).in_dictionary_umwandeln()
+    länge = node.blockchain.schnappschuss().länge
+
+    for feld, wert in (('hash', [1]), ('vorheriger_hash', [1]), ('index', "1"), ('transaktionen', "keine Liste")):
+        response = client.post('/blocks/receive', json=dict(block_daten, **{feld: wert}))
+
+        assert response.status_code == 400, feld
+    assert node.blockchain.schnappschuss().länge == länge
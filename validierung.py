@@ -0,0 +1,67 @@
+import json
+import multiprocessing
+import os
+from collections import deque
+
+from blockchain import Block
+
+
+def _abschnitt_prüfen(von, block_bytes_liste):
+    "Eine Funktion, die im Worker-Prozess Hash und Merkle-Wurzel eines Abschnitts ab Position von nachrechnet und den ersten ungültigen Block als (Position, Grund) zurückgibt."
+
+    for position, json_bytes in enumerate(block_bytes_liste, von):
+        block = Block._ohne_hash_erstellen(json.loads(json_bytes))
+        if block.hash != block.berechne_hash():
+            return position, 'Ungültiger Hash'
+        if block.merkle_wurzel != block.berechne_merkle_wurzel():
+            return position, 'Ungültige Merkle-Wurzel'
+
+    return None
+
+
+class ParallelerPrüfer:
+    "Ein Prüfer, der die voneinander unabhängigen Hash- und Merkle-Prüfungen langer Chains abschnittsweise auf mehrere Prozesse verteilt."
+
+    def __init__(self, anzahl_worker=None, abschnitt_größe=100, min_blöcke=200):
+        self.anzahl_worker = anzahl_worker or os.cpu_count() or 1
+        self.abschnitt_größe = abschnitt_größe
+        # Bei wenigen Blöcken ist die Übertragung an die Worker teurer als die Prüfung selbst
+        self.min_blöcke = min_blöcke
+        self._pool = None
+
+    def _hole_pool(self):
+        "Eine Methode, die den Prozess-Pool bei der ersten Prüfung erstellt und danach wiederverwendet."
+
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(processes=self.anzahl_worker)
+        return self._pool
+
+    def lohnt_sich(self, anzahl_blöcke):
+        "Eine Methode, die angibt, ob sich die parallele Prüfung für so viele Blöcke lohnt."
+
+        return anzahl_blöcke >= self.min_blöcke
+
+    def finde_ungültigen_block(self, chain, von, bis):
+        "Eine Methode, die Hash und Merkle-Wurzel der Blöcke von (inklusive) bis (exklusive) parallel prüft und den ersten ungültigen Block als (Position, Grund) oder None zurückgibt."
+
+        pool = self._hole_pool()
+
+        # Höchstens zwei Abschnitte pro Worker gleichzeitig vergeben, damit nach einem Fund nicht mehr viel umsonst geprüft wird
+        max_ausstehend = 2 * self.anzahl_worker
+        ausstehend = deque()
+        nächster = von
+
+        while nächster < bis or ausstehend:
+            while nächster < bis and len(ausstehend) < max_ausstehend:
+                ende = min(nächster + self.abschnitt_größe, bis)
+                # Übertragen werden die zwischengespeicherten JSON-Bytes, das ist billiger als die Blöcke zu pickeln
+                abschnitt = [chain[i].als_json_bytes() for i in range(nächster, ende)]
+                ausstehend.append(pool.apply_async(_abschnitt_prüfen, (nächster, abschnitt)))
+                nächster = ende
+
+            # Die Abschnitte werden in Reihenfolge ausgewertet, der erste Fund ist daher auch der früheste ungültige Block
+            ergebnis = ausstehend.popleft().get()
+            if ergebnis is not None:
+                return ergebnis
+
+        return None
@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+
+
+class WaisenPool:
+    "Eine Klasse, die empfangene Blöcke ohne bekannten Vorgänger aufbewahrt, bis dieser eintrifft; bei vollem Pool wird die älteste Waise verworfen."
+
+    def __init__(self, max_anzahl=100):
+        self.max_anzahl = max_anzahl
+        # Block-Hash -> Block in Reihenfolge des Eintreffens und Vorgänger-Hash -> Hashes der wartenden Nachfolger
+        self._blöcke = OrderedDict()
+        self._nachfolger = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._blöcke)
+
+    def __contains__(self, block_hash):
+        return block_hash in self._blöcke
+
+    def hinzufügen(self, block):
+        "Eine Methode, die eine Waise aufnimmt; gibt False zurück, wenn sie bereits vorhanden ist."
+
+        with self._lock:
+            if block.hash in self._blöcke:
+                return False
+
+            while len(self._blöcke) >= self.max_anzahl:
+                self._entfernen(next(iter(self._blöcke)))
+
+            self._blöcke[block.hash] = block
+            self._nachfolger.setdefault(block.vorheriger_hash, set()).add(block.hash)
+            return True
+
+    def hole(self, block_hash):
+        "Eine Methode, die eine Waise zurückgibt, ohne sie zu entfernen, oder None."
+
+        with self._lock:
+            return self._blöcke.get(block_hash)
+
+    def entfernen(self, block_hash):
+        "Eine Methode, die eine Waise entfernt (z.B. weil sie inzwischen Teil der Chain ist)."
+
+        with self._lock:
+            self._entfernen(block_hash)
+
+    def nachfolger_entnehmen(self, block_hash):
+        "Eine Methode, die alle Waisen mit dem angegebenen Vorgänger entfernt und zurückgibt."
+
+        with self._lock:
+            return [self._entfernen(nachfolger_hash) for nachfolger_hash in list(self._nachfolger.get(block_hash, ()))]
+
+    def _entfernen(self, block_hash):
+        block = self._blöcke.pop(block_hash, None)
+        if block is None:
+            return None
+
+        geschwister = self._nachfolger.get(block.vorheriger_hash)
+        if geschwister is not None:
+            geschwister.discard(block_hash)
+            if not geschwister:
+                del self._nachfolger[block.vorheriger_hash]
+        return block